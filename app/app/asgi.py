@@ -12,5 +12,9 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
+# Serve recipe, tag and ingredient reads from the async thread pool.
+# Streaming responses (the recipe export) block the loop per chunk on
+# Django 3.2; route them to WSGI workers.
+os.environ.setdefault('ASYNC_READ_ENDPOINTS', '1')
 
 application = get_asgi_application()
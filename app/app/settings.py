@@ -47,6 +47,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.QueryInstrumentationMiddleware',
+    'core.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -54,6 +56,8 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.ReplicaRoutingMiddleware',
+    'core.middleware.RequestProfilerMiddleware',
 ]
 
 ROOT_URLCONF = 'app.urls'
@@ -80,13 +84,65 @@ WSGI_APPLICATION = 'app.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/3.2/ref/settings/#databases
 
+# DB_POOL=1 (default) borrows connections from a per-process pool instead of
+# connecting on every request, see core/db/backends/pooled_postgresql.
+DB_POOL = os.environ.get('DB_POOL', '1') == '1'
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': (
+            'core.db.backends.pooled_postgresql' if DB_POOL
+            else 'django.db.backends.postgresql'
+        ),
         'HOST': os.environ.get('DB_HOST'),
         'NAME': os.environ.get('DB_NAME'),
         'USER': os.environ.get('DB_USER'),
-        'PASSWORD': os.environ.get('DB_PASSWORD')
+        'PASSWORD': os.environ.get('DB_PASSWORD'),
+        'POOL': {
+            'MIN_SIZE': int(os.environ.get('DB_POOL_MIN_SIZE', 2)),
+            'MAX_SIZE': int(os.environ.get('DB_POOL_MAX_SIZE', 10)),
+            'TIMEOUT': float(os.environ.get('DB_POOL_TIMEOUT', 10)),
+            'MAX_IDLE': float(os.environ.get('DB_POOL_MAX_IDLE', 300)),
+            'MAX_LIFETIME': float(
+                os.environ.get('DB_POOL_MAX_LIFETIME', 3600)
+            ),
+            'CHECK_ON_CHECKOUT': os.environ.get('DB_POOL_CHECK', '1') == '1',
+        },
+    }
+}
+
+# Read replicas: DB_REPLICA_HOSTS=host1,host2 adds aliases replica_0, ...
+# with the primary's credentials. core.routers sends safe reads of the
+# recipe, tag, ingredient and user endpoints there (see READ_REPLICAS).
+READ_REPLICA_ALIASES = []
+for index, host in enumerate(
+    filter(None, os.environ.get('DB_REPLICA_HOSTS', '').split(','))
+):
+    alias = f'replica_{index}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'HOST': host.strip(),
+        'TEST': {'MIRROR': 'default'},
+    }
+    READ_REPLICA_ALIASES.append(alias)
+
+DATABASE_ROUTERS = (
+    ['core.routers.ReplicaRouter'] if READ_REPLICA_ALIASES else []
+)
+
+
+# Cache
+# Collection version stamps (ETags) and token lookups live here. Multi-worker
+# deployments must point this at a shared backend, e.g.
+# CACHE_BACKEND=django.core.cache.backends.memcached.PyMemcacheCache.
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache',
+        ),
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
     }
 }
 
@@ -140,10 +196,127 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 AUTH_USER_MODEL = 'core.User'
 
+# NUM_PROXIES: reverse proxies in front of the app. Per-IP throttles only
+# trust that many X-Forwarded-For entries; with 0 they use REMOTE_ADDR.
 REST_FRAMEWORK = {
-    'DEFAULT_SCHEMA_CLASS':'drf_spectacular.openapi.AutoSchema'
+    'DEFAULT_SCHEMA_CLASS':'drf_spectacular.openapi.AutoSchema',
+    'NUM_PROXIES': int(os.environ.get('NUM_PROXIES', 0)),
+}
+
+# Token -> user lookups cached by
+# user.authentication.CachedTokenAuthentication.
+# Set CACHE_ALIAS to a shared cache (e.g. redis) to add a second tier.
+# Revocations are published through REVOCATION_CACHE_ALIAS, which must be
+# shared between workers.
+TOKEN_AUTH_CACHE = {
+    'MAX_SIZE': int(os.environ.get('TOKEN_AUTH_CACHE_SIZE', 10000)),
+    'TTL': int(os.environ.get('TOKEN_AUTH_CACHE_TTL', 60)),
+    'CACHE_ALIAS': os.environ.get('TOKEN_AUTH_CACHE_ALIAS'),
+    'REVOCATION_CACHE_ALIAS': os.environ.get(
+        'TOKEN_AUTH_REVOCATION_CACHE_ALIAS', 'default'
+    ),
+}
+
+# Server-Timing/X-Query-Count headers and slow request logging, see
+# core.middleware.QueryInstrumentationMiddleware.
+REQUEST_INSTRUMENTATION = {
+    'ENABLED': os.environ.get('REQUEST_INSTRUMENTATION', '0') == '1',
+    'QUERY_THRESHOLD': int(os.environ.get('SLOW_REQUEST_QUERIES', 50)),
+    'LATENCY_THRESHOLD_MS': int(os.environ.get('SLOW_REQUEST_MS', 500)),
+    'DUPLICATE_THRESHOLD': int(os.environ.get('DUPLICATE_QUERY_COUNT', 3)),
+}
+
+# cProfile of requests asked for by staff (X-Profile: 1 or ?profile=1) or
+# sampled at SAMPLE_RATE, kept in a ring buffer of MAX_PROFILES files.
+# Inspect them with `manage.py request_profiles`.
+REQUEST_PROFILING = {
+    'ENABLED': os.environ.get('REQUEST_PROFILING', '0') == '1',
+    'SAMPLE_RATE': float(os.environ.get('REQUEST_PROFILING_SAMPLE_RATE', 0)),
+    'DIRECTORY': os.environ.get('REQUEST_PROFILING_DIR'),
+    'MAX_PROFILES': int(os.environ.get('REQUEST_PROFILING_MAX', 50)),
 }
 
+# Prometheus metrics served at /metrics. With several worker processes set
+# DIRECTORY to a path they share so the endpoint can sum their snapshots;
+# TOKEN requires "Authorization: Bearer <token>" from the scraper.
+METRICS = {
+    'ENABLED': os.environ.get('METRICS', '0') == '1',
+    'DIRECTORY': os.environ.get('METRICS_DIR'),
+    'FLUSH_INTERVAL': float(os.environ.get('METRICS_FLUSH_INTERVAL', 5)),
+    'TOKEN': os.environ.get('METRICS_TOKEN'),
+}
+
+# Replica routing (core.routers). After a write a client reads from the
+# primary for STICKY_SECONDS; keep it above the replicas' usual lag. The
+# sticky flags need a cache shared by all workers.
+READ_REPLICAS = {
+    'ALIASES': READ_REPLICA_ALIASES,
+    'STICKY_SECONDS': float(os.environ.get('DB_REPLICA_STICKY_SECONDS', 5)),
+    'CACHE_ALIAS': os.environ.get('DB_REPLICA_CACHE_ALIAS', 'default'),
+}
+
+# Async reads of the recipe, tag and ingredient endpoints (core.async_views).
+# On by default under app/asgi.py; off under WSGI, where async views would
+# each need their own event loop.
+ASYNC_READ_ENDPOINTS = {
+    'ENABLED': os.environ.get('ASYNC_READ_ENDPOINTS', '0') == '1',
+    'THREADS': int(os.environ.get('ASYNC_READ_THREADS', 16)),
+    'MAX_CONCURRENCY': int(os.environ.get('ASYNC_READ_MAX_CONCURRENCY', 64)),
+    'PER_CLIENT': int(os.environ.get('ASYNC_READ_PER_CLIENT', 8)),
+    'QUEUE_TIMEOUT': float(os.environ.get('ASYNC_READ_QUEUE_TIMEOUT', 5)),
+}
+
+# Sliding-window limits for the token and registration endpoints, see
+# user.throttling. BACKEND 'cache' shares counters between processes through
+# CACHE_ALIAS; MAX_CONCURRENT_HASHES caps parallel PBKDF2 work per process.
+LOGIN_THROTTLE = {
+    'BACKEND': os.environ.get('LOGIN_THROTTLE_BACKEND', 'cache'),
+    'CACHE_ALIAS': os.environ.get('LOGIN_THROTTLE_CACHE_ALIAS', 'default'),
+    'RATES': {
+        'login_email': os.environ.get('LOGIN_THROTTLE_EMAIL_RATE', '5/min'),
+        'login_ip': os.environ.get('LOGIN_THROTTLE_IP_RATE', '30/min'),
+        'register_ip': os.environ.get('REGISTER_THROTTLE_IP_RATE', '20/hour'),
+    },
+    'MAX_CONCURRENT_HASHES': int(
+        os.environ.get('LOGIN_MAX_CONCURRENT_HASHES', 0)
+    ) or None,
+}
+
+# Rendered tag/ingredient list payloads cached per process.
+RESPONSE_CACHE = {
+    'MAX_ENTRIES': int(os.environ.get('RESPONSE_CACHE_ENTRIES', 1000)),
+    'MAX_BYTES': int(os.environ.get('RESPONSE_CACHE_BYTES', 16 * 1024 * 1024)),
+}
+
+# Upload limits checked before an uploaded recipe image is decoded.
+RECIPE_IMAGE_MAX_BYTES = int(
+    os.environ.get('RECIPE_IMAGE_MAX_BYTES', 10 * 1024 * 1024)
+)
+RECIPE_IMAGE_MAX_PIXELS = int(
+    os.environ.get('RECIPE_IMAGE_MAX_PIXELS', 40 * 1000 * 1000)
+)
+
+# Thumbnails and re-encodes of uploaded recipe images, built in a process pool.
+RECIPE_IMAGE_DERIVATIVES = {
+    'ASYNC': os.environ.get('RECIPE_IMAGE_DERIVATIVES_ASYNC', '1') == '1',
+    'WORKERS': int(os.environ.get('RECIPE_IMAGE_DERIVATIVE_WORKERS', 2)),
+}
+
+# Largest batch accepted by /api/recipe/recipes/bulk/.
+RECIPE_BULK_MAX_ITEMS = int(os.environ.get('RECIPE_BULK_MAX_ITEMS', 1000))
+
+# Rows fetched (and relations prefetched) per chunk by the NDJSON export.
+RECIPE_EXPORT_CHUNK_SIZE = int(os.environ.get('RECIPE_EXPORT_CHUNK_SIZE', 500))
+
+# Dotted path of the recipe search backend. Empty picks PostgreSQL full-text
+# search on PostgreSQL and the in-process inverted index elsewhere.
+RECIPE_SEARCH_BACKEND = os.environ.get('RECIPE_SEARCH_BACKEND')
+
+# Seconds facet counts stay cached. Writes invalidate them through the
+# collection version stamps; the timeout only bounds how long stale keys
+# occupy the cache.
+RECIPE_FACETS_TIMEOUT = int(os.environ.get('RECIPE_FACETS_TIMEOUT', 300))
+
 SPECTACULAR_SETTINGS = {
     'COMPONENT_SPLIT_REQUEST':True,
 }
\ No newline at end of file
@@ -0,0 +1,32 @@
+"""
+Settings with two SQLite databases standing in for a primary and a replica.
+
+Nothing copies rows between them; migrate both first:
+
+    DJANGO_SETTINGS_MODULE=app.settings_replica python manage.py migrate
+    DJANGO_SETTINGS_MODULE=app.settings_replica \
+        python manage.py migrate --database replica
+
+Routing stays off so the test suite runs unchanged (the replica tests in
+core.tests.test_routers switch it on themselves). Set DB_REPLICA_ROUTING=1
+to route reads to the replica, e.g. under runserver.
+"""
+import os
+
+from app.settings import *  # noqa: F401,F403
+from app.settings import BASE_DIR, READ_REPLICAS
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db.sqlite3',
+    },
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db-replica.sqlite3',
+    },
+}
+
+if os.environ.get('DB_REPLICA_ROUTING') == '1':
+    READ_REPLICAS = {**READ_REPLICAS, 'ALIASES': ['replica']}
+    DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
@@ -0,0 +1,283 @@
+"""
+Async wrappers serving DRF read views from a bounded thread pool.
+
+Under ASGI Django runs every sync view through one thread per request
+context (sync_to_async with thread_sensitive=True), so concurrent list
+requests queue behind each other. The wrappers below run safe requests
+of selected views in a dedicated pool instead, where their ORM calls can
+overlap, and cap in-flight requests globally and per client.
+"""
+import asyncio
+import contextvars
+import functools
+import hashlib
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from importlib import import_module
+from types import ModuleType
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections, connections
+from django.http import JsonResponse
+from django.urls import URLPattern, URLResolver
+
+DEFAULT_ASYNC_READ_ENDPOINTS = {
+    'ENABLED': False,
+    'THREADS': 16,
+    'MAX_CONCURRENCY': 64,
+    'PER_CLIENT': 8,
+    'QUEUE_TIMEOUT': 5,
+}
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+def async_settings():
+    """Return ASYNC_READ_ENDPOINTS merged over the defaults."""
+    return {
+        **DEFAULT_ASYNC_READ_ENDPOINTS,
+        **getattr(settings, 'ASYNC_READ_ENDPOINTS', {}),
+    }
+
+
+_executor = None
+_limiters = weakref.WeakKeyDictionary()
+
+
+def get_executor():
+    """Return the pool running wrapped views, created on first use."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=async_settings()['THREADS'],
+            thread_name_prefix='async-read',
+        )
+    return _executor
+
+
+class ConcurrencyLimiter:
+    """In-flight request limits of one event loop.
+
+    Only touched from its loop, so the per-client counts need no lock.
+    """
+
+    def __init__(self, max_concurrency, per_client):
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.per_client = per_client
+        self.active = {}
+
+    def enter(self, client):
+        """Count a request for client; False if it is over its limit."""
+        count = self.active.get(client, 0)
+        if count >= self.per_client:
+            return False
+        self.active[client] = count + 1
+        return True
+
+    def leave(self, client):
+        count = self.active.pop(client) - 1
+        if count:
+            self.active[client] = count
+
+
+def _limiter():
+    loop = asyncio.get_running_loop()
+    limiter = _limiters.get(loop)
+    if limiter is None:
+        options = async_settings()
+        limiter = _limiters[loop] = ConcurrencyLimiter(
+            options['MAX_CONCURRENCY'], options['PER_CLIENT']
+        )
+    return limiter
+
+
+def _client_key(request):
+    """Identify the caller by its credentials, else by its address."""
+    authorization = request.META.get('HTTP_AUTHORIZATION')
+    if authorization:
+        return hashlib.sha256(authorization.encode()).hexdigest()
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def _run_view(view_func, request, args, kwargs):
+    """Call and render a sync view in a pool thread.
+
+    Pool threads are not request threads, so they close stale connections
+    themselves, as request_started/request_finished would.
+    """
+    close_old_connections()
+    try:
+        response = view_func(request, *args, **kwargs)
+        if hasattr(response, 'render') and callable(response.render):
+            response.render()
+        return response
+    finally:
+        close_old_connections()
+
+
+async def run_in_pool(view_func, request, *args, **kwargs):
+    """Run a sync view in the pool with the caller's context variables."""
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(
+        get_executor(), context.run,
+        _run_view, view_func, request, args, kwargs,
+    )
+
+
+_DONE = object()
+
+
+def _step(iterator):
+    try:
+        return next(iterator)
+    except StopIteration:
+        return _DONE
+
+
+def _finish(iterator):
+    try:
+        close = getattr(iterator, 'close', None)
+        if close is not None:
+            close()
+    finally:
+        connections.close_all()
+
+
+def sync_streaming_content(iterable):
+    """Iterate streaming content that uses the ORM safely under ASGI.
+
+    Django 3.2's ASGIHandler iterates StreamingHttpResponse content in
+    the event loop, where ORM calls raise SynchronousOnlyOperation. With
+    a running loop every step runs in one dedicated thread instead (a
+    server-side cursor is tied to its thread's connection), whose
+    connections are closed at the end. Without one it iterates directly.
+
+    This only makes streams correct under ASGI, not concurrent: the
+    handler consumes the iterator synchronously (async iterators need
+    Django 4.2), so the loop blocks while each chunk is fetched. Serve
+    streaming endpoints such as the recipe export from WSGI workers.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        yield from iterable
+        return
+
+    iterator = iter(iterable)
+    executor = ThreadPoolExecutor(
+        max_workers=1, thread_name_prefix='streaming'
+    )
+    try:
+        while True:
+            item = executor.submit(_step, iterator).result()
+            if item is _DONE:
+                return
+            yield item
+    finally:
+        executor.submit(_finish, iterator).result()
+        executor.shutdown()
+
+
+def _limited(detail, status, retry_after):
+    response = JsonResponse({'detail': detail}, status=status)
+    response['Retry-After'] = str(retry_after)
+    return response
+
+
+def async_read_view(view_func):
+    """Wrap a sync view so safe requests run in the bounded pool.
+
+    Writes keep Django's default treatment of sync views. functools.wraps
+    keeps DRF's cls/actions attributes and csrf_exempt on the wrapper.
+    """
+    @functools.wraps(view_func)
+    async def view(request, *args, **kwargs):
+        if request.method not in SAFE_METHODS:
+            return await sync_to_async(view_func, thread_sensitive=True)(
+                request, *args, **kwargs
+            )
+
+        limiter = _limiter()
+        client = _client_key(request)
+        options = async_settings()
+        if not limiter.enter(client):
+            return _limited(
+                'Too many concurrent requests.', 429, 1,
+            )
+        try:
+            try:
+                await asyncio.wait_for(
+                    limiter.semaphore.acquire(), options['QUEUE_TIMEOUT']
+                )
+            except asyncio.TimeoutError:
+                return _limited(
+                    'Server busy.', 503, options['QUEUE_TIMEOUT'],
+                )
+            try:
+                return await run_in_pool(view_func, request, *args, **kwargs)
+            finally:
+                limiter.semaphore.release()
+        finally:
+            limiter.leave(client)
+    return view
+
+
+def _module_name(urlconf):
+    name = getattr(urlconf, '__name__', None) or str(urlconf)
+    return f'{name}.async'
+
+
+def _urlconf_module(name, urlpatterns):
+    """Return a module object holding urlpatterns.
+
+    get_resolver() is lru-cached on its urlconf, so the urlconf must be
+    hashable; a module also reads naturally in resolver reprs.
+    """
+    module = ModuleType(name)
+    module.urlpatterns = urlpatterns
+    return module
+
+
+def async_read_urls(patterns, views):
+    """Return patterns with the callbacks of views wrapped.
+
+    views are view classes; other routes, and includes leading to them,
+    are left as they are.
+    """
+    wrapped = []
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            wrapped.append(URLResolver(
+                pattern.pattern,
+                _urlconf_module(
+                    _module_name(pattern.urlconf_name),
+                    async_read_urls(pattern.url_patterns, views),
+                ),
+                pattern.default_kwargs,
+                pattern.app_name,
+                pattern.namespace,
+            ))
+        elif (getattr(pattern.callback, 'cls', None) in views
+                and not asyncio.iscoroutinefunction(pattern.callback)):
+            wrapped.append(URLPattern(
+                pattern.pattern,
+                async_read_view(pattern.callback),
+                pattern.default_args,
+                pattern.name,
+            ))
+        else:
+            wrapped.append(pattern)
+    return wrapped
+
+
+def async_urlconf(urlconf, views):
+    """Build a URLconf object serving views asynchronously.
+
+    Usable as ROOT_URLCONF, e.g. to compare both modes in one process.
+    """
+    module = import_module(urlconf)
+    return _urlconf_module(
+        _module_name(module), async_read_urls(module.urlpatterns, views)
+    )
@@ -0,0 +1,48 @@
+"""
+Helpers for the benchmark management commands.
+"""
+import time
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.test.utils import CaptureQueriesContext
+
+
+@contextmanager
+def rolled_back(using=DEFAULT_DB_ALIAS):
+    """Run the block in a transaction that is always rolled back."""
+    with transaction.atomic(using=using):
+        yield
+        transaction.set_rollback(True, using=using)
+
+
+def measure(func, *args, using=DEFAULT_DB_ALIAS, **kwargs):
+    """Call func and return (result, seconds, query count)."""
+    with CaptureQueriesContext(connections[using]) as context:
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        elapsed = time.perf_counter() - start
+    return result, elapsed, len(context)
+
+
+def api_client(user=None):
+    """Return an APIClient usable outside the test runner."""
+    from rest_framework.test import APIClient
+
+    # The test runner adds 'testserver' to ALLOWED_HOSTS; we are not in it.
+    client = APIClient(HTTP_HOST='localhost')
+    if user is not None:
+        client.force_authenticate(user)
+    return client
+
+
+def percentiles(samples, points=(50, 95, 99)):
+    """Return {point: value} using nearest-rank percentiles."""
+    ordered = sorted(samples)
+    if not ordered:
+        return {point: None for point in points}
+    return {
+        point: ordered[min(len(ordered) - 1,
+                           max(0, round(point / 100 * len(ordered)) - 1))]
+        for point in points
+    }
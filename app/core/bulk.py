@@ -0,0 +1,58 @@
+"""
+Bulk write helpers shared by the importers and bulk APIs.
+"""
+import csv
+import io
+
+from django.db import connections, router
+
+
+def bulk_insert(model, objs, batch_size=None):
+    """bulk_create that always leaves primary keys set on objs.
+
+    Backends that cannot return ids from a bulk insert fall back to saving
+    row by row.
+    """
+    using = router.db_for_write(model)
+    if connections[using].features.can_return_rows_from_bulk_insert:
+        return model.objects.using(using).bulk_create(
+            objs, batch_size=batch_size
+        )
+    for obj in objs:
+        obj.save(using=using)
+    return objs
+
+
+def can_copy(model):
+    """Return True if rows of model can be loaded with COPY."""
+    return connections[router.db_for_write(model)].vendor == 'postgresql'
+
+
+def reserve_ids(model, count):
+    """Draw count ids from the PostgreSQL sequence of model's primary key."""
+    connection = connections[router.db_for_write(model)]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT nextval(pg_get_serial_sequence(%s, %s)) '
+            'FROM generate_series(1, %s)',
+            [model._meta.db_table, model._meta.pk.column, count],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def copy_rows(model, columns, rows):
+    """Load rows (tuples matching columns) into model's table with COPY."""
+    if not rows:
+        return
+    buffer = io.StringIO()
+    csv.writer(buffer, quoting=csv.QUOTE_ALL).writerows(rows)
+    buffer.seek(0)
+
+    connection = connections[router.db_for_write(model)]
+    quote = connection.ops.quote_name
+    sql = 'COPY {} ({}) FROM STDIN WITH (FORMAT csv)'.format(
+        quote(model._meta.db_table),
+        ', '.join(quote(column) for column in columns),
+    )
+    with connection.cursor() as cursor:
+        cursor.cursor.copy_expert(sql, buffer)
@@ -0,0 +1,60 @@
+"""
+PostgreSQL backend that borrows connections from a process-wide pool.
+
+Django opens a connection per request with CONN_MAX_AGE = 0; with this
+backend "opening" checks one out of the pool and "closing" returns it,
+so requests skip the TCP/TLS/auth handshake. Configure it with a POOL
+dict in the DATABASES entry (see pool.DEFAULT_POOL).
+
+Session state set with SET (outside a transaction) survives into the
+next checkout; the app does not use any.
+"""
+import functools
+
+from django.db.backends.postgresql import base
+from django.db.backends.postgresql.creation import DatabaseCreation
+
+from core.db.backends.pooled_postgresql.pool import close_pools, get_pool
+
+
+class PooledDatabaseCreation(DatabaseCreation):
+    """Close pooled connections before dropping or cloning a database."""
+
+    def _destroy_test_db(self, test_database_name, verbosity):
+        close_pools()
+        super()._destroy_test_db(test_database_name, verbosity)
+
+    def _clone_test_db(self, suffix, verbosity, keepdb=False):
+        # The source database must have no sessions left, pooled or not.
+        self.connection.close()
+        close_pools()
+        super()._clone_test_db(suffix, verbosity, keepdb)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    creation_class = PooledDatabaseCreation
+
+    def _pool(self):
+        settings_dict = self.settings_dict
+        key = (
+            self.alias,
+            settings_dict['HOST'],
+            settings_dict['PORT'],
+            settings_dict['NAME'],
+            settings_dict['USER'],
+        )
+        return get_pool(key, self.alias, settings_dict.get('POOL', {}))
+
+    def get_new_connection(self, conn_params):
+        connect = functools.partial(super().get_new_connection, conn_params)
+        connection = self._pool().getconn(connect)
+        # Set by the parent on a fresh connection; mirror it on reuse.
+        self.isolation_level = self.settings_dict['OPTIONS'].get(
+            'isolation_level', connection.isolation_level
+        )
+        return connection
+
+    def _close(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                self._pool().putconn(self.connection)
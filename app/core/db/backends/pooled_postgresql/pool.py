@@ -0,0 +1,230 @@
+"""
+Thread-safe pool of psycopg2 connections.
+"""
+import threading
+import time
+from collections import deque
+
+import psycopg2
+from psycopg2 import extensions
+
+from core.metrics import registry
+
+DEFAULT_POOL = {
+    'MIN_SIZE': 2,
+    'MAX_SIZE': 10,
+    'TIMEOUT': 10,
+    'MAX_IDLE': 300,
+    'MAX_LIFETIME': 3600,
+    'CHECK_ON_CHECKOUT': True,
+}
+
+
+class PoolTimeout(psycopg2.OperationalError):
+    """No connection became available within TIMEOUT seconds.
+
+    A psycopg2 OperationalError so Django reports it as
+    django.db.OperationalError like any other connection failure.
+    """
+
+
+class ConnectionPool:
+    """Connections shared by the threads of one process.
+
+    Idle connections are reused last-in first-out, so the busiest stay
+    warm and the rest age past MAX_IDLE and get closed, down to MIN_SIZE.
+    Connections older than MAX_LIFETIME are replaced when returned.
+    """
+
+    def __init__(self, alias, min_size, max_size, timeout, max_idle,
+                 max_lifetime, check_on_checkout):
+        self.alias = alias
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.max_lifetime = max_lifetime
+        self.check_on_checkout = check_on_checkout
+        self._idle = deque()
+        self._opened = {}
+        self._size = 0
+        self._cond = threading.Condition()
+
+    @classmethod
+    def from_options(cls, alias, options):
+        options = {**DEFAULT_POOL, **options}
+        return cls(
+            alias,
+            min_size=options['MIN_SIZE'],
+            max_size=options['MAX_SIZE'],
+            timeout=options['TIMEOUT'],
+            max_idle=options['MAX_IDLE'],
+            max_lifetime=options['MAX_LIFETIME'],
+            check_on_checkout=options['CHECK_ON_CHECKOUT'],
+        )
+
+    def _labels(self, **extra):
+        return {'alias': self.alias, **extra}
+
+    def stats(self):
+        """Return open, idle and in-use connection counts."""
+        with self._cond:
+            return {
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': self._size - len(self._idle),
+                'max_size': self.max_size,
+            }
+
+    def getconn(self, connect):
+        """Check out a healthy connection, opening one with connect().
+
+        Waits up to timeout seconds when max_size connections are in use.
+        """
+        start = time.monotonic()
+        deadline = start + self.timeout
+        while True:
+            conn = None
+            with self._cond:
+                stale = self._expire_idle()
+                if self._idle:
+                    conn, _ = self._idle.pop()
+                elif self._size < self.max_size:
+                    self._size += 1
+                else:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        registry.inc('db_pool_timeouts_total', self._labels())
+                        raise PoolTimeout(
+                            f'No connection available in pool '
+                            f'"{self.alias}" after {self.timeout}s '
+                            f'({self.max_size} in use).'
+                        )
+                    self._cond.wait(remaining)
+                    continue
+            self._close_all(stale, 'idle')
+
+            if conn is None:
+                try:
+                    conn = connect()
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+                with self._cond:
+                    self._opened[conn] = time.monotonic()
+                registry.inc(
+                    'db_pool_connections_opened_total', self._labels()
+                )
+            elif not self._healthy(conn):
+                self._discard(conn, 'unhealthy')
+                continue
+
+            registry.observe(
+                'db_pool_wait_seconds', self._labels(),
+                time.monotonic() - start,
+            )
+            return conn
+
+    def putconn(self, conn, close=False):
+        """Return a connection, closing it if it cannot be reused."""
+        with self._cond:
+            opened = self._opened.get(conn, 0)
+        if close or conn.closed:
+            self._discard(conn, 'closed')
+        elif time.monotonic() - opened > self.max_lifetime:
+            self._discard(conn, 'lifetime')
+        elif not self._reset(conn):
+            self._discard(conn, 'broken')
+        else:
+            with self._cond:
+                self._idle.append((conn, time.monotonic()))
+                self._cond.notify()
+
+    def close_all(self):
+        """Close every idle connection, e.g. before dropping a database."""
+        with self._cond:
+            idle = [conn for conn, _ in self._idle]
+            self._idle.clear()
+            self._size -= len(idle)
+            self._cond.notify_all()
+        self._close_all(idle, 'shutdown')
+
+    def _expire_idle(self):
+        """Pop connections idle over max_idle beyond min_size (locked)."""
+        stale = []
+        cutoff = time.monotonic() - self.max_idle
+        while (self._idle and self._size > self.min_size
+               and self._idle[0][1] < cutoff):
+            stale.append(self._idle.popleft()[0])
+            self._size -= 1
+        return stale
+
+    def _healthy(self, conn):
+        if conn.closed:
+            return False
+        if not self.check_on_checkout:
+            return True
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            if not conn.autocommit:
+                conn.rollback()
+        except psycopg2.Error:
+            return False
+        return True
+
+    @staticmethod
+    def _reset(conn):
+        """Roll back leftovers so the next user starts clean."""
+        status = conn.get_transaction_status()
+        if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+            return False
+        if status != extensions.TRANSACTION_STATUS_IDLE:
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                return False
+        return True
+
+    def _discard(self, conn, reason):
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+        self._close_all([conn], reason)
+
+    def _close_all(self, conns, reason):
+        with self._cond:
+            for conn in conns:
+                self._opened.pop(conn, None)
+        for conn in conns:
+            try:
+                conn.close()
+            except psycopg2.Error:
+                pass
+            registry.inc(
+                'db_pool_connections_closed_total',
+                self._labels(reason=reason),
+            )
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(key, alias, options):
+    """Return the process-wide pool for key, creating it on first use."""
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = ConnectionPool.from_options(alias, options)
+        return pool
+
+
+def close_pools():
+    """Close the idle connections of every pool."""
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        pool.close_all()
@@ -0,0 +1,120 @@
+"""
+Per-request recording of SQL queries and phase timings.
+
+The recorder lives in a context variable, so it follows the request
+across threads and event loops that copy the context, and queries run
+outside a recorded request pay a single lookup.
+"""
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+DEFAULT_REQUEST_INSTRUMENTATION = {
+    'ENABLED': False,
+    'QUERY_THRESHOLD': 50,
+    'LATENCY_THRESHOLD_MS': 500,
+    'DUPLICATE_THRESHOLD': 3,
+}
+
+_current = ContextVar('request_recorder', default=None)
+
+
+def instrumentation_settings():
+    """Return REQUEST_INSTRUMENTATION merged over the defaults."""
+    return {
+        **DEFAULT_REQUEST_INSTRUMENTATION,
+        **getattr(settings, 'REQUEST_INSTRUMENTATION', {}),
+    }
+
+
+class RequestRecorder:
+    """Queries and phase durations (in seconds) of one request."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = []
+        self.phases = {}
+
+    @property
+    def query_count(self):
+        return len(self.queries)
+
+    @property
+    def db_time(self):
+        return sum(duration for _, duration in self.queries)
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def duplicates(self, threshold):
+        """Return [(sql, count)] of statements run at least threshold times.
+
+        Django passes parameters separately, so identical SQL text means
+        the same statement with possibly different values: the N+1 shape.
+        """
+        counts = Counter(sql for sql, _ in self.queries)
+        return [
+            (sql, count) for sql, count in counts.most_common()
+            if count >= threshold
+        ]
+
+
+def current_recorder():
+    """Return the recorder of the request being handled, if any."""
+    return _current.get()
+
+
+def start_recording():
+    """Start recording in the current context; return the recorder.
+
+    Callers keep the recorder themselves (e.g. on the request): under
+    ASGI middleware hooks run in different contexts, so a reset token
+    from one hook cannot be used in another.
+    """
+    recorder = RequestRecorder()
+    _current.set(recorder)
+    return recorder
+
+
+def stop_recording():
+    """Stop recording in the current context."""
+    _current.set(None)
+
+
+def record_query(execute, sql, params, many, context):
+    """Database execute wrapper timing queries into the recorder."""
+    recorder = _current.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        recorder.queries.append((sql, time.perf_counter() - start))
+
+
+def install(connection):
+    """Add the execute wrapper to a connection once."""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def _connection_created(sender, connection, **kwargs):
+    install(connection)
+
+
+def install_all():
+    """Wrap open connections and every connection opened from now on.
+
+    Connection wrappers are per thread, so the signal catches the ones
+    other threads open later.
+    """
+    connection_created.connect(
+        _connection_created, dispatch_uid='core.instrumentation'
+    )
+    for connection in connections.all():
+        install(connection)
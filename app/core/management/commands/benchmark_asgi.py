@@ -0,0 +1,144 @@
+"""
+Django command comparing WSGI threads with ASGI serving of recipe reads.
+
+"""
+import asyncio
+import random
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import AsyncClient, Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from rest_framework.authtoken.models import Token
+
+from core.async_views import async_urlconf
+from core.benchmarks import percentiles
+from core.seeding import seed_recipes, seed_users
+from recipe.urls import ASYNC_READ_VIEWS
+
+
+def _wsgi(url, token, concurrency, requests):
+    """Threads with their own client, like a threaded WSGI server."""
+    samples = [[] for _ in range(concurrency)]
+    errors = []
+
+    def worker(out):
+        client = Client(
+            HTTP_HOST='localhost', HTTP_AUTHORIZATION=f'Token {token}'
+        )
+        try:
+            for _ in range(requests):
+                start = time.perf_counter()
+                res = client.get(url)
+                out.append(time.perf_counter() - start)
+                if res.status_code != 200:
+                    errors.append(res.status_code)
+        finally:
+            connection.close()
+
+    threads = [
+        threading.Thread(target=worker, args=(out,)) for out in samples
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return [s for out in samples for s in out], errors
+
+
+def _asgi(url, token, concurrency, requests):
+    """Concurrent tasks sharing one event loop, like an ASGI server.
+
+    Django 3.2's AsyncClient takes headers as extra kwargs without the
+    HTTP_ prefix and serves them as host testserver.
+    """
+    samples = []
+    errors = []
+
+    async def worker():
+        client = AsyncClient()
+        for _ in range(requests):
+            start = time.perf_counter()
+            res = await client.get(url, AUTHORIZATION=f'Token {token}')
+            samples.append(time.perf_counter() - start)
+            if res.status_code != 200:
+                errors.append(res.status_code)
+
+    async def main():
+        await asyncio.gather(*[worker() for _ in range(concurrency)])
+
+    asyncio.run(main())
+    return samples, errors
+
+
+class Command(BaseCommand):
+    """Django command to benchmark WSGI and ASGI serving. """
+
+    help = ('Compare recipe list throughput of WSGI threads, ASGI with '
+            'sync views and ASGI with the async read endpoints.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=32)
+        parser.add_argument('--requests', type=int, default=20,
+                            help='Requests per concurrent client.')
+        parser.add_argument('--recipes', type=int, default=200)
+        parser.add_argument('--page-size', type=int, default=50)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        """entrypoint for command."""
+        # Worker threads use their own connections, so the data has to be
+        # committed rather than seeded in a rolled back transaction.
+        prefix = f'asgi-{uuid.uuid4().hex[:8]}-'
+        user = seed_users(1, 'benchmark123', email_prefix=prefix)[0]
+        try:
+            seed_recipes(
+                user, random.Random(options['seed']), options['recipes'],
+                20, 50,
+            )
+            token = Token.objects.create(user=user).key
+            self._run(token, options)
+        finally:
+            user.delete()
+
+    def _run(self, token, options):
+        url = (f'{reverse("recipe:recipe-list")}'
+               f'?page_size={options["page_size"]}')
+        concurrency = options['concurrency']
+        modes = [
+            ('wsgi threads', _wsgi, {}),
+            ('asgi sync views', _asgi, {}),
+            ('asgi async reads', _asgi, {
+                'ROOT_URLCONF': async_urlconf(
+                    settings.ROOT_URLCONF, ASYNC_READ_VIEWS
+                ),
+                # One token drives every request here.
+                'ASYNC_READ_ENDPOINTS': {
+                    'PER_CLIENT': concurrency,
+                    'MAX_CONCURRENCY': concurrency,
+                },
+            }),
+        ]
+        for label, run, overrides in modes:
+            with override_settings(
+                ALLOWED_HOSTS=['localhost', 'testserver'], **overrides
+            ):
+                start = time.perf_counter()
+                samples, errors = run(
+                    url, token, concurrency, options['requests']
+                )
+                elapsed = time.perf_counter() - start
+            points = percentiles(samples)
+            self.stdout.write(
+                f'{label:>17}: {len(samples) / elapsed:7.1f} req/s, '
+                f'p50 {points[50] * 1000:.1f} ms, '
+                f'p95 {points[95] * 1000:.1f} ms, '
+                f'p99 {points[99] * 1000:.1f} ms'
+                + (f', {len(errors)} errors' if errors else '')
+            )
@@ -0,0 +1,222 @@
+"""
+Django command benchmarking the API endpoints on synthetic data.
+
+Results are written as JSON so runs on different commits can be compared
+with --compare.
+"""
+import json
+import platform
+import random
+import statistics
+import time
+from datetime import datetime, timezone
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from rest_framework.authtoken.models import Token
+
+from core.benchmarks import api_client, measure, percentiles, rolled_back
+from core.seeding import seed_recipes
+from recipe.caching import response_cache
+from user.authentication import token_cache
+
+PASSWORD = 'benchmark123'
+
+
+def _endpoints(user, rng):
+    """Return (name, method, url, data) for every endpoint under test."""
+    recipe_ids = list(user.recipe_set.values_list('id', flat=True))
+    tag_ids = list(user.tag_set.values_list('id', flat=True))
+    ingredient_ids = list(user.ingredient_set.values_list('id', flat=True))
+
+    def ids(values, count=3):
+        return ','.join(
+            str(i) for i in rng.sample(values, min(count, len(values)))
+        )
+
+    recipes = reverse('recipe:recipe-list')
+    tags = reverse('recipe:tag-list')
+    ingredients = reverse('recipe:ingredient-list')
+    return [
+        ('recipes', 'get', recipes, {}),
+        ('recipes page', 'get', recipes, {'page_size': 50}),
+        ('recipes tags any', 'get', recipes, {'tags': ids(tag_ids)}),
+        ('recipes tags all', 'get', recipes,
+         {'tags': ids(tag_ids, 2), 'match': 'all'}),
+        ('recipes ingredients', 'get', recipes,
+         {'ingredients': ids(ingredient_ids)}),
+        ('recipes search', 'get', recipes, {'search': 'synthetic recipe'}),
+        ('recipe detail', 'get',
+         reverse('recipe:recipe-detail', args=[rng.choice(recipe_ids)]), {}),
+        ('recipe facets', 'get', reverse('recipe:recipe-facets'),
+         {'tags': ids(tag_ids, 1)}),
+        ('tags', 'get', tags, {}),
+        ('tags assigned', 'get', tags, {'assigned_only': 1}),
+        ('tags counts', 'get', tags, {'with_counts': 1}),
+        ('ingredients', 'get', ingredients, {}),
+        ('ingredients counts', 'get', ingredients, {'with_counts': 1}),
+        ('user me', 'get', reverse('user:me'), {}),
+        ('user token', 'post', reverse('user:token'),
+         {'email': user.email, 'password': PASSWORD}),
+    ]
+
+
+def _summary(samples, queries, statuses):
+    points = percentiles(samples)
+    return {
+        'requests': len(samples),
+        'p50_ms': round(points[50] * 1000, 3),
+        'p95_ms': round(points[95] * 1000, 3),
+        'p99_ms': round(points[99] * 1000, 3),
+        'mean_ms': round(statistics.mean(samples) * 1000, 3),
+        'queries': max(queries),
+        'rps': round(len(samples) / sum(samples), 1),
+        'statuses': sorted(set(statuses)),
+    }
+
+
+class Command(BaseCommand):
+    """Django command to benchmark API endpoints. """
+
+    help = ('Seed users x recipes x tags x ingredients and report latency, '
+            'queries and throughput per endpoint.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=5)
+        parser.add_argument('--recipes', type=int, default=1000,
+                            help='Recipes per user.')
+        parser.add_argument('--tags', type=int, default=50)
+        parser.add_argument('--ingredients', type=int, default=200)
+        parser.add_argument('--requests', type=int, default=50,
+                            help='Measured requests per endpoint.')
+        parser.add_argument('--warmup', type=int, default=3)
+        parser.add_argument('--cold', action='store_true',
+                            help='Clear caches before every request.')
+        parser.add_argument('--only', action='append', default=[],
+                            help='Run only endpoints whose name contains '
+                                 'this (repeatable).')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--label', default='')
+        parser.add_argument('--output', help='Write results to this file.')
+        parser.add_argument('--compare',
+                            help='Compare against a previous results file.')
+        parser.add_argument('--fail-over', type=float, default=None,
+                            help='Exit with an error if any p95 regresses '
+                                 'by more than this percentage or any '
+                                 'query count grows.')
+
+    def handle(self, *args, **options):
+        """entrypoint for command."""
+        rng = random.Random(options['seed'])
+        results = {}
+
+        # Token requests would otherwise hit the login throttles.
+        with override_settings(LOGIN_THROTTLE={'RATES': {}}), rolled_back():
+            user = self._seed(rng, options)
+            client = api_client()
+            token = Token.objects.create(user=user)
+            client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+            for name, method, url, data in _endpoints(user, rng):
+                if options['only'] and not any(
+                    part in name for part in options['only']
+                ):
+                    continue
+                results[name] = self._run(client, method, url, data, options)
+                self.stdout.write(self._format(name, results[name]))
+
+        report = {
+            'label': options['label'],
+            'created': datetime.now(timezone.utc).isoformat(),
+            'database': connection.vendor,
+            'python': platform.python_version(),
+            'options': {
+                key: options[key] for key in (
+                    'users', 'recipes', 'tags', 'ingredients', 'requests',
+                    'cold', 'seed',
+                )
+            },
+            'results': results,
+        }
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                json.dump(report, fh, indent=2, sort_keys=True)
+        if options['compare']:
+            self._compare(report, options['compare'], options['fail_over'])
+
+    def _seed(self, rng, options):
+        """Create the users and their data; return the first user."""
+        start = time.perf_counter()
+        users = [
+            get_user_model().objects.create_user(
+                f'benchmark{n}@example.com', PASSWORD
+            )
+            for n in range(options['users'])
+        ]
+        for user in users:
+            seed_recipes(
+                user, rng, options['recipes'], options['tags'],
+                options['ingredients'],
+            )
+        self.stdout.write(
+            f'seeded {options["users"]} users x {options["recipes"]} '
+            f'recipes in {time.perf_counter() - start:.1f}s'
+        )
+        return users[0]
+
+    def _run(self, client, method, url, data, options):
+        request = getattr(client, method)
+        for _ in range(options['warmup']):
+            request(url, data)
+
+        samples, queries, statuses = [], [], []
+        for _ in range(options['requests']):
+            if options['cold']:
+                cache.clear()
+                response_cache.clear()
+                token_cache.clear()
+            response, elapsed, count = measure(request, url, data)
+            samples.append(elapsed)
+            queries.append(count)
+            statuses.append(response.status_code)
+        return _summary(samples, queries, statuses)
+
+    @staticmethod
+    def _format(name, result):
+        return (
+            f'{name:>20}: p50 {result["p50_ms"]:.1f} ms, '
+            f'p95 {result["p95_ms"]:.1f} ms, '
+            f'p99 {result["p99_ms"]:.1f} ms, '
+            f'{result["queries"]} queries, {result["rps"]:.0f} req/s'
+        )
+
+    def _compare(self, report, path, fail_over):
+        with open(path) as fh:
+            baseline = json.load(fh)
+
+        regressions = []
+        self.stdout.write(f'\ncompared with {baseline.get("label") or path}')
+        for name, result in report['results'].items():
+            before = baseline['results'].get(name)
+            if before is None:
+                continue
+            change = (
+                (result['p95_ms'] - before['p95_ms']) / before['p95_ms'] * 100
+                if before['p95_ms'] else 0.0
+            )
+            queries = result['queries'] - before['queries']
+            self.stdout.write(
+                f'{name:>20}: p95 {before["p95_ms"]:.1f} -> '
+                f'{result["p95_ms"]:.1f} ms ({change:+.0f}%), '
+                f'queries {before["queries"]} -> {result["queries"]}'
+            )
+            if fail_over is not None and (change > fail_over or queries > 0):
+                regressions.append(name)
+
+        if regressions:
+            raise CommandError(f'Regressed: {", ".join(regressions)}')
@@ -0,0 +1,101 @@
+"""
+Django command comparing tag filter strategies for the recipe list.
+
+"""
+import random
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from core.benchmarks import measure, percentiles, rolled_back
+from core.models import Recipe
+from core.seeding import seed_recipes
+from recipe.filters import MATCH_ALL, MATCH_ANY, filter_by_attrs
+
+
+def _join_distinct(queryset, ids):
+    """Filter used before EXISTS: join fan-out undone by DISTINCT."""
+    return queryset.filter(tags__id__in=ids).distinct()
+
+
+def _exists(queryset, ids):
+    return filter_by_attrs(
+        queryset, Recipe.tags.through, 'tag_id', ids, MATCH_ANY
+    )
+
+
+def _having(queryset, ids):
+    return filter_by_attrs(
+        queryset, Recipe.tags.through, 'tag_id', ids, MATCH_ALL
+    )
+
+
+def _intersect_joins(queryset, ids):
+    """"All" expressed as one join per tag, for comparison."""
+    for tag_id in ids:
+        queryset = queryset.filter(tags__id=tag_id)
+    return queryset
+
+
+class Command(BaseCommand):
+    """Django command to benchmark recipe tag filters. """
+
+    help = 'Compare JOIN+DISTINCT, EXISTS and GROUP BY/HAVING tag filters.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=20000)
+        parser.add_argument('--tags', type=int, default=100)
+        parser.add_argument('--tags-per-recipe', type=int, default=8)
+        parser.add_argument('--filter-tags', type=int, default=3)
+        parser.add_argument('--runs', type=int, default=30)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        """entrypoint for command."""
+        rng = random.Random(options['seed'])
+        strategies = [
+            ('any: join + distinct', _join_distinct),
+            ('any: exists', _exists),
+            ('all: join per tag', _intersect_joins),
+            ('all: group by/having', _having),
+        ]
+
+        with rolled_back():
+            user = get_user_model().objects.create_user(
+                'benchmark@example.com', 'benchmark123'
+            )
+            start = time.perf_counter()
+            seed_recipes(
+                user, rng, options['recipes'], options['tags'], 10,
+                tags_per_recipe=options['tags_per_recipe'],
+                ingredients_per_recipe=1,
+            )
+            self.stdout.write(
+                f'seeded {options["recipes"]} recipes in '
+                f'{time.perf_counter() - start:.1f}s'
+            )
+            tag_ids = list(user.tag_set.values_list('id', flat=True))
+            base = Recipe.objects.filter(user=user).order_by('-id')
+            filters = [
+                rng.sample(tag_ids, options['filter_tags'])
+                for _ in range(options['runs'])
+            ]
+
+            for label, strategy in strategies:
+                samples = []
+                rows = 0
+                for ids in filters:
+                    result, elapsed, _ = measure(
+                        lambda: list(strategy(base, ids).values_list(
+                            'id', flat=True
+                        ))
+                    )
+                    samples.append(elapsed)
+                    rows += len(result)
+                points = percentiles(samples)
+                self.stdout.write(
+                    f'{label:>22}: p50 {points[50] * 1000:.1f} ms, '
+                    f'p95 {points[95] * 1000:.1f} ms, '
+                    f'{rows / len(filters):.0f} rows'
+                )
@@ -0,0 +1,122 @@
+"""
+Django command comparing upload latency with and without offloading.
+
+Uploads go through the real upload-image endpoint, so the timings include
+validation, the content-addressed save and the database write on top of
+the derivatives built inline or handed to the process pool.
+"""
+import io
+import os
+import statistics
+import tempfile
+import time
+import uuid
+from decimal import Decimal
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from PIL import Image
+
+from rest_framework.test import APIClient
+
+from core.models import Recipe
+from core.seeding import seed_users
+from recipe.images import MANIFEST_NAME, derivative_dir, get_executor
+
+
+def _payload(width, height, n):
+    """Return JPEG bytes unique to n, so uploads are never deduplicated."""
+    buffer = io.BytesIO()
+    color = (n % 256, n // 256 % 256, n // 65536 % 256)
+    Image.new('RGB', (width, height), color).save(buffer, format='JPEG')
+    return buffer.getvalue()
+
+
+class Command(BaseCommand):
+    """Django command to benchmark derivative offloading. """
+
+    help = ('Time POSTs to the upload-image endpoint with inline and '
+            'process-pool derivatives.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--uploads', type=int, default=20)
+        parser.add_argument('--width', type=int, default=3000)
+        parser.add_argument('--height', type=int, default=2000)
+        parser.add_argument('--timeout', type=float, default=300,
+                            help='Seconds to wait for offloaded derivatives.')
+
+    def handle(self, *args, **options):
+        """entrypoint for command."""
+        prefix = f'upload-{uuid.uuid4().hex[:8]}-'
+        user = seed_users(1, 'benchmark123', email_prefix=prefix)[0]
+        try:
+            client = APIClient()
+            client.force_authenticate(user)
+            # Warm the pool so worker start-up is not counted.
+            get_executor().submit(os.getpid).result()
+
+            with tempfile.TemporaryDirectory() as media_root:
+                for offset, (mode, is_async) in enumerate(
+                    (('inline', False), ('offloaded', True))
+                ):
+                    with override_settings(
+                        MEDIA_ROOT=media_root,
+                        ALLOWED_HOSTS=['testserver'],
+                        RECIPE_IMAGE_DERIVATIVES={'ASYNC': is_async},
+                    ):
+                        self._run(
+                            mode, client, user, options,
+                            offset * options['uploads'],
+                        )
+        finally:
+            user.delete()
+
+    def _run(self, mode, client, user, options, first):
+        payloads = [
+            _payload(options['width'], options['height'], first + i)
+            for i in range(options['uploads'])
+        ]
+        # One recipe per upload: replacing an image releases the previous
+        # one, derivatives included, possibly while they are being built.
+        recipes = [
+            Recipe.objects.create(
+                user=user, title=f'Upload benchmark {i}', time_minutes=5,
+                price=Decimal('1.00'),
+            )
+            for i in range(len(payloads))
+        ]
+        timings = []
+        manifests = []
+        start = time.perf_counter()
+        for i, (recipe, payload) in enumerate(zip(recipes, payloads)):
+            upload = SimpleUploadedFile(
+                f'{mode}-{i}.jpg', payload, content_type='image/jpeg'
+            )
+            url = reverse('recipe:recipe-upload-image', args=[recipe.id])
+            request_start = time.perf_counter()
+            res = client.post(url, {'image': upload}, format='multipart')
+            timings.append(time.perf_counter() - request_start)
+            if res.status_code != 200:
+                raise CommandError(f'Upload failed: {res.status_code}')
+            recipe.refresh_from_db()
+            storage = recipe.image.storage
+            manifests.append(storage.path(os.path.join(
+                derivative_dir(recipe.image.name), MANIFEST_NAME
+            )))
+
+        # Offloaded derivatives are only done once every manifest exists.
+        deadline = time.perf_counter() + options['timeout']
+        while not all(os.path.exists(path) for path in manifests):
+            if time.perf_counter() > deadline:
+                raise CommandError(f'{mode}: derivatives not ready in time.')
+            time.sleep(0.05)
+        ready = time.perf_counter() - start
+
+        self.stdout.write(
+            f'{mode:>9}: median {statistics.median(timings) * 1000:.1f} ms'
+            f', max {max(timings) * 1000:.1f} ms per upload'
+            f', all derivatives ready after {ready:.1f} s'
+        )
@@ -0,0 +1,92 @@
+"""
+Django command comparing the bulk importer with the per-request API path.
+
+"""
+import json
+import os
+import random
+import tempfile
+import time
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.urls import reverse
+
+from core.benchmarks import api_client, rolled_back
+
+
+def synthetic_records(count, tags, ingredients, seed=0):
+    """Return count recipe payloads drawing from small name pools."""
+    rng = random.Random(seed)
+    return [
+        {
+            'title': f'Recipe {i}',
+            'time_minutes': rng.randint(5, 120),
+            'price': f'{rng.uniform(1, 50):.2f}',
+            'tags': [
+                {'name': f'tag {rng.randrange(tags)}'} for _ in range(3)
+            ],
+            'ingredients': [
+                {'name': f'ingredient {rng.randrange(ingredients)}'}
+                for _ in range(5)
+            ],
+        }
+        for i in range(count)
+    ]
+
+
+class Command(BaseCommand):
+    """Django command to benchmark recipe ingestion paths. """
+
+    help = 'Compare import_recipes (COPY/bulk) with POSTing each recipe.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=2000)
+        parser.add_argument('--api-recipes', type=int, default=200)
+        parser.add_argument('--tags', type=int, default=50)
+        parser.add_argument('--ingredients', type=int, default=200)
+
+    def handle(self, *args, **options):
+        """entrypoint for command."""
+        records = synthetic_records(
+            options['recipes'], options['tags'], options['ingredients']
+        )
+
+        with tempfile.TemporaryDirectory() as workdir:
+            path = os.path.join(workdir, 'recipes.jsonl')
+            with open(path, 'w') as source:
+                source.writelines(json.dumps(r) + '\n' for r in records)
+
+            variants = (('import', []), ('import --no-copy', ['--no-copy']))
+            for label, extra in variants:
+                with rolled_back():
+                    user = get_user_model().objects.create_user(
+                        'benchmark@example.com', 'benchmark123'
+                    )
+                    start = time.perf_counter()
+                    call_command(
+                        'import_recipes', path, *extra,
+                        email=user.email, stdout=StringIO(),
+                    )
+                    self._report(label, len(records), start)
+
+        url = reverse('recipe:recipe-list')
+        api_records = records[:options['api_recipes']]
+        with rolled_back():
+            user = get_user_model().objects.create_user(
+                'benchmark@example.com', 'benchmark123'
+            )
+            client = api_client(user)
+            start = time.perf_counter()
+            for record in api_records:
+                client.post(url, record, format='json')
+            self._report('api', len(api_records), start)
+
+    def _report(self, label, count, start):
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            f'{label:>17}: {count} recipes in {elapsed:.2f}s, '
+            f'{count / elapsed:.0f} recipes/s'
+        )
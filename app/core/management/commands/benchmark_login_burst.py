@@ -0,0 +1,119 @@
+"""
+Django command measuring recipe API latency during a login burst.
+
+"""
+import threading
+import time
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from core.benchmarks import api_client, percentiles, rolled_back
+from core.models import Recipe
+from user.throttling import DEFAULT_LOGIN_THROTTLE, reset_throttles
+
+SCENARIOS = {
+    'unthrottled': {'RATES': {}},
+    'throttled': {
+        'RATES': DEFAULT_LOGIN_THROTTLE['RATES'],
+        'MAX_CONCURRENT_HASHES': 1,
+    },
+}
+
+
+def _attack(stop, ip, counts):
+    """Post bad credentials for random emails until stopped."""
+    client = api_client()
+    url = reverse('user:token')
+    try:
+        while not stop.is_set():
+            res = client.post(
+                url,
+                {'email': f'{uuid.uuid4().hex}@example.com',
+                 'password': 'guess'},
+                REMOTE_ADDR=ip,
+            )
+            counts[res.status_code] = counts.get(res.status_code, 0) + 1
+    finally:
+        connection.close()
+
+
+class Command(BaseCommand):
+    """Django command to benchmark API latency under a login burst. """
+
+    help = 'Measure recipe list latency while bad logins hammer the API.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--attackers', type=int, default=8)
+        parser.add_argument('--ips', type=int, default=4)
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--recipes', type=int, default=50)
+
+    def handle(self, *args, **options):
+        """entrypoint for command."""
+        with rolled_back():
+            user = get_user_model().objects.create_user(
+                'benchmark@example.com', 'benchmark123'
+            )
+            Recipe.objects.bulk_create(
+                Recipe(user=user, title=f'Recipe {n}', time_minutes=10,
+                       price='5.00')
+                for n in range(options['recipes'])
+            )
+            client = api_client(user)
+
+            self._report('idle', self._latencies(client, options), {})
+            for label, throttle in SCENARIOS.items():
+                reset_throttles()
+                with override_settings(LOGIN_THROTTLE=throttle):
+                    samples, counts = self._burst(client, options)
+                self._report(label, samples, counts)
+
+    def _latencies(self, client, options):
+        url = reverse('recipe:recipe-list')
+        samples = []
+        for _ in range(options['requests']):
+            start = time.perf_counter()
+            client.get(url)
+            samples.append(time.perf_counter() - start)
+        return samples
+
+    def _burst(self, client, options):
+        stop = threading.Event()
+        per_thread = [{} for _ in range(options['attackers'])]
+        attackers = [
+            threading.Thread(
+                target=_attack,
+                args=(stop, f'10.0.0.{n % options["ips"] + 1}', counts),
+            )
+            for n, counts in enumerate(per_thread)
+        ]
+        for thread in attackers:
+            thread.start()
+        try:
+            samples = self._latencies(client, options)
+        finally:
+            stop.set()
+            for thread in attackers:
+                thread.join()
+        counts = {}
+        for thread_counts in per_thread:
+            for code, count in thread_counts.items():
+                counts[code] = counts.get(code, 0) + count
+        return samples, counts
+
+    def _report(self, label, samples, counts):
+        points = percentiles(samples)
+        attempts = ', '.join(
+            f'{code}: {count}' for code, count in sorted(counts.items())
+        )
+        self.stdout.write(
+            f'{label:>12}: p50 {points[50] * 1000:.1f} ms, '
+            f'p95 {points[95] * 1000:.1f} ms, '
+            f'p99 {points[99] * 1000:.1f} ms'
+            + (f' (login responses {attempts})' if attempts else '')
+        )
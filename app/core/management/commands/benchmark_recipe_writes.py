@@ -0,0 +1,76 @@
+"""
+Django command comparing round trips of the recipe write paths.
+
+"""
+from decimal import Decimal
+from types import SimpleNamespace
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from core.benchmarks import measure, rolled_back
+from core.models import Recipe, Tag, Ingredient
+from recipe.serializers import RecipeSerializer
+
+
+def _legacy_create(user, payload):
+    """Per item get_or_create path used before bulk upserts."""
+    data = dict(payload)
+    tags = data.pop('tags')
+    ingredients = data.pop('ingredients')
+    recipe = Recipe.objects.create(user=user, **data)
+    for tag in tags:
+        tag_obj, created = Tag.objects.get_or_create(user=user, **tag)
+        recipe.tags.add(tag_obj)
+    for ingredient in ingredients:
+        ingredient_obj, created = Ingredient.objects.get_or_create(
+            user=user, **ingredient
+        )
+        recipe.ingredients.add(ingredient_obj)
+    return recipe
+
+
+def _bulk_create(user, payload):
+    """Current serializer path."""
+    serializer = RecipeSerializer(
+        data=payload,
+        context={'request': SimpleNamespace(user=user)},
+    )
+    serializer.is_valid(raise_exception=True)
+    return serializer.save(user=user)
+
+
+class Command(BaseCommand):
+    """Django command to benchmark recipe create round trips. """
+
+    help = 'Compare queries issued by legacy and bulk recipe writes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tags', type=int, default=30)
+        parser.add_argument('--ingredients', type=int, default=40)
+
+    def handle(self, *args, **options):
+        """entrypoint for command."""
+        payload = {
+            'title': 'Benchmark recipe',
+            'time_minutes': 10,
+            'price': Decimal('1.00'),
+            'tags': [
+                {'name': f'tag {i}'} for i in range(options['tags'])
+            ],
+            'ingredients': [
+                {'name': f'ingredient {i}'}
+                for i in range(options['ingredients'])
+            ],
+        }
+
+        variants = (('legacy', _legacy_create), ('bulk', _bulk_create))
+        for label, func in variants:
+            with rolled_back():
+                user = get_user_model().objects.create_user(
+                    'benchmark@example.com', 'benchmark123'
+                )
+                _, elapsed, queries = measure(func, user, payload)
+            self.stdout.write(
+                f'{label:>7}: {queries} queries, {elapsed * 1000:.1f} ms'
+            )
@@ -0,0 +1,134 @@
+"""
+Django command benchmarking recipe search on a synthetic corpus.
+
+"""
+import itertools
+import random
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from core.benchmarks import percentiles, rolled_back
+from core.bulk import can_copy, copy_rows, reserve_ids
+from core.models import Recipe
+from core.seeding import zipf_cum_weights
+from recipe.search import InMemorySearchBackend, PostgresSearchBackend
+
+
+def zipf_words(rng, vocabulary, exponent=1.1):
+    """Return a function drawing k words with Zipfian frequencies."""
+    cum_weights = zipf_cum_weights(vocabulary, exponent)
+    words = [f'word{rank}' for rank in range(vocabulary)]
+
+    def draw(k):
+        return ' '.join(rng.choices(words, cum_weights=cum_weights, k=k))
+    return draw
+
+
+def synthetic_corpus(count, vocabulary, seed):
+    """Yield (title, description) pairs."""
+    draw = zipf_words(random.Random(seed), vocabulary)
+    for _ in range(count):
+        yield draw(4), draw(30)
+
+
+class Command(BaseCommand):
+    """Django command to benchmark search backends. """
+
+    help = 'Measure search latency on a synthetic recipe corpus.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=1000000)
+        parser.add_argument('--vocabulary', type=int, default=50000)
+        parser.add_argument('--queries', type=int, default=200)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--backend',
+            choices=['memory', 'postgres', 'both'],
+            default='both',
+        )
+
+    def handle(self, *args, **options):
+        """entrypoint for command."""
+        rng = random.Random(options['seed'] + 1)
+        draw = zipf_words(rng, min(options['vocabulary'], 2000))
+        queries = [draw(rng.randint(1, 2)) for _ in range(options['queries'])]
+
+        if options['backend'] in ('memory', 'both'):
+            self._memory(options, queries)
+        if options['backend'] in ('postgres', 'both'):
+            if not can_copy(Recipe):
+                if options['backend'] == 'postgres':
+                    raise CommandError('PostgreSQL is required.')
+                return
+            self._postgres(options, queries)
+
+    def _memory(self, options, queries):
+        backend = InMemorySearchBackend()
+        start = time.perf_counter()
+        corpus = synthetic_corpus(
+            options['recipes'], options['vocabulary'], options['seed']
+        )
+        for recipe_id, (title, description) in enumerate(corpus, start=1):
+            backend.add_document(0, recipe_id, title, description)
+        self.stdout.write(
+            f'memory: indexed {options["recipes"]} recipes in '
+            f'{time.perf_counter() - start:.1f}s'
+        )
+        self._report('memory', [
+            self._time(backend.search_ids, 0, query) for query in queries
+        ])
+
+    def _postgres(self, options, queries):
+        backend = PostgresSearchBackend()
+        with rolled_back():
+            user = get_user_model().objects.create_user(
+                'benchmark@example.com', 'benchmark123'
+            )
+            start = time.perf_counter()
+            corpus = synthetic_corpus(
+                options['recipes'], options['vocabulary'], options['seed']
+            )
+            while True:
+                batch = list(itertools.islice(corpus, 10000))
+                if not batch:
+                    break
+                ids = reserve_ids(Recipe, len(batch))
+                copy_rows(
+                    Recipe,
+                    ('id', 'user_id', 'title', 'description', 'price',
+                     'time_minutes', 'link'),
+                    [(recipe_id, user.pk, title, description, '1.00', 10, '')
+                     for recipe_id, (title, description) in zip(ids, batch)],
+                )
+            self.stdout.write(
+                f'postgres: loaded {options["recipes"]} recipes in '
+                f'{time.perf_counter() - start:.1f}s'
+            )
+            queryset = Recipe.objects.filter(user=user)
+            self._report('postgres', [
+                self._time(
+                    lambda query: list(
+                        backend.search(queryset, query, user)
+                        .values_list('id', flat=True)[:20]
+                    ),
+                    query,
+                )
+                for query in queries
+            ])
+
+    @staticmethod
+    def _time(func, *args):
+        start = time.perf_counter()
+        func(*args)
+        return time.perf_counter() - start
+
+    def _report(self, label, samples):
+        points = percentiles(samples)
+        self.stdout.write(
+            f'{label}: ' + ', '.join(
+                f'p{point} {value * 1000:.2f} ms'
+                for point, value in points.items()
+            )
+        )
@@ -0,0 +1,54 @@
+"""
+Django command to delete recipe images no recipe references anymore.
+
+"""
+import os
+
+from django.core.management.base import BaseCommand
+
+from core.models import Recipe
+from core.storage import recipe_image_storage
+from recipe.images import release_image
+
+IMAGE_DIR = os.path.join('uploads', 'recipe')
+
+
+class Command(BaseCommand):
+    """Django command to garbage-collect orphaned recipe images. """
+
+    help = 'Delete content-addressed recipe images with no references.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only list the files that would be deleted.',
+        )
+
+    def handle(self, *args, **options):
+        """entrypoint for command."""
+        storage = recipe_image_storage()
+        if not storage.exists(IMAGE_DIR):
+            return
+
+        referenced = set(
+            Recipe.objects.exclude(image='').exclude(image__isnull=True)
+            .values_list('image', flat=True)
+        )
+        prefixes, _ = storage.listdir(IMAGE_DIR)
+        removed = 0
+        for prefix in prefixes:
+            if len(prefix) != 2:
+                # Skip derivatives/ and other non-hash directories.
+                continue
+            _, files = storage.listdir(os.path.join(IMAGE_DIR, prefix))
+            for filename in files:
+                name = os.path.join(IMAGE_DIR, prefix, filename)
+                if name in referenced:
+                    continue
+                removed += 1
+                self.stdout.write(name)
+                if not options['dry_run']:
+                    release_image(name, storage)
+
+        self.stdout.write(self.style.SUCCESS(f'{removed} orphaned images'))
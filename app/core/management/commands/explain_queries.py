@@ -0,0 +1,97 @@
+"""
+Django command to show which indexes the hot API queries use.
+
+"""
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from core.models import Recipe, Tag, Ingredient
+
+
+def hot_queries(user):
+    """Return (label, queryset, expected index) for the API access paths."""
+    tag_ids = list(Tag.objects.filter(user=user).values_list('id', flat=True))
+    ingredient_ids = list(
+        Ingredient.objects.filter(user=user).values_list('id', flat=True)
+    )
+    return [
+        (
+            'recipe list',
+            Recipe.objects.filter(user=user).order_by('-id'),
+            'recipe_user_id_desc_idx',
+        ),
+        (
+            'tag list',
+            Tag.objects.filter(user=user).order_by('-name'),
+            'tag_user_name_idx',
+        ),
+        (
+            'ingredient list',
+            Ingredient.objects.filter(user=user).order_by('-name'),
+            'ingredient_user_name_idx',
+        ),
+        (
+            'recipes by tag',
+            Recipe.tags.through.objects.filter(
+                tag_id__in=tag_ids or [0]
+            ).values_list('recipe_id', flat=True),
+            'core_recipe_tags_tag_recipe_idx',
+        ),
+        (
+            'recipes by ingredient',
+            Recipe.ingredients.through.objects.filter(
+                ingredient_id__in=ingredient_ids or [0]
+            ).values_list('recipe_id', flat=True),
+            'core_recipe_ingredients_ing_recipe_idx',
+        ),
+    ]
+
+
+class Command(BaseCommand):
+    """Django command to EXPLAIN the per-user list and filter queries. """
+
+    help = 'Report whether list/filter queries use the composite indexes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--email',
+            help='User whose data is explained (defaults to the first user).',
+        )
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Exit with an error if an expected index is not used.',
+        )
+
+    def handle(self, *args, **options):
+        """entrypoint for command."""
+        users = get_user_model().objects.order_by('id')
+        if options['email']:
+            users = users.filter(email=options['email'])
+        user = users.first()
+        if user is None:
+            raise CommandError('No user to explain queries for.')
+
+        missing = []
+        with transaction.atomic():
+            if connection.vendor == 'postgresql':
+                # Small tables are cheaper to scan sequentially; ask the
+                # planner whether the index is usable at all.
+                with connection.cursor() as cursor:
+                    cursor.execute('SET LOCAL enable_seqscan = off')
+
+            for label, queryset, index in hot_queries(user):
+                plan = queryset.explain()
+                if index in plan:
+                    self.stdout.write(f'{label}: uses {index}')
+                else:
+                    missing.append(label)
+                    self.stdout.write(
+                        self.style.WARNING(f'{label}: MISSING {index}')
+                    )
+                if options['verbosity'] > 1:
+                    self.stdout.write(plan)
+
+        if options['check'] and missing:
+            raise CommandError(f'Index not used by: {", ".join(missing)}')
@@ -0,0 +1,244 @@
+"""
+Django command to bulk import recipes from JSONL or CSV files.
+
+"""
+import csv
+import json
+import os
+import time
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core.bulk import bulk_insert, can_copy, copy_rows, reserve_ids
+from core.models import Recipe, Tag, Ingredient
+from recipe.signals import recipes_bulk_written
+
+RECIPE_COLUMNS = (
+    'id', 'user_id', 'title', 'description', 'price', 'time_minutes', 'link',
+)
+LIST_SEPARATOR = '|'
+
+
+def _names(value):
+    """Return attribute names from a list, a list of dicts or a string."""
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = value.split(LIST_SEPARATOR)
+    names = [item['name'] if isinstance(item, dict) else item
+             for item in value]
+    return [name.strip() for name in names if name and name.strip()]
+
+
+def parse_record(raw):
+    """Normalise one input record, raising ValueError if it is invalid."""
+    try:
+        title = raw['title'].strip()
+        time_minutes = int(raw['time_minutes'])
+        price = Decimal(str(raw['price']))
+    except (KeyError, AttributeError, TypeError, ValueError,
+            InvalidOperation) as exc:
+        raise ValueError(f'invalid recipe fields: {exc!r}')
+    if not title:
+        raise ValueError('title may not be blank')
+    return {
+        'title': title,
+        'time_minutes': time_minutes,
+        'price': price,
+        'description': raw.get('description') or '',
+        'link': raw.get('link') or '',
+        'tags': _names(raw.get('tags')),
+        'ingredients': _names(raw.get('ingredients')),
+    }
+
+
+def read_records(path, fmt):
+    """Yield raw records from a JSONL or CSV file."""
+    with open(path, newline='', encoding='utf-8') as source:
+        if fmt == 'csv':
+            yield from csv.DictReader(source)
+            return
+        for line in source:
+            if line.strip():
+                yield json.loads(line)
+
+
+class RecipeImporter:
+    """Write batches of parsed records for one user.
+
+    Tag and ingredient ids are kept in memory for the whole run so every
+    name costs at most one insert. On PostgreSQL, recipe ids are drawn from
+    the sequence up front and all rows are loaded with COPY.
+    """
+
+    def __init__(self, user, use_copy):
+        self.user = user
+        self.use_copy = use_copy
+        self.tag_ids = self._existing(Tag)
+        self.ingredient_ids = self._existing(Ingredient)
+
+    def _existing(self, model):
+        # Descending ids so the oldest row wins for duplicated names.
+        return dict(
+            model.objects.filter(user=self.user)
+            .order_by('-id').values_list('name', 'id')
+        )
+
+    def _resolve(self, model, ids, names):
+        missing = [name for name in dict.fromkeys(names) if name not in ids]
+        if missing:
+            created = model.objects.get_or_create_many(self.user, missing)
+            ids.update((name, obj.pk) for name, obj in created.items())
+
+    def import_batch(self, records):
+        """Insert a batch of records and return the number of rows written."""
+        self._resolve(
+            Tag, self.tag_ids,
+            [name for record in records for name in record['tags']],
+        )
+        self._resolve(
+            Ingredient, self.ingredient_ids,
+            [name for record in records for name in record['ingredients']],
+        )
+
+        if self.use_copy:
+            recipe_ids = reserve_ids(Recipe, len(records))
+            copy_rows(Recipe, RECIPE_COLUMNS, [
+                (recipe_id, self.user.pk, record['title'],
+                 record['description'], record['price'],
+                 record['time_minutes'], record['link'])
+                for recipe_id, record in zip(recipe_ids, records)
+            ])
+        else:
+            recipes = bulk_insert(Recipe, [
+                Recipe(
+                    user=self.user,
+                    title=record['title'],
+                    description=record['description'],
+                    price=record['price'],
+                    time_minutes=record['time_minutes'],
+                    link=record['link'],
+                )
+                for record in records
+            ])
+            recipe_ids = [recipe.pk for recipe in recipes]
+
+        rows = len(records)
+        rows += self._link(
+            Recipe.tags.through, 'tag_id', self.tag_ids,
+            recipe_ids, [record['tags'] for record in records],
+        )
+        rows += self._link(
+            Recipe.ingredients.through, 'ingredient_id', self.ingredient_ids,
+            recipe_ids, [record['ingredients'] for record in records],
+        )
+        return rows
+
+    def _link(self, through, column, ids, recipe_ids, names_per_recipe):
+        pairs = list(dict.fromkeys(
+            (recipe_id, ids[name])
+            for recipe_id, names in zip(recipe_ids, names_per_recipe)
+            for name in names
+        ))
+        if self.use_copy:
+            copy_rows(through, ('recipe_id', column), pairs)
+        else:
+            through.objects.bulk_create([
+                through(recipe_id=recipe_id, **{column: attr_id})
+                for recipe_id, attr_id in pairs
+            ])
+        return len(pairs)
+
+
+class Command(BaseCommand):
+    """Django command to import recipes in batches. """
+
+    help = 'Import recipes with nested tag/ingredient names for a user.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='JSONL or CSV file to import.')
+        parser.add_argument('--email', required=True)
+        parser.add_argument('--format', choices=['jsonl', 'csv'])
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--checkpoint',
+            help='Progress file used to resume (default: <path>.checkpoint).',
+        )
+        parser.add_argument(
+            '--no-copy',
+            action='store_true',
+            help='Use bulk_create even on PostgreSQL.',
+        )
+
+    def handle(self, *args, **options):
+        """entrypoint for command."""
+        path = options['path']
+        try:
+            user = get_user_model().objects.get(email=options['email'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f'No user with email {options["email"]}.')
+        fmt = options['format'] or (
+            'csv' if path.lower().endswith('.csv') else 'jsonl'
+        )
+        checkpoint = options['checkpoint'] or f'{path}.checkpoint'
+        done = self._read_checkpoint(checkpoint)
+        if done:
+            self.stdout.write(f'Resuming after {done} records.')
+
+        importer = RecipeImporter(
+            user, can_copy(Recipe) and not options['no_copy']
+        )
+        records = islice(read_records(path, fmt), done, None)
+        imported = rows = 0
+        start = time.perf_counter()
+        try:
+            while True:
+                raw_batch = list(islice(records, options['batch_size']))
+                if not raw_batch:
+                    break
+                batch = []
+                for offset, raw in enumerate(raw_batch, start=done + 1):
+                    try:
+                        batch.append(parse_record(raw))
+                    except ValueError as exc:
+                        raise CommandError(f'Record {offset}: {exc}')
+
+                with transaction.atomic():
+                    rows += importer.import_batch(batch)
+                done += len(batch)
+                imported += len(batch)
+                self._write_checkpoint(checkpoint, done)
+
+                elapsed = time.perf_counter() - start
+                self.stdout.write(
+                    f'{done} records, {imported / elapsed:.0f} recipes/s'
+                )
+        finally:
+            # Bulk inserts bypass the model signals. Committed batches need
+            # fresh stamps and search state even if the import stops early.
+            if imported:
+                recipes_bulk_written(user.pk)
+
+        if os.path.exists(checkpoint):
+            os.remove(checkpoint)
+        elapsed = max(time.perf_counter() - start, 1e-9)
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {imported} recipes ({rows} rows) in {elapsed:.2f}s: '
+            f'{imported / elapsed:.0f} recipes/s, {rows / elapsed:.0f} rows/s'
+        ))
+
+    def _read_checkpoint(self, checkpoint):
+        if not os.path.exists(checkpoint):
+            return 0
+        with open(checkpoint) as checkpoint_file:
+            return json.load(checkpoint_file)['records']
+
+    def _write_checkpoint(self, checkpoint, records):
+        tmp_path = f'{checkpoint}.tmp'
+        with open(tmp_path, 'w') as checkpoint_file:
+            json.dump({'records': records}, checkpoint_file)
+        os.replace(tmp_path, checkpoint)
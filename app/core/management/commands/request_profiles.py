@@ -0,0 +1,64 @@
+"""
+Django command to list and summarize stored request profiles.
+
+"""
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.profiling import ProfileStore
+
+
+class Command(BaseCommand):
+    """Django command to inspect the request profile ring buffer. """
+
+    help = ('List stored request profiles, or print the pstats summary of '
+            'one of them.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'profile_id', nargs='?',
+            help='Profile to summarize; "latest" for the newest one.',
+        )
+        parser.add_argument(
+            '--sort', default='cumulative',
+            help='pstats sort key (cumulative, tottime, calls, ...).',
+        )
+        parser.add_argument('--limit', type=int, default=30)
+        parser.add_argument(
+            '--clear', action='store_true',
+            help='Delete every stored profile.',
+        )
+
+    def handle(self, *args, **options):
+        """entrypoint for command."""
+        store = ProfileStore.from_settings()
+        profiles = store.list()
+
+        if options['clear']:
+            for profile in profiles:
+                store.delete(profile['id'])
+            self.stdout.write(f'deleted {len(profiles)} profiles')
+            return
+
+        profile_id = options['profile_id']
+        if profile_id is None:
+            for profile in profiles:
+                created = datetime.fromtimestamp(profile['created'])
+                self.stdout.write(
+                    f'{profile["id"]}  {created:%Y-%m-%d %H:%M:%S}  '
+                    f'{profile["duration_ms"]:8.1f} ms  '
+                    f'{profile["status"]}  {profile["trigger"]:<9}  '
+                    f'{profile["method"]} {profile["path"]}'
+                )
+            return
+
+        if profile_id == 'latest':
+            if not profiles:
+                raise CommandError('No profiles stored.')
+            profile_id = profiles[0]['id']
+        if profile_id not in {profile['id'] for profile in profiles}:
+            raise CommandError(f'Unknown profile {profile_id}.')
+        self.stdout.write(
+            store.summary(profile_id, options['sort'], options['limit'])
+        )
@@ -0,0 +1,120 @@
+"""
+Django command to fill the database with synthetic users and recipes.
+
+"""
+import random
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core.seeding import (
+    UNIFORM,
+    ZIPF,
+    seed_recipes,
+    seed_users,
+    zipf_cum_weights,
+    zipf_sample,
+)
+from recipe.signals import recipes_bulk_written
+
+
+class Command(BaseCommand):
+    """Django command to generate synthetic data. """
+
+    help = ('Create N users with M recipes each, linked to tags and '
+            'ingredients with Zipfian reuse. The same --seed produces the '
+            'same data.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--recipes', type=int, default=100,
+                            help='Recipes per user.')
+        parser.add_argument('--tags', type=int, default=30,
+                            help='Tags per user.')
+        parser.add_argument('--ingredients', type=int, default=100,
+                            help='Ingredients per user.')
+        parser.add_argument('--tags-per-recipe', type=int, default=3)
+        parser.add_argument('--ingredients-per-recipe', type=int, default=6)
+        parser.add_argument('--distribution', choices=[ZIPF, UNIFORM],
+                            default=ZIPF)
+        parser.add_argument('--exponent', type=float, default=1.1,
+                            help='Zipf exponent; higher is more skewed.')
+        parser.add_argument('--vocabulary', type=int, default=10,
+                            help='Shared name pool size as a multiple of '
+                                 '--tags/--ingredients.')
+        parser.add_argument('--password', default='password123',
+                            help='Password of every seeded user.')
+        parser.add_argument('--email-prefix', default='seed')
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Users created per transaction.')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        """entrypoint for command."""
+        prefix = options['email_prefix']
+        if get_user_model().objects.filter(
+            email__startswith=prefix, email__endswith='@example.com'
+        ).exists():
+            raise CommandError(
+                f'Users with prefix "{prefix}" exist, pick another '
+                '--email-prefix.'
+            )
+
+        rng = random.Random(options['seed'])
+        tag_pool = _pool('tag', options['tags'] * options['vocabulary'])
+        ingredient_pool = _pool(
+            'ingredient', options['ingredients'] * options['vocabulary']
+        )
+        tag_weights = zipf_cum_weights(len(tag_pool), options['exponent'])
+        ingredient_weights = zipf_cum_weights(
+            len(ingredient_pool), options['exponent']
+        )
+
+        start = time.perf_counter()
+        created = 0
+        recipes = 0
+        while created < options['users']:
+            count = min(options['batch_size'], options['users'] - created)
+            with transaction.atomic():
+                users = seed_users(
+                    count, options['password'], prefix, start=created,
+                )
+                for user in users:
+                    # Popular names are shared by most users, like
+                    # "Dinner" or "salt" in real data.
+                    recipes += len(seed_recipes(
+                        user, rng, options['recipes'], 0, 0,
+                        tags_per_recipe=options['tags_per_recipe'],
+                        ingredients_per_recipe=options[
+                            'ingredients_per_recipe'
+                        ],
+                        distribution=options['distribution'],
+                        exponent=options['exponent'],
+                        tag_names=zipf_sample(
+                            rng, tag_pool, options['tags'], tag_weights
+                        ),
+                        ingredient_names=zipf_sample(
+                            rng, ingredient_pool, options['ingredients'],
+                            ingredient_weights,
+                        ),
+                    ))
+            for user in users:
+                recipes_bulk_written(user.id)
+            created += count
+            elapsed = time.perf_counter() - start
+            self.stdout.write(
+                f'{created} users, {recipes} recipes '
+                f'({recipes / elapsed:.0f} recipes/s)'
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded {created} users and {recipes} recipes in '
+            f'{time.perf_counter() - start:.1f}s'
+        ))
+
+
+def _pool(kind, size):
+    """Names ordered by popularity rank."""
+    return [f'{kind} {rank}' for rank in range(max(size, 1))]
@@ -0,0 +1,239 @@
+"""
+In-process request metrics exported in the Prometheus text format.
+
+Each worker process keeps its own registry and periodically writes a
+JSON snapshot to METRICS['DIRECTORY'] under a name unique to the process.
+The /metrics view sums every snapshot, so counters and histograms cover
+all workers, including ones that have since exited.
+"""
+import json
+import os
+import threading
+import time
+import uuid
+
+from django.conf import settings
+
+DEFAULT_METRICS = {
+    'ENABLED': False,
+    'DIRECTORY': None,
+    'FLUSH_INTERVAL': 5,
+    'TOKEN': None,
+}
+
+COUNTER = 'counter'
+HISTOGRAM = 'histogram'
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+SIZE_BUCKETS = (100, 1000, 10000, 100000, 1000000, 10000000)
+WAIT_BUCKETS = (0.0001, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10)
+
+METRICS = {
+    'http_requests_total': (
+        COUNTER, 'Requests handled, by view, action and status.', None,
+    ),
+    'http_request_errors_total': (
+        COUNTER, 'Requests answered with a 5xx status.', None,
+    ),
+    'http_request_duration_seconds': (
+        HISTOGRAM, 'Request latency in seconds.', LATENCY_BUCKETS,
+    ),
+    'http_request_queries': (
+        HISTOGRAM, 'SQL queries run per request.', QUERY_BUCKETS,
+    ),
+    'http_response_size_bytes': (
+        HISTOGRAM, 'Response body size in bytes.', SIZE_BUCKETS,
+    ),
+    'db_pool_wait_seconds': (
+        HISTOGRAM, 'Time spent checking out a pooled connection.',
+        WAIT_BUCKETS,
+    ),
+    'db_pool_timeouts_total': (
+        COUNTER, 'Checkouts that gave up waiting for a connection.', None,
+    ),
+    'db_pool_connections_opened_total': (
+        COUNTER, 'Connections opened by the pool.', None,
+    ),
+    'db_pool_connections_closed_total': (
+        COUNTER, 'Connections closed by the pool, by reason.', None,
+    ),
+}
+
+
+def metrics_settings():
+    """Return METRICS merged over the defaults."""
+    return {
+        **DEFAULT_METRICS,
+        **getattr(settings, 'METRICS', {}),
+    }
+
+
+class MetricsRegistry:
+    """Counters and histograms keyed by metric name and label set."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+        self._last_flush = time.monotonic()
+        self._file_name = f'metrics-{os.getpid()}-{uuid.uuid4().hex[:8]}.json'
+
+    @staticmethod
+    def _labels(labels):
+        return tuple(sorted(labels.items()))
+
+    def inc(self, name, labels, amount=1):
+        key = (name, self._labels(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name, labels, value):
+        buckets = METRICS[name][2]
+        key = (name, self._labels(labels))
+        with self._lock:
+            counts = self._histograms.get(key)
+            if counts is None:
+                # One slot per bucket plus +Inf, then sum and count.
+                counts = self._histograms[key] = [0] * (len(buckets) + 3)
+            for index, bound in enumerate(buckets):
+                if value <= bound:
+                    counts[index] += 1
+                    break
+            else:
+                counts[len(buckets)] += 1
+            counts[-2] += value
+            counts[-1] += 1
+
+    def snapshot(self):
+        """Return the registry as JSON-serializable data."""
+        with self._lock:
+            return {
+                'counters': [
+                    [name, list(labels), value]
+                    for (name, labels), value in self._counters.items()
+                ],
+                'histograms': [
+                    [name, list(labels), list(counts)]
+                    for (name, labels), counts in self._histograms.items()
+                ],
+            }
+
+    def clear(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def flush(self, force=False):
+        """Write this process's snapshot if FLUSH_INTERVAL has passed."""
+        options = metrics_settings()
+        directory = options['DIRECTORY']
+        now = time.monotonic()
+        if not directory or (
+            not force and now - self._last_flush < options['FLUSH_INTERVAL']
+        ):
+            return
+        self._last_flush = now
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, self._file_name)
+        with open(f'{path}.tmp', 'w') as fh:
+            json.dump(self.snapshot(), fh)
+        os.replace(f'{path}.tmp', path)
+
+
+registry = MetricsRegistry()
+
+
+def collect():
+    """Merge the snapshots of every process into one.
+
+    Without a DIRECTORY only this process's registry is reported.
+    """
+    directory = metrics_settings()['DIRECTORY']
+    if not directory:
+        return merge([registry.snapshot()])
+
+    registry.flush(force=True)
+    snapshots = []
+    for name in os.listdir(directory):
+        if not name.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(directory, name)) as fh:
+                snapshots.append(json.load(fh))
+        except FileNotFoundError:
+            continue
+    return merge(snapshots)
+
+
+def merge(snapshots):
+    """Sum counters and histogram slots with equal name and labels."""
+    counters = {}
+    histograms = {}
+    for snapshot in snapshots:
+        for name, labels, value in snapshot['counters']:
+            key = (name, tuple(map(tuple, labels)))
+            counters[key] = counters.get(key, 0) + value
+        for name, labels, counts in snapshot['histograms']:
+            key = (name, tuple(map(tuple, labels)))
+            merged = histograms.get(key)
+            if merged is None:
+                histograms[key] = list(counts)
+            else:
+                histograms[key] = [a + b for a, b in zip(merged, counts)]
+    return counters, histograms
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace(
+        '\n', '\\n'
+    )
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in pairs) + '}'
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render(merged):
+    """Render merged metrics in the Prometheus text exposition format."""
+    counters, histograms = merged
+    lines = []
+    for name, (kind, help_text, buckets) in METRICS.items():
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        if kind == COUNTER:
+            for (metric, labels), value in sorted(counters.items()):
+                if metric == name:
+                    lines.append(
+                        f'{name}{_format_labels(labels)} '
+                        f'{_format_value(value)}'
+                    )
+            continue
+        for (metric, labels), counts in sorted(histograms.items()):
+            if metric != name:
+                continue
+            cumulative = 0
+            for bound, count in zip(buckets + ('+Inf',), counts):
+                cumulative += count
+                le = bound if bound == '+Inf' else _format_value(bound)
+                lines.append(
+                    f'{name}_bucket{_format_labels(labels, [("le", le)])} '
+                    f'{cumulative}'
+                )
+            lines.append(
+                f'{name}_sum{_format_labels(labels)} '
+                f'{_format_value(counts[-2])}'
+            )
+            lines.append(
+                f'{name}_count{_format_labels(labels)} {counts[-1]}'
+            )
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,298 @@
+"""
+Middleware shared by the API apps.
+"""
+import asyncio
+import cProfile
+import logging
+import random
+import time
+
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils.deprecation import MiddlewareMixin
+
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.request import Request
+
+from core import instrumentation, metrics, routers
+from core.profiling import ProfileStore, profiling_settings
+from user.authentication import CachedTokenAuthentication
+
+logger = logging.getLogger(__name__)
+
+
+def _ms(seconds):
+    return seconds * 1000
+
+
+class QueryInstrumentationMiddleware(MiddlewareMixin):
+    """Report SQL and phase timings as Server-Timing headers.
+
+    db is the time spent executing queries, serialize an estimate of the
+    rest of the view (view time minus db: serializers, permissions, Python
+    around the queries) and render the renderer turning response.data
+    into bytes. Requests over the query or latency thresholds are logged
+    with their repeated SQL. Enabled by REQUEST_INSTRUMENTATION['ENABLED'].
+    """
+
+    def __init__(self, get_response=None):
+        if not instrumentation.instrumentation_settings()['ENABLED']:
+            raise MiddlewareNotUsed
+        instrumentation.install_all()
+        super().__init__(get_response)
+
+    def process_request(self, request):
+        request._recorder = instrumentation.start_recording()
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        recorder = getattr(request, '_recorder', None)
+        if recorder is not None:
+            recorder.phases['view_started'] = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        recorder = getattr(request, '_recorder', None)
+        if recorder is None or 'view_started' not in recorder.phases:
+            return response
+        now = time.perf_counter()
+        recorder.phases['view'] = now - recorder.phases.pop('view_started')
+        recorder.phases['view_db'] = recorder.db_time
+
+        def rendered(response):
+            recorder.phases['render'] = time.perf_counter() - now
+
+        response.add_post_render_callback(rendered)
+        return response
+
+    def process_response(self, request, response):
+        recorder = getattr(request, '_recorder', None)
+        if recorder is None:
+            return response
+        instrumentation.stop_recording()
+
+        elapsed = recorder.elapsed()
+        timings = [('db', recorder.db_time, f'{recorder.query_count} queries')]
+        if 'view' in recorder.phases:
+            timings.append((
+                'serialize',
+                max(recorder.phases['view'] - recorder.phases['view_db'], 0),
+                'estimated: view - db',
+            ))
+        if 'render' in recorder.phases:
+            timings.append(('render', recorder.phases['render'], None))
+        timings.append(('total', elapsed, None))
+
+        response['Server-Timing'] = ', '.join(
+            f'{name};dur={_ms(duration):.1f}'
+            + (f';desc="{desc}"' if desc else '')
+            for name, duration, desc in timings
+        )
+        response['X-Query-Count'] = str(recorder.query_count)
+        self._log_if_slow(request, response, recorder, elapsed)
+        return response
+
+    def _log_if_slow(self, request, response, recorder, elapsed):
+        options = instrumentation.instrumentation_settings()
+        if (recorder.query_count <= options['QUERY_THRESHOLD']
+                and _ms(elapsed) <= options['LATENCY_THRESHOLD_MS']):
+            return
+        duplicates = recorder.duplicates(options['DUPLICATE_THRESHOLD'])
+        logger.warning(
+            'Slow request %s %s -> %s: %d queries, %.1f ms (db %.1f ms)%s',
+            request.method,
+            request.get_full_path(),
+            response.status_code,
+            recorder.query_count,
+            _ms(elapsed),
+            _ms(recorder.db_time),
+            ''.join(
+                f'\n  repeated {count}x: {sql}' for sql, count in duplicates
+            ),
+            extra={
+                'query_count': recorder.query_count,
+                'duration_ms': _ms(elapsed),
+                'duplicate_queries': duplicates,
+            },
+        )
+
+
+def _is_staff(request):
+    """Whether the request comes from an active staff user.
+
+    API clients authenticate with tokens, which DRF only resolves inside
+    the view, so the token is checked here before profiling starts.
+    """
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        try:
+            result = CachedTokenAuthentication().authenticate(
+                Request(request)
+            )
+        except AuthenticationFailed:
+            return False
+        user = result[0] if result else None
+    return bool(user and user.is_active and user.is_staff)
+
+
+class RequestProfilerMiddleware(MiddlewareMixin):
+    """Profile the view and rendering of selected requests with cProfile.
+
+    Staff can ask for a profile with the HEADER header or QUERY_PARAM
+    query flag; SAMPLE_RATE profiles that fraction of all requests. The
+    profile covers the whole DRF dispatch (authentication, permissions,
+    queryset, serializers) plus rendering, and is saved to a ProfileStore
+    whose id is returned in X-Profile-Id. Enabled by
+    REQUEST_PROFILING['ENABLED'].
+    """
+
+    def __init__(self, get_response=None):
+        if not profiling_settings()['ENABLED']:
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+
+    def _trigger(self, request):
+        options = profiling_settings()
+        requested = (
+            request.headers.get(options['HEADER']) == '1'
+            or request.GET.get(options['QUERY_PARAM']) == '1'
+        )
+        if requested and _is_staff(request):
+            return 'requested'
+        rate = options['SAMPLE_RATE']
+        if rate and random.random() < rate:
+            return 'sampled'
+        return None
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # cProfile follows one thread; async views hop to a pool.
+        if asyncio.iscoroutinefunction(view_func):
+            return None
+        trigger = self._trigger(request)
+        if trigger is None:
+            return None
+
+        profile = cProfile.Profile()
+        start = time.perf_counter()
+        profile.enable()
+        try:
+            response = view_func(request, *view_args, **view_kwargs)
+            if hasattr(response, 'render') and callable(response.render):
+                response = response.render()
+        finally:
+            profile.disable()
+        duration = time.perf_counter() - start
+
+        profile_id = ProfileStore.from_settings().save(profile, {
+            'method': request.method,
+            'path': request.get_full_path(),
+            'status': response.status_code,
+            'duration_ms': round(duration * 1000, 3),
+            'trigger': trigger,
+            'created': time.time(),
+        })
+        response['X-Profile-Id'] = profile_id
+        return response
+
+
+def view_labels(request, view_func):
+    """Return the view and action labels of a resolved view function.
+
+    DRF's as_view() keeps the class on view_func.cls, and viewset routes
+    map HTTP methods to actions in view_func.actions; plain APIViews are
+    labelled with the handler name.
+    """
+    cls = getattr(view_func, 'cls', None)
+    view = cls.__name__ if cls is not None else getattr(
+        view_func, '__name__', 'unknown'
+    )
+    method = request.method.lower()
+    actions = getattr(view_func, 'actions', None) or {}
+    return {'view': view, 'action': actions.get(method, method)}
+
+
+class MetricsMiddleware(MiddlewareMixin):
+    """Record per-request metrics into core.metrics.registry.
+
+    Requests that never resolve to a view (404s, redirects by
+    CommonMiddleware) are labelled view="unresolved". Enabled by
+    METRICS['ENABLED'].
+    """
+
+    def __init__(self, get_response=None):
+        if not metrics.metrics_settings()['ENABLED']:
+            raise MiddlewareNotUsed
+        instrumentation.install_all()
+        super().__init__(get_response)
+
+    def process_request(self, request):
+        request._metrics_started = time.perf_counter()
+        recorder = instrumentation.current_recorder()
+        if recorder is None:
+            recorder = instrumentation.start_recording()
+            request._metrics_owns_recorder = True
+        request._metrics_recorder = recorder
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._metrics_labels = view_labels(request, view_func)
+
+    def process_response(self, request, response):
+        started = getattr(request, '_metrics_started', None)
+        if started is None:
+            return response
+        recorder = getattr(request, '_metrics_recorder', None)
+        if getattr(request, '_metrics_owns_recorder', False):
+            instrumentation.stop_recording()
+
+        labels = getattr(
+            request, '_metrics_labels',
+            {'view': 'unresolved', 'action': request.method.lower()},
+        )
+        registry = metrics.registry
+        registry.inc('http_requests_total', {
+            **labels, 'status': str(response.status_code),
+        })
+        if response.status_code >= 500:
+            registry.inc('http_request_errors_total', labels)
+        registry.observe(
+            'http_request_duration_seconds', labels,
+            time.perf_counter() - started,
+        )
+        if recorder is not None:
+            registry.observe(
+                'http_request_queries', labels, recorder.query_count
+            )
+        if not response.streaming:
+            registry.observe(
+                'http_response_size_bytes', labels, len(response.content)
+            )
+        registry.flush()
+        return response
+
+
+class ReplicaRoutingMiddleware(MiddlewareMixin):
+    """Serve safe reads of REPLICA_READ_ACTIONS from a read replica.
+
+    Must come before RequestProfilerMiddleware, which runs the view in
+    its own process_view. Enabled by listing READ_REPLICAS['ALIASES'].
+    """
+
+    def __init__(self, get_response=None):
+        if not routers.replica_settings()['ALIASES']:
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+
+    def process_request(self, request):
+        routers.route_reads(None)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        labels = view_labels(request, view_func)
+        if (request.method in ('GET', 'HEAD')
+                and (labels['view'], labels['action'])
+                in routers.REPLICA_READ_ACTIONS
+                and not routers.is_sticky(request)):
+            routers.route_reads(routers.choose_replica())
+
+    def process_response(self, request, response):
+        routers.route_reads(None)
+        if (request.method not in ('GET', 'HEAD', 'OPTIONS')
+                and response.status_code < 400):
+            routers.mark_sticky(request)
+        return response
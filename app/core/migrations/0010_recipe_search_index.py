@@ -0,0 +1,39 @@
+from django.db import migrations
+
+INDEX_NAME = 'recipe_search_vector_idx'
+
+
+def _index():
+    from django.contrib.postgres.indexes import GinIndex
+    from django.contrib.postgres.search import SearchVector
+
+    # Must stay identical to recipe.search.search_vector() for the
+    # planner to use it.
+    return GinIndex(
+        SearchVector('title', weight='A', config='english') +
+        SearchVector('description', weight='B', config='english'),
+        name=INDEX_NAME,
+    )
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.add_index(apps.get_model('core', 'Recipe'), _index())
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.remove_index(apps.get_model('core', 'Recipe'), _index())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_recipe_image_storage'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -9,8 +9,13 @@ from  django.conf import settings
 from django.db import models
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
 
+from core.storage import recipe_image_storage
+
 def recipe_image_file_path(instance, filename):
-    """Generating file path for new recipe image"""
+    """Generating file path for new recipe image
+
+    The storage renames the file after its content hash on save.
+    """
     ext = os.path.splitext(filename)[1]
     filename = f'{uuid.uuid4()}{ext}'
 
@@ -36,6 +41,37 @@ class UserManager(BaseUserManager):
         user.save(using=self._db)
         return user
 
+class RecipeAttrManager(models.Manager):
+    """Manager for user owned recipe attributes (tags, ingredients)."""
+
+    def get_or_create_many(self, user, names):
+        """Return a {name: object} map, creating missing names in bulk."""
+        names = list(dict.fromkeys(names))
+        objs = {}
+        if not names:
+            return objs
+
+        for obj in self.filter(user=user, name__in=names).order_by('id'):
+            objs.setdefault(obj.name, obj)
+
+        missing = [name for name in names if name not in objs]
+        if missing:
+            created = self.bulk_create(
+                [self.model(user=user, name=name) for name in missing]
+            )
+            if all(obj.pk is not None for obj in created):
+                objs.update((obj.name, obj) for obj in created)
+            else:
+                # Backends without RETURNING leave the new primary keys unset.
+                new_objs = self.filter(
+                    user=user, name__in=missing
+                ).order_by('id')
+                for obj in new_objs:
+                    objs.setdefault(obj.name, obj)
+
+        return {name: objs[name] for name in names}
+
+
 class User(AbstractBaseUser, PermissionsMixin):
     """User in the system"""
     email = models.EmailField(max_length=255, unique=True)
@@ -62,7 +98,19 @@ class Recipe(models.Model):
     link = models.CharField(max_length = 255, blank= True)
     tags = models.ManyToManyField('Tag')
     ingredients = models.ManyToManyField('Ingredient')
-    image = models.ImageField(null=True, upload_to=recipe_image_file_path)
+    image = models.ImageField(
+        null=True,
+        upload_to=recipe_image_file_path,
+        storage=recipe_image_storage,
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['user', '-id'],
+                name='recipe_user_id_desc_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.title
@@ -74,6 +122,13 @@ class Tag(models.Model):
     )
     name = models.CharField(max_length = 255, blank=False)
 
+    objects = RecipeAttrManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'name'], name='tag_user_name_idx'),
+        ]
+
     def __str__(self) :
         return self.name
     
@@ -85,6 +140,16 @@ class Ingredient(models.Model):
         on_delete = models.CASCADE,
     )
 
+    objects = RecipeAttrManager()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['user', 'name'],
+                name='ingredient_user_name_idx',
+            ),
+        ]
+
     def __str__(self):
         return self.name
     
\ No newline at end of file
@@ -0,0 +1,105 @@
+"""
+On-disk ring buffer of cProfile request profiles.
+"""
+import io
+import json
+import os
+import pstats
+import tempfile
+import time
+import uuid
+
+from django.conf import settings
+
+DEFAULT_REQUEST_PROFILING = {
+    'ENABLED': False,
+    'SAMPLE_RATE': 0.0,
+    'HEADER': 'X-Profile',
+    'QUERY_PARAM': 'profile',
+    'DIRECTORY': None,
+    'MAX_PROFILES': 50,
+}
+
+
+def profiling_settings():
+    """Return REQUEST_PROFILING merged over the defaults."""
+    return {
+        **DEFAULT_REQUEST_PROFILING,
+        **getattr(settings, 'REQUEST_PROFILING', {}),
+    }
+
+
+class ProfileStore:
+    """Keep the newest max_profiles profiles in a directory.
+
+    Each profile is a pstats dump (<id>.prof) with a JSON sidecar
+    (<id>.json) describing the request. Ids start with a nanosecond
+    timestamp so sorting them orders profiles by age.
+    """
+
+    def __init__(self, directory, max_profiles):
+        self.directory = directory
+        self.max_profiles = max_profiles
+
+    @classmethod
+    def from_settings(cls):
+        options = profiling_settings()
+        directory = options['DIRECTORY'] or os.path.join(
+            tempfile.gettempdir(), 'recipe-app-profiles'
+        )
+        return cls(directory, options['MAX_PROFILES'])
+
+    def _path(self, profile_id, ext):
+        return os.path.join(self.directory, f'{profile_id}.{ext}')
+
+    def save(self, profile, meta):
+        """Write a profile and its metadata; return the profile id."""
+        os.makedirs(self.directory, exist_ok=True)
+        profile_id = f'{time.time_ns()}-{uuid.uuid4().hex[:8]}'
+        # The sidecar is written last and renamed into place, so list()
+        # never sees a profile without its stats.
+        profile.dump_stats(self._path(profile_id, 'prof'))
+        tmp_path = self._path(profile_id, 'json.tmp')
+        with open(tmp_path, 'w') as fh:
+            json.dump({'id': profile_id, **meta}, fh)
+        os.replace(tmp_path, self._path(profile_id, 'json'))
+        self._trim()
+        return profile_id
+
+    def _ids(self):
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        return sorted(name[:-5] for name in names if name.endswith('.json'))
+
+    def _trim(self):
+        ids = self._ids()
+        for profile_id in ids[:max(len(ids) - self.max_profiles, 0)]:
+            self.delete(profile_id)
+
+    def delete(self, profile_id):
+        for ext in ('json', 'prof'):
+            try:
+                os.remove(self._path(profile_id, ext))
+            except FileNotFoundError:
+                # Another process trimmed it first.
+                pass
+
+    def list(self):
+        """Return the metadata of the stored profiles, newest first."""
+        profiles = []
+        for profile_id in reversed(self._ids()):
+            try:
+                with open(self._path(profile_id, 'json')) as fh:
+                    profiles.append(json.load(fh))
+            except FileNotFoundError:
+                continue
+        return profiles
+
+    def summary(self, profile_id, sort='cumulative', limit=30):
+        """Return the pstats report of a profile as text."""
+        out = io.StringIO()
+        stats = pstats.Stats(self._path(profile_id, 'prof'), stream=out)
+        stats.strip_dirs().sort_stats(sort).print_stats(limit)
+        return out.getvalue()
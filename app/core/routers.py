@@ -0,0 +1,116 @@
+"""
+Database router sending safe API reads to read replicas.
+
+ReplicaRoutingMiddleware picks a replica for the read-only actions in
+REPLICA_READ_ACTIONS and stores it in a context variable; only then does
+the router send reads there. Everything else (writes, get_or_create,
+token lookups) stays on the primary. After a client writes, its reads
+stick to the primary for STICKY_SECONDS so it sees its own writes
+despite replication lag.
+"""
+import hashlib
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+
+DEFAULT_READ_REPLICAS = {
+    'ALIASES': [],
+    'STICKY_SECONDS': 5,
+    'CACHE_ALIAS': 'default',
+}
+
+REPLICA_READ_ACTIONS = {
+    ('RecipeViewSet', 'list'),
+    ('RecipeViewSet', 'retrieve'),
+    ('TagViewSet', 'list'),
+    ('IngredientViewSet', 'list'),
+    ('ManageUserView', 'get'),
+}
+
+# Tokens authenticate clients that may have logged in on the primary a
+# moment ago; the token cache keeps these lookups rare anyway.
+PRIMARY_ONLY_MODELS = {'authtoken.token'}
+
+_replica = ContextVar('read_replica', default=None)
+
+
+def replica_settings():
+    """Return READ_REPLICAS merged over the defaults."""
+    return {
+        **DEFAULT_READ_REPLICAS,
+        **getattr(settings, 'READ_REPLICAS', {}),
+    }
+
+
+def choose_replica():
+    """Pick the replica serving a request, or None without replicas."""
+    aliases = replica_settings()['ALIASES']
+    return random.choice(aliases) if aliases else None
+
+
+def route_reads(alias):
+    """Send reads in the current context to alias, or the primary if None.
+
+    Set per request rather than reset with a token: under ASGI the
+    middleware hooks run in separate sync_to_async contexts.
+    """
+    _replica.set(alias)
+
+
+def current_replica():
+    return _replica.get()
+
+
+def _sticky_key(request):
+    authorization = request.META.get('HTTP_AUTHORIZATION')
+    if not authorization:
+        return None
+    digest = hashlib.sha256(authorization.encode()).hexdigest()
+    return f'replica-sticky:{digest}'
+
+
+def is_sticky(request):
+    """Whether the client wrote recently enough to need the primary."""
+    key = _sticky_key(request)
+    if key is None:
+        return False
+    options = replica_settings()
+    return caches[options['CACHE_ALIAS']].get(key) is not None
+
+
+def mark_sticky(request):
+    """Pin the client's reads to the primary for STICKY_SECONDS."""
+    key = _sticky_key(request)
+    if key is None:
+        return
+    options = replica_settings()
+    caches[options['CACHE_ALIAS']].set(
+        key, True, timeout=options['STICKY_SECONDS']
+    )
+
+
+class ReplicaRouter:
+    """Route reads to the replica chosen for the request, if any."""
+
+    def db_for_read(self, model, **hints):
+        alias = _replica.get()
+        if alias is None:
+            return None
+        if model._meta.label_lower in PRIMARY_ONLY_MODELS:
+            return DEFAULT_DB_ALIAS
+        return alias
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *replica_settings()['ALIASES']}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return None
@@ -0,0 +1,128 @@
+"""
+Synthetic data generation for benchmarks and local load testing.
+"""
+import itertools
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+
+from core.bulk import bulk_insert, can_copy, copy_rows
+from core.models import Recipe, Tag, Ingredient
+
+UNIFORM = 'uniform'
+ZIPF = 'zipf'
+
+
+def zipf_cum_weights(count, exponent=1.1):
+    """Cumulative weights making rank r about 1/r**exponent as likely."""
+    return list(itertools.accumulate(
+        1 / rank ** exponent for rank in range(1, count + 1)
+    ))
+
+
+def zipf_sample(rng, items, k, cum_weights):
+    """Draw k distinct items, the first ones far more often than the rest.
+
+    Rejecting repeats skews the tail slightly towards uniform, which is
+    fine for synthetic data.
+    """
+    k = min(k, len(items))
+    if k * 2 > len(items):
+        # Near-exhaustive draws would mostly hit repeats.
+        return rng.sample(items, k)
+    chosen = {}
+    while len(chosen) < k:
+        for index in rng.choices(
+            range(len(items)), cum_weights=cum_weights, k=k - len(chosen)
+        ):
+            chosen[index] = None
+    return [items[index] for index in chosen]
+
+
+def seed_users(count, password, email_prefix='seed', start=0,
+               batch_size=1000):
+    """Create count users sharing one precomputed password hash.
+
+    Hashing once instead of per user is what makes this fast:
+    create_user() runs the full PBKDF2 work factor for every call.
+    """
+    user_model = get_user_model()
+    hashed = make_password(password)
+    return bulk_insert(user_model, [
+        user_model(
+            email=f'{email_prefix}{n}@example.com',
+            name=f'Seed user {n}',
+            password=hashed,
+        )
+        for n in range(start, start + count)
+    ], batch_size=batch_size)
+
+
+def seed_recipes(user, rng, recipes, tags, ingredients,
+                 tags_per_recipe=3, ingredients_per_recipe=5,
+                 distribution=UNIFORM, exponent=1.1,
+                 tag_names=None, ingredient_names=None):
+    """Create recipes for user linked to drawn tags/ingredients.
+
+    With distribution=ZIPF a few tags/ingredients are on most recipes and
+    per recipe counts vary around the given averages. tag_names and
+    ingredient_names override the generated names.
+
+    Returns the created recipes.
+    """
+    tag_objs = bulk_insert(Tag, [
+        Tag(user=user, name=name)
+        for name in tag_names or (f'tag {i}' for i in range(tags))
+    ])
+    ingredient_objs = bulk_insert(Ingredient, [
+        Ingredient(user=user, name=name)
+        for name in ingredient_names or (
+            f'ingredient {i}' for i in range(ingredients)
+        )
+    ])
+    recipe_objs = bulk_insert(Recipe, [
+        Recipe(
+            user=user,
+            title=f'Recipe {i}',
+            description=f'Synthetic recipe number {i}',
+            time_minutes=rng.randint(5, 120),
+            price=rng.randint(100, 5000) / 100,
+        )
+        for i in range(recipes)
+    ], batch_size=5000)
+
+    _link(Recipe.tags.through, 'tag_id', recipe_objs, tag_objs,
+          tags_per_recipe, rng, distribution, exponent)
+    _link(Recipe.ingredients.through, 'ingredient_id', recipe_objs,
+          ingredient_objs, ingredients_per_recipe, rng, distribution,
+          exponent)
+    return recipe_objs
+
+
+def _link(through, column, recipes, attrs, per_recipe, rng,
+          distribution=UNIFORM, exponent=1.1):
+    per_recipe = min(per_recipe, len(attrs))
+    if distribution == ZIPF:
+        cum_weights = zipf_cum_weights(len(attrs), exponent)
+        ids = [
+            (recipe.pk, attr.pk)
+            for recipe in recipes
+            for attr in zipf_sample(
+                rng, attrs, rng.randint(1, max(2 * per_recipe - 1, 1)),
+                cum_weights,
+            )
+        ] if per_recipe else []
+    else:
+        ids = [
+            (recipe.pk, attr.pk)
+            for recipe in recipes
+            for attr in rng.sample(attrs, per_recipe)
+        ]
+
+    if can_copy(through):
+        copy_rows(through, ['recipe_id', column], ids)
+        return
+    through.objects.bulk_create([
+        through(recipe_id=recipe_id, **{column: attr_id})
+        for recipe_id, attr_id in ids
+    ], batch_size=5000)
@@ -0,0 +1,148 @@
+"""
+Content-addressed storage for recipe images.
+"""
+import fcntl
+import hashlib
+import os
+import tempfile
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.storage import FileSystemStorage
+from django.utils.translation import gettext as _
+
+from PIL import Image
+
+DEFAULT_MAX_BYTES = 10 * 1024 * 1024
+DEFAULT_MAX_PIXELS = 40 * 1000 * 1000
+
+
+def image_limits():
+    """Return the (max bytes, max pixels) allowed for recipe images."""
+    return (
+        getattr(settings, 'RECIPE_IMAGE_MAX_BYTES', DEFAULT_MAX_BYTES),
+        getattr(settings, 'RECIPE_IMAGE_MAX_PIXELS', DEFAULT_MAX_PIXELS),
+    )
+
+
+def check_image_limits(upload):
+    """Reject oversized uploads from the size and image header alone."""
+    max_bytes, max_pixels = image_limits()
+    if upload.size is not None and upload.size > max_bytes:
+        raise ValidationError(
+            _('Image files may not exceed %(max)s bytes.'),
+            params={'max': max_bytes},
+        )
+
+    position = upload.tell()
+    try:
+        # Image.open only parses the header; pixel data is not decoded.
+        with Image.open(upload) as image:
+            width, height = image.size
+    except Image.DecompressionBombError:
+        width, height = max_pixels + 1, 1
+    except (OSError, SyntaxError):
+        # Not an image; the field's own validation reports it.
+        return
+    finally:
+        upload.seek(position)
+
+    if width * height > max_pixels:
+        raise ValidationError(
+            _('Images may not exceed %(max)s pixels.'),
+            params={'max': max_pixels},
+        )
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """Store files under the SHA-256 of their content.
+
+    Uploads are streamed to a temporary file while hashed, then moved to
+    `<dir>/<hash[:2]>/<hash><ext>`. Identical uploads share one file.
+
+    Size limits are enforced by the upload serializers (check_image_limits)
+    so violations surface as 400s; this class stores whatever it is given.
+    """
+    chunk_size = 64 * 1024
+    lock_stripes = 64
+
+    def get_available_name(self, name, max_length=None):
+        return name
+
+    @contextmanager
+    def locked(self, name):
+        """Hold an exclusive, cross-process lock for a stored name.
+
+        Names share one of lock_stripes lock files, so the lock directory
+        stays small however many images are stored.
+        """
+        digest = hashlib.sha256(name.encode()).digest()
+        lock_dir = self.path('locks')
+        os.makedirs(lock_dir, exist_ok=True)
+        stripe = int.from_bytes(digest[:4], 'big') % self.lock_stripes
+        with open(os.path.join(lock_dir, f'{stripe}.lock'), 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def restore(self, name, content):
+        """Write content back under an existing hashed name."""
+        full_path = self.path(name)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        os.makedirs(self.path('tmp'), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.path('tmp'))
+        try:
+            with os.fdopen(fd, 'wb') as tmp_file:
+                if hasattr(content, 'seek'):
+                    content.seek(0)
+                for chunk in content.chunks(self.chunk_size):
+                    tmp_file.write(chunk)
+            os.replace(tmp_path, full_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _save(self, name, content):
+        directory, filename = os.path.split(name)
+        ext = os.path.splitext(filename)[1].lower()
+
+        tmp_dir = self.path('tmp')
+        os.makedirs(tmp_dir, exist_ok=True)
+        digest = hashlib.sha256()
+        fd, tmp_path = tempfile.mkstemp(dir=tmp_dir)
+        try:
+            with os.fdopen(fd, 'wb') as tmp_file:
+                if hasattr(content, 'seek'):
+                    content.seek(0)
+                for chunk in content.chunks(self.chunk_size):
+                    digest.update(chunk)
+                    tmp_file.write(chunk)
+
+            hashed = digest.hexdigest()
+            name = os.path.join(directory, hashed[:2], hashed + ext)
+            full_path = self.path(name)
+            if os.path.exists(full_path):
+                os.remove(tmp_path)
+            else:
+                os.makedirs(os.path.dirname(full_path), exist_ok=True)
+                if self.file_permissions_mode is not None:
+                    os.chmod(tmp_path, self.file_permissions_mode)
+                os.replace(tmp_path, full_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        return name.replace('\\', '/')
+
+
+_recipe_image_storage = ContentAddressedStorage()
+
+
+def recipe_image_storage():
+    """Return the storage used by Recipe.image."""
+    return _recipe_image_storage
@@ -0,0 +1,138 @@
+"""
+Tests for the async read endpoints.
+"""
+import asyncio
+import contextvars
+import json
+from decimal import Decimal
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.test import (
+    AsyncClient,
+    SimpleTestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.urls import resolve, reverse
+
+from rest_framework.authtoken.models import Token
+
+from core.async_views import (
+    ConcurrencyLimiter,
+    async_urlconf,
+    run_in_pool,
+)
+from core.models import Recipe
+from recipe.urls import ASYNC_READ_VIEWS
+
+request_label = contextvars.ContextVar('request_label', default=None)
+
+
+class ConcurrencyLimiterTests(SimpleTestCase):
+    """Test per-client in-flight counting."""
+
+    def test_per_client_limit(self):
+        async def scenario():
+            limiter = ConcurrencyLimiter(max_concurrency=4, per_client=2)
+            self.assertTrue(limiter.enter('a'))
+            self.assertTrue(limiter.enter('a'))
+            self.assertFalse(limiter.enter('a'))
+            self.assertTrue(limiter.enter('b'))
+            limiter.leave('a')
+            self.assertTrue(limiter.enter('a'))
+            limiter.leave('b')
+            self.assertNotIn('b', limiter.active)
+
+        asyncio.run(scenario())
+
+    def test_context_copied_to_pool(self):
+        """Test pool threads see the caller's context variables."""
+        def view(request):
+            return request_label.get()
+
+        async def scenario():
+            request_label.set('outer')
+            return await run_in_pool(view, object())
+
+        self.assertEqual(asyncio.run(scenario()), 'outer')
+
+
+@override_settings(ROOT_URLCONF=async_urlconf('app.urls', ASYNC_READ_VIEWS))
+class AsyncReadEndpointTests(TransactionTestCase):
+    """Test the recipe endpoints served through the async wrappers."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'user@example.com', 'testpass123'
+        )
+        self.token = Token.objects.create(user=self.user)
+        for n in range(3):
+            Recipe.objects.create(
+                user=self.user, title=f'Recipe {n}', time_minutes=5,
+                price=Decimal('1.00'),
+            )
+        self.client = AsyncClient()
+
+    def auth(self):
+        # AsyncClient takes headers without the HTTP_ prefix on Django 3.2.
+        return {'AUTHORIZATION': f'Token {self.token.key}'}
+
+    def test_read_routes_wrapped(self):
+        self.assertTrue(asyncio.iscoroutinefunction(
+            resolve(reverse('recipe:recipe-list')).func
+        ))
+        self.assertTrue(asyncio.iscoroutinefunction(
+            resolve(reverse('recipe:tag-list')).func
+        ))
+        self.assertFalse(asyncio.iscoroutinefunction(
+            resolve(reverse('user:me')).func
+        ))
+
+    async def test_list_served_async(self):
+        res = await self.client.get(
+            reverse('recipe:recipe-list'), **self.auth()
+        )
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(len(json.loads(res.content)), 3)
+
+    async def test_write_served(self):
+        """Test unsafe methods still reach the view."""
+        res = await self.client.post(
+            reverse('recipe:recipe-list'),
+            {'title': 'New', 'time_minutes': 5, 'price': '2.00'},
+            content_type='application/json', **self.auth()
+        )
+
+        self.assertEqual(res.status_code, 201)
+        count = await sync_to_async(Recipe.objects.count)()
+        self.assertEqual(count, 4)
+
+
+class StreamingExportTests(TransactionTestCase):
+    """Test the NDJSON export when iterated under ASGI."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'user@example.com', 'testpass123'
+        )
+        self.token = Token.objects.create(user=self.user)
+        for n in range(3):
+            Recipe.objects.create(
+                user=self.user, title=f'Recipe {n}', time_minutes=5,
+                price=Decimal('1.00'),
+            )
+        self.client = AsyncClient()
+
+    async def test_export_iterated_in_event_loop(self):
+        """Test the ORM work of the stream runs outside the loop."""
+        res = await self.client.get(
+            reverse('recipe:recipe-export'),
+            AUTHORIZATION=f'Token {self.token.key}',
+        )
+        # ASGIHandler iterates streaming content in the loop like this.
+        body = b''.join(res.streaming_content)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(len(body.splitlines()), 3)
@@ -3,12 +3,21 @@ Test custome django management commands.
 
 """
 # simiulation database
+import json
+import os
+import tempfile
+from decimal import Decimal
+from io import StringIO
 from unittest.mock import patch
 from psycopg2 import OperationalError as Psycopg2Error
 
+from django.contrib.auth import get_user_model
 from django.core.management import call_command
+from django.core.management.base import CommandError
 from django.db.utils import OperationalError
-from django.test import SimpleTestCase
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from core.models import Recipe, Tag, Ingredient
 
 
 """ for mock behaviour. """
@@ -30,4 +39,213 @@ class CommandTests(SimpleTestCase):
       call_command('wait_for_db')
 
       self.assertEqual(patched_check.call_count, 6)
-      patched_check.assert_called_with(databases=['default'])
\ No newline at end of file
+      patched_check.assert_called_with(databases=['default'])
+
+
+class ExplainQueriesTests(TestCase):
+   """Test the explain_queries command."""
+
+   def test_list_queries_use_composite_indexes(self):
+      """Test the per-user list queries are planned on the new indexes."""
+      user = get_user_model().objects.create_user(
+         'explain@example.com', 'testpass123'
+      )
+      Tag.objects.create(user=user, name='vegan')
+      Ingredient.objects.create(user=user, name='salt')
+      out = StringIO()
+
+      call_command('explain_queries', stdout=out)
+
+      output = out.getvalue()
+      self.assertIn('recipe list: uses recipe_user_id_desc_idx', output)
+      self.assertIn('tag list: uses tag_user_name_idx', output)
+      self.assertIn('ingredient list: uses ingredient_user_name_idx', output)
+
+
+class ImportRecipesTests(TestCase):
+   """Test the import_recipes command."""
+
+   def setUp(self):
+      self.user = get_user_model().objects.create_user(
+         'import@example.com', 'testpass123'
+      )
+      self.tmpdir = tempfile.TemporaryDirectory()
+      self.addCleanup(self.tmpdir.cleanup)
+
+   def _write(self, name, content):
+      path = os.path.join(self.tmpdir.name, name)
+      with open(path, 'w') as source:
+         source.write(content)
+      return path
+
+   def test_import_jsonl(self):
+      """Test importing JSONL records with nested names."""
+      Tag.objects.create(user=self.user, name='Dinner')
+      records = [
+         {'title': 'Soup', 'time_minutes': 20, 'price': '3.50',
+          'tags': ['Dinner', 'Warm'], 'ingredients': [{'name': 'salt'}]},
+         {'title': 'Salad', 'time_minutes': 5, 'price': '2.00',
+          'tags': ['Warm', 'Warm']},
+      ]
+      path = self._write(
+         'recipes.jsonl', '\n'.join(json.dumps(r) for r in records)
+      )
+
+      call_command(
+         'import_recipes', path, email=self.user.email,
+         batch_size=1, stdout=StringIO(),
+      )
+
+      recipes = Recipe.objects.filter(user=self.user).order_by('id')
+      self.assertEqual([r.title for r in recipes], ['Soup', 'Salad'])
+      self.assertEqual(Tag.objects.filter(user=self.user).count(), 2)
+      self.assertEqual(
+         sorted(t.name for t in recipes[0].tags.all()), ['Dinner', 'Warm']
+      )
+      self.assertEqual(recipes[1].tags.count(), 1)
+      self.assertEqual(recipes[0].ingredients.get().name, 'salt')
+      self.assertFalse(os.path.exists(f'{path}.checkpoint'))
+
+   def test_import_csv(self):
+      """Test importing CSV records with | separated names."""
+      path = self._write(
+         'recipes.csv',
+         'title,time_minutes,price,description,tags,ingredients\n'
+         'Tacos,30,4.25,"Spicy, crunchy",Mexican|Dinner,corn\n',
+      )
+
+      call_command(
+         'import_recipes', path, email=self.user.email, stdout=StringIO()
+      )
+
+      recipe = Recipe.objects.get(user=self.user)
+      self.assertEqual(recipe.description, 'Spicy, crunchy')
+      self.assertEqual(recipe.price, Decimal('4.25'))
+      self.assertEqual(recipe.tags.count(), 2)
+
+   def test_resume_from_checkpoint(self):
+      """Test records before the checkpoint are skipped."""
+      path = self._write('recipes.jsonl', '\n'.join([
+         json.dumps({'title': 'Done', 'time_minutes': 1, 'price': '1'}),
+         json.dumps({'title': 'Todo', 'time_minutes': 1, 'price': '1'}),
+      ]))
+      self._write('recipes.jsonl.checkpoint', json.dumps({'records': 1}))
+
+      call_command(
+         'import_recipes', path, email=self.user.email, stdout=StringIO()
+      )
+
+      titles = list(Recipe.objects.values_list('title', flat=True))
+      self.assertEqual(titles, ['Todo'])
+
+   def test_invalid_record_reports_line(self):
+      """Test an invalid record aborts with its record number."""
+      path = self._write('recipes.jsonl', json.dumps({'title': 'No price'}))
+
+      with self.assertRaisesMessage(CommandError, 'Record 1'):
+         call_command(
+            'import_recipes', path, email=self.user.email, stdout=StringIO()
+         )
+
+   def test_interrupted_import_refreshes_committed_batches(self):
+      """Test batches committed before a failure bump version stamps."""
+      path = self._write('recipes.jsonl', '\n'.join([
+         json.dumps({'title': 'Ok', 'time_minutes': 1, 'price': '1'}),
+         json.dumps({'title': 'No price'}),
+      ]))
+
+      with patch(
+         'core.management.commands.import_recipes.recipes_bulk_written'
+      ) as patched_written:
+         with self.assertRaises(CommandError):
+            call_command(
+               'import_recipes', path, email=self.user.email,
+               batch_size=1, stdout=StringIO(),
+            )
+
+      patched_written.assert_called_once_with(self.user.pk)
+
+
+@override_settings(ALLOWED_HOSTS=['localhost'])
+class BenchmarkEndpointsTests(TestCase):
+   """Test the benchmark_endpoints command."""
+
+   def test_results_written_and_compared(self):
+      """Test every endpoint is reported and a rerun can be compared."""
+      tmpdir = tempfile.TemporaryDirectory()
+      self.addCleanup(tmpdir.cleanup)
+      path = os.path.join(tmpdir.name, 'results.json')
+      volumes = {
+         'users': 1, 'recipes': 5, 'tags': 3, 'ingredients': 3,
+         'requests': 2, 'warmup': 0,
+      }
+
+      call_command(
+         'benchmark_endpoints', output=path, stdout=StringIO(), **volumes
+      )
+
+      with open(path) as results:
+         report = json.load(results)
+      self.assertIn('recipes tags all', report['results'])
+      self.assertIn('user token', report['results'])
+      for result in report['results'].values():
+         self.assertEqual(result['statuses'], [200])
+         self.assertEqual(result['requests'], 2)
+
+      out = StringIO()
+      call_command(
+         'benchmark_endpoints', compare=path, only=['tags'], stdout=out,
+         **volumes
+      )
+      self.assertIn('compared with', out.getvalue())
+      self.assertFalse(get_user_model().objects.exists())
+
+
+class SeedDataTests(TestCase):
+   """Test the seed_data command."""
+
+   def _seed(self, prefix, **options):
+      volumes = {
+         'users': 3, 'recipes': 4, 'tags': 5, 'ingredients': 6,
+         'batch_size': 2, 'seed': 7,
+      }
+      volumes.update(options)
+      call_command(
+         'seed_data', email_prefix=prefix, stdout=StringIO(), **volumes
+      )
+      return get_user_model().objects.filter(
+         email__startswith=prefix
+      ).order_by('id')
+
+   def test_seed_users_and_recipes(self):
+      """Test the requested volumes are created with a usable password."""
+      users = self._seed('a', password='seedpass123')
+
+      self.assertEqual(users.count(), 3)
+      self.assertTrue(users[0].check_password('seedpass123'))
+      for user in users:
+         self.assertEqual(Recipe.objects.filter(user=user).count(), 4)
+         self.assertEqual(Tag.objects.filter(user=user).count(), 5)
+         self.assertEqual(Ingredient.objects.filter(user=user).count(), 6)
+         self.assertTrue(
+            Recipe.objects.filter(user=user, tags__isnull=False).exists()
+         )
+
+   def test_seed_deterministic(self):
+      """Test the same seed produces the same names and links."""
+      def shape(users):
+         return [
+            sorted(
+               (recipe.title, tuple(sorted(t.name for t in recipe.tags.all())))
+               for recipe in Recipe.objects.filter(user=user)
+            )
+            for user in users
+         ]
+
+      self.assertEqual(shape(self._seed('a')), shape(self._seed('b')))
+
+   def test_existing_prefix_rejected(self):
+      self._seed('a', users=1)
+
+      with self.assertRaisesMessage(CommandError, 'prefix "a"'):
+         self._seed('a', users=1)
@@ -0,0 +1,146 @@
+"""
+Tests for the pooled PostgreSQL connection pool.
+"""
+import threading
+import time
+
+import psycopg2
+from psycopg2 import extensions
+
+from django.test import SimpleTestCase
+
+from core.db.backends.pooled_postgresql.pool import ConnectionPool, PoolTimeout
+
+
+class FakeConnection:
+    """The slice of a psycopg2 connection the pool relies on."""
+
+    def __init__(self):
+        self.closed = 0
+        self.autocommit = False
+        self.status = extensions.TRANSACTION_STATUS_IDLE
+        self.healthy = True
+        self.rollbacks = 0
+
+    def cursor(self):
+        connection = self
+
+        class Cursor:
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                return False
+
+            def execute(self, sql):
+                if not connection.healthy:
+                    raise psycopg2.OperationalError('server closed')
+
+        return Cursor()
+
+    def get_transaction_status(self):
+        return self.status
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.status = extensions.TRANSACTION_STATUS_IDLE
+
+    def close(self):
+        self.closed = 1
+
+
+def make_pool(**options):
+    defaults = {
+        'min_size': 0, 'max_size': 2, 'timeout': 1, 'max_idle': 300,
+        'max_lifetime': 3600, 'check_on_checkout': True,
+    }
+    defaults.update(options)
+    return ConnectionPool('test', **defaults)
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    """Test checkout, return, health checks and recycling."""
+
+    def setUp(self):
+        self.opened = []
+
+    def connect(self):
+        conn = FakeConnection()
+        self.opened.append(conn)
+        return conn
+
+    def test_connection_reused(self):
+        pool = make_pool()
+        conn = pool.getconn(self.connect)
+        pool.putconn(conn)
+
+        self.assertIs(pool.getconn(self.connect), conn)
+        self.assertEqual(len(self.opened), 1)
+
+    def test_timeout_when_exhausted(self):
+        pool = make_pool(max_size=1, timeout=0.01)
+        pool.getconn(self.connect)
+
+        with self.assertRaises(PoolTimeout):
+            pool.getconn(self.connect)
+
+    def test_waiter_gets_returned_connection(self):
+        """Test a checkout blocked on max_size wakes up on putconn."""
+        pool = make_pool(max_size=1)
+        conn = pool.getconn(self.connect)
+        got = []
+        waiter = threading.Thread(
+            target=lambda: got.append(pool.getconn(self.connect))
+        )
+        waiter.start()
+        time.sleep(0.05)
+        pool.putconn(conn)
+        waiter.join(1)
+
+        self.assertEqual(got, [conn])
+        self.assertEqual(len(self.opened), 1)
+
+    def test_unhealthy_connection_replaced(self):
+        pool = make_pool()
+        conn = pool.getconn(self.connect)
+        pool.putconn(conn)
+        conn.healthy = False
+
+        fresh = pool.getconn(self.connect)
+
+        self.assertIsNot(fresh, conn)
+        self.assertTrue(conn.closed)
+        self.assertEqual(pool.stats()['size'], 1)
+
+    def test_open_transaction_rolled_back(self):
+        pool = make_pool()
+        conn = pool.getconn(self.connect)
+        conn.status = extensions.TRANSACTION_STATUS_INERROR
+
+        pool.putconn(conn)
+
+        self.assertEqual(conn.rollbacks, 1)
+        self.assertEqual(pool.stats()['idle'], 1)
+
+    def test_idle_connections_recycled_above_min_size(self):
+        pool = make_pool(min_size=1, max_idle=0)
+        first = pool.getconn(self.connect)
+        second = pool.getconn(self.connect)
+        pool.putconn(first)
+        pool.putconn(second)
+        time.sleep(0.01)
+
+        pool.getconn(self.connect)
+
+        self.assertTrue(first.closed)
+        self.assertFalse(second.closed)
+
+    def test_old_connections_retired(self):
+        pool = make_pool(max_lifetime=0)
+        conn = pool.getconn(self.connect)
+        time.sleep(0.01)
+
+        pool.putconn(conn)
+
+        self.assertTrue(conn.closed)
+        self.assertEqual(pool.stats()['size'], 0)
@@ -0,0 +1,292 @@
+"""
+Tests for the API middleware.
+"""
+import os
+import tempfile
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import (
+    AsyncClient,
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core import instrumentation, metrics
+from core.models import Recipe
+from core.profiling import ProfileStore
+
+RECIPE_URL = reverse('recipe:recipe-list')
+TOKEN_URL = reverse('user:token')
+METRICS_URL = reverse('metrics')
+
+
+def instrumented(**options):
+    return override_settings(
+        REQUEST_INSTRUMENTATION={'ENABLED': True, **options}
+    )
+
+
+class RequestRecorderTests(SimpleTestCase):
+    """Test the query recorder."""
+
+    def test_duplicates(self):
+        recorder = instrumentation.RequestRecorder()
+        recorder.queries = [
+            ('SELECT a WHERE id = %s', 0.001),
+            ('SELECT b', 0.002),
+            ('SELECT a WHERE id = %s', 0.001),
+            ('SELECT a WHERE id = %s', 0.001),
+        ]
+
+        self.assertEqual(
+            recorder.duplicates(3), [('SELECT a WHERE id = %s', 3)]
+        )
+        self.assertAlmostEqual(recorder.db_time, 0.005)
+
+    def test_queries_outside_request_not_recorded(self):
+        self.assertIsNone(instrumentation.current_recorder())
+
+
+class QueryInstrumentationMiddlewareTests(TestCase):
+    """Test Server-Timing and X-Query-Count headers."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'user@example.com', 'testpass123'
+        )
+        for n in range(3):
+            Recipe.objects.create(
+                user=self.user, title=f'Recipe {n}', time_minutes=5,
+                price=Decimal('1.00'),
+            )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_disabled_by_default(self):
+        res = self.client.get(RECIPE_URL)
+
+        self.assertNotIn('Server-Timing', res)
+        self.assertNotIn('X-Query-Count', res)
+
+    @instrumented()
+    def test_headers(self):
+        """Test the headers report every query and phase."""
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(RECIPE_URL)
+
+        self.assertEqual(int(res['X-Query-Count']), len(queries))
+        phases = [part.split(';')[0] for part in
+                  res['Server-Timing'].split(', ')]
+        self.assertEqual(phases, ['db', 'serialize', 'render', 'total'])
+        self.assertIn(f'desc="{len(queries)} queries"', res['Server-Timing'])
+        self.assertIn('serialize;dur=', res['Server-Timing'])
+        self.assertIn('desc="estimated: view - db"', res['Server-Timing'])
+
+    @instrumented(QUERY_THRESHOLD=0, DUPLICATE_THRESHOLD=1)
+    def test_slow_request_logged(self):
+        """Test requests over the query threshold are logged with SQL."""
+        with self.assertLogs('core.middleware', 'WARNING') as logs:
+            self.client.get(RECIPE_URL)
+
+        self.assertIn(f'Slow request GET {RECIPE_URL}', logs.output[0])
+        self.assertIn('repeated 1x: SELECT', logs.output[0])
+
+    @instrumented()
+    def test_fast_request_not_logged(self):
+        with self.assertRaises(AssertionError):
+            with self.assertLogs('core.middleware', 'WARNING'):
+                self.client.get(RECIPE_URL)
+
+
+@instrumented()
+@override_settings(METRICS={'ENABLED': True})
+class AsgiInstrumentationTests(TransactionTestCase):
+    """Test the middleware hooks under ASGI.
+
+    Each MiddlewareMixin hook runs in its own sync_to_async context there.
+    """
+
+    def setUp(self):
+        user = get_user_model().objects.create_user(
+            'user@example.com', 'testpass123'
+        )
+        self.token = Token.objects.create(user=user)
+        self.client = AsyncClient()
+
+    async def test_headers(self):
+        res = await self.client.get(
+            RECIPE_URL, AUTHORIZATION=f'Token {self.token.key}'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn('Server-Timing', res)
+        self.assertIsNone(instrumentation.current_recorder())
+
+
+class RequestProfilerMiddlewareTests(TestCase):
+    """Test on-demand and sampled request profiling."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.staff = get_user_model().objects.create_user(
+            'staff@example.com', 'testpass123', is_staff=True
+        )
+        self.user = get_user_model().objects.create_user(
+            'user@example.com', 'testpass123'
+        )
+        self.client = APIClient()
+
+    def profiling(self, **options):
+        return override_settings(REQUEST_PROFILING={
+            'ENABLED': True, 'DIRECTORY': self.tmpdir.name, **options,
+        })
+
+    def test_staff_request_profiled(self):
+        """Test a staff token with the header stores a profile."""
+        token = Token.objects.create(user=self.staff)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+        out = StringIO()
+        with self.profiling():
+            res = self.client.get(RECIPE_URL, HTTP_X_PROFILE='1')
+            call_command('request_profiles', 'latest', stdout=out)
+
+        profiles = ProfileStore(self.tmpdir.name, 50).list()
+        self.assertEqual([p['id'] for p in profiles], [res['X-Profile-Id']])
+        self.assertEqual(profiles[0]['trigger'], 'requested')
+        self.assertIn('function calls', out.getvalue())
+
+    def test_non_staff_request_not_profiled(self):
+        token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+        with self.profiling():
+            res = self.client.get(RECIPE_URL, {'profile': 1})
+
+        self.assertNotIn('X-Profile-Id', res)
+        self.assertEqual(ProfileStore(self.tmpdir.name, 50).list(), [])
+
+    def test_sampled_requests_bounded(self):
+        """Test sampling profiles everyone and keeps the newest only."""
+        self.client.force_authenticate(self.user)
+
+        with self.profiling(SAMPLE_RATE=1.0, MAX_PROFILES=2):
+            ids = [self.client.get(RECIPE_URL)['X-Profile-Id']
+                   for _ in range(3)]
+
+        profiles = ProfileStore(self.tmpdir.name, 2).list()
+        self.assertEqual([p['id'] for p in profiles], ids[:0:-1])
+        self.assertEqual(len(os.listdir(self.tmpdir.name)), 4)
+
+
+class MetricsMiddlewareTests(TestCase):
+    """Test request metrics and the /metrics endpoint."""
+
+    def setUp(self):
+        metrics.registry.clear()
+        self.addCleanup(metrics.registry.clear)
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.user = get_user_model().objects.create_user(
+            'user@example.com', 'testpass123'
+        )
+        self.client = APIClient()
+
+    def metrics_enabled(self, **options):
+        return override_settings(METRICS={'ENABLED': True, **options})
+
+    def test_metrics_disabled(self):
+        res = self.client.get(METRICS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_requests_labelled_by_view_and_action(self):
+        """Test viewset actions and plain API views get their labels."""
+        self.client.force_authenticate(self.user)
+        with self.metrics_enabled():
+            self.client.get(RECIPE_URL)
+            self.client.get(RECIPE_URL)
+            self.client.post(TOKEN_URL, {
+                'email': 'user@example.com', 'password': 'wrong',
+            })
+            res = self.client.get(METRICS_URL)
+
+        body = res.content.decode()
+        self.assertTrue(res['Content-Type'].startswith('text/plain'))
+        self.assertIn(
+            'http_requests_total{action="list",status="200",'
+            'view="RecipeViewSet"} 2', body,
+        )
+        self.assertIn(
+            'http_requests_total{action="post",status="400",'
+            'view="CreateTokenView"} 1', body,
+        )
+        self.assertIn(
+            'http_request_duration_seconds_count{action="list",'
+            'view="RecipeViewSet"} 2', body,
+        )
+        self.assertIn(
+            'http_request_queries_bucket{action="list",'
+            'view="RecipeViewSet",le="+Inf"} 2', body,
+        )
+
+    def test_process_snapshots_merged(self):
+        """Test snapshots written by other workers are summed."""
+        other = metrics.MetricsRegistry()
+        labels = {'view': 'TagViewSet', 'action': 'list', 'status': '200'}
+        other.inc('http_requests_total', labels, 3)
+        with self.metrics_enabled(DIRECTORY=self.tmpdir.name):
+            other.flush(force=True)
+            metrics.registry.inc('http_requests_total', labels, 2)
+            res = self.client.get(METRICS_URL)
+
+        self.assertIn(
+            'http_requests_total{action="list",status="200",'
+            'view="TagViewSet"} 5', res.content.decode(),
+        )
+
+    def test_token_required(self):
+        with self.metrics_enabled(TOKEN='secret'):
+            denied = self.client.get(METRICS_URL)
+            allowed = self.client.get(
+                METRICS_URL, HTTP_AUTHORIZATION='Bearer secret'
+            )
+
+        self.assertEqual(denied.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(allowed.status_code, status.HTTP_200_OK)
+
+    def test_histogram_rendering(self):
+        registry = metrics.MetricsRegistry()
+        labels = {'view': 'V', 'action': 'list'}
+        for value in (0, 3, 500):
+            registry.observe('http_request_queries', labels, value)
+
+        text = metrics.render(metrics.merge([registry.snapshot()]))
+
+        self.assertIn(
+            'http_request_queries_bucket{action="list",view="V",le="0"} 1',
+            text,
+        )
+        self.assertIn(
+            'http_request_queries_bucket{action="list",view="V",le="5"} 2',
+            text,
+        )
+        self.assertIn(
+            'http_request_queries_bucket{action="list",view="V",le="+Inf"} 3',
+            text,
+        )
+        self.assertIn('http_request_queries_sum{action="list",view="V"} 503',
+                      text)
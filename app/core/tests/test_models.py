@@ -91,4 +91,16 @@ class ModelTests(TestCase):
 
         self.assertEqual(file_path, f'uploads/recipe/{uuid}.jpg')
 
+    def test_get_or_create_many(self):
+        """Test resolving attribute names creates only missing rows."""
+        user = create_user()
+        existing = models.Tag.objects.create(user=user, name='vegan')
+
+        tags = models.Tag.objects.get_or_create_many(
+            user, ['vegan', 'dinner', 'vegan']
+        )
 
+        self.assertEqual(list(tags), ['vegan', 'dinner'])
+        self.assertEqual(tags['vegan'], existing)
+        self.assertIsNotNone(tags['dinner'].pk)
+        self.assertEqual(models.Tag.objects.filter(user=user).count(), 2)
@@ -0,0 +1,152 @@
+"""
+Tests for read-replica routing.
+"""
+from decimal import Decimal
+from unittest import skipUnless
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase
+from django.test import override_settings
+from django.urls import reverse
+
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core import routers
+from core.middleware import ReplicaRoutingMiddleware
+from core.models import Recipe
+from recipe.views import RecipeViewSet, TagViewSet
+
+RECIPES_URL = reverse('recipe:recipe-list')
+AUTH = {'HTTP_AUTHORIZATION': 'Token abc'}
+
+
+def with_replica(**options):
+    return override_settings(
+        READ_REPLICAS={'ALIASES': ['replica'], **options}
+    )
+
+
+class ReplicaRouterTests(SimpleTestCase):
+    """Test where the router sends reads and writes."""
+
+    def setUp(self):
+        self.router = routers.ReplicaRouter()
+        self.addCleanup(routers.route_reads, None)
+
+    def test_reads_use_primary_by_default(self):
+        self.assertIsNone(self.router.db_for_read(Recipe))
+
+    def test_routed_reads_use_replica(self):
+        routers.route_reads('replica')
+
+        self.assertEqual(self.router.db_for_read(Recipe), 'replica')
+        self.assertEqual(self.router.db_for_write(Recipe), 'default')
+
+    def test_token_reads_stay_on_primary(self):
+        routers.route_reads('replica')
+
+        self.assertEqual(self.router.db_for_read(Token), 'default')
+
+
+@with_replica()
+class ReplicaRoutingMiddlewareTests(SimpleTestCase):
+    """Test which requests the middleware routes to a replica."""
+
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+        self.addCleanup(routers.route_reads, None)
+        self.middleware = ReplicaRoutingMiddleware(
+            lambda request: HttpResponse()
+        )
+
+    def route(self, request, view_func):
+        self.middleware.process_request(request)
+        self.middleware.process_view(request, view_func, (), {})
+        return routers.current_replica()
+
+    def test_safe_read_routed_to_replica(self):
+        request = self.factory.get(RECIPES_URL, **AUTH)
+        view = RecipeViewSet.as_view({'get': 'list', 'post': 'create'})
+
+        self.assertEqual(self.route(request, view), 'replica')
+
+        self.middleware.process_response(request, HttpResponse())
+        self.assertIsNone(routers.current_replica())
+
+    def test_other_actions_use_primary(self):
+        view = TagViewSet.as_view({'get': 'retrieve'})
+
+        self.assertIsNone(self.route(self.factory.get('/'), view))
+
+    def test_reads_stick_to_primary_after_write(self):
+        view = RecipeViewSet.as_view({'get': 'list', 'post': 'create'})
+        post = self.factory.post(RECIPES_URL, **AUTH)
+        self.route(post, view)
+        self.middleware.process_response(post, HttpResponse(status=201))
+
+        get = self.factory.get(RECIPES_URL, **AUTH)
+        self.assertIsNone(self.route(get, view))
+        other = {'HTTP_AUTHORIZATION': 'Token other'}
+        self.assertEqual(
+            self.route(self.factory.get(RECIPES_URL, **other), view),
+            'replica',
+        )
+
+    def test_failed_write_not_sticky(self):
+        view = RecipeViewSet.as_view({'get': 'list', 'post': 'create'})
+        post = self.factory.post(RECIPES_URL, **AUTH)
+        self.middleware.process_response(post, HttpResponse(status=400))
+
+        self.assertEqual(
+            self.route(self.factory.get(RECIPES_URL, **AUTH), view),
+            'replica',
+        )
+
+
+HAS_REPLICA = 'replica' in settings.DATABASES
+
+
+@skipUnless(
+    HAS_REPLICA,
+    'Run with DJANGO_SETTINGS_MODULE=app.settings_replica.',
+)
+@with_replica()
+@override_settings(DATABASE_ROUTERS=['core.routers.ReplicaRouter'])
+class SQLiteReplicaTests(TestCase):
+    """Test routing against two databases with different contents."""
+    databases = {'default', 'replica'} if HAS_REPLICA else {'default'}
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            'user@example.com', 'testpass123'
+        )
+        token = Token.objects.create(user=self.user)
+        get_user_model().objects.using('replica').create(
+            pk=self.user.pk, email=self.user.email
+        )
+        Recipe.objects.using('replica').create(
+            user_id=self.user.pk, title='On the replica',
+            time_minutes=5, price=Decimal('1.00'),
+        )
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+    def titles(self):
+        res = self.client.get(RECIPES_URL)
+        return [recipe['title'] for recipe in res.data]
+
+    def test_list_read_from_replica(self):
+        self.assertEqual(self.titles(), ['On the replica'])
+
+    def test_list_read_from_primary_after_write(self):
+        self.client.post(RECIPES_URL, {
+            'title': 'On the primary', 'time_minutes': 5, 'price': '2.00',
+        })
+
+        self.assertEqual(self.titles(), ['On the primary'])
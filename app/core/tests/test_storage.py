@@ -0,0 +1,86 @@
+"""
+Tests for the content-addressed image storage.
+"""
+import hashlib
+import io
+import tempfile
+
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, override_settings
+
+from PIL import Image
+
+from core.storage import ContentAddressedStorage, check_image_limits
+
+
+def image_upload(size=(10, 10)):
+    """Return an uploaded PNG of the given size."""
+    buffer = io.BytesIO()
+    Image.new('RGB', size).save(buffer, format='PNG')
+    return SimpleUploadedFile('image.png', buffer.getvalue())
+
+
+class ContentAddressedStorageTests(SimpleTestCase):
+    """Test storing files under their content hash."""
+
+    def setUp(self):
+        self.location = tempfile.TemporaryDirectory()
+        self.addCleanup(self.location.cleanup)
+        self.storage = ContentAddressedStorage(location=self.location.name)
+
+    def test_name_is_content_hash(self):
+        """Test the saved name is derived from the content."""
+        content = b'recipe image bytes'
+        digest = hashlib.sha256(content).hexdigest()
+
+        name = self.storage.save('uploads/recipe/x.JPG', ContentFile(content))
+
+        self.assertEqual(name, f'uploads/recipe/{digest[:2]}/{digest}.jpg')
+        with self.storage.open(name) as stored:
+            self.assertEqual(stored.read(), content)
+
+    def test_identical_content_deduplicated(self):
+        """Test saving the same content twice stores one file."""
+        first = self.storage.save('uploads/recipe/a.jpg', ContentFile(b'x'))
+        second = self.storage.save('uploads/recipe/b.jpg', ContentFile(b'x'))
+
+        self.assertEqual(first, second)
+        _, files = self.storage.listdir('tmp')
+        self.assertEqual(files, [])
+
+    def test_restore_writes_same_name(self):
+        """Test a released file is written back under its hashed name."""
+        name = self.storage.save('uploads/recipe/a.jpg', ContentFile(b'x'))
+        self.storage.delete(name)
+
+        with self.storage.locked(name):
+            self.storage.restore(name, ContentFile(b'x'))
+
+        with self.storage.open(name) as stored:
+            self.assertEqual(stored.read(), b'x')
+
+
+class ImageLimitTests(SimpleTestCase):
+    """Test header based upload limits."""
+
+    @override_settings(RECIPE_IMAGE_MAX_PIXELS=100)
+    def test_pixel_limit(self):
+        """Test images over the pixel limit are rejected."""
+        with self.assertRaises(ValidationError):
+            check_image_limits(image_upload((20, 20)))
+
+    @override_settings(RECIPE_IMAGE_MAX_BYTES=10)
+    def test_size_limit(self):
+        """Test uploads over the byte limit are rejected."""
+        with self.assertRaises(ValidationError):
+            check_image_limits(image_upload())
+
+    def test_within_limits(self):
+        """Test a small image passes and the file is rewound."""
+        upload = image_upload()
+
+        check_image_limits(upload)
+
+        self.assertEqual(upload.tell(), 0)
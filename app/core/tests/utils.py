@@ -0,0 +1,27 @@
+"""
+Helpers shared by the test suites.
+"""
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryBudgetMixin:
+    """Assert that a block of code stays within a query budget."""
+
+    @contextmanager
+    def assertMaxQueries(self, budget, using=DEFAULT_DB_ALIAS):
+        """Fail if the block runs more than `budget` queries."""
+        with CaptureQueriesContext(connections[using]) as context:
+            yield context
+
+        executed = len(context)
+        if executed > budget:
+            queries = '\n'.join(
+                f'{i}. {query["sql"]}'
+                for i, query in enumerate(context.captured_queries, start=1)
+            )
+            self.fail(
+                f'{executed} queries executed, budget is {budget}\n{queries}'
+            )
@@ -0,0 +1,26 @@
+"""
+Views for operational endpoints.
+"""
+import hmac
+
+from django.http import Http404, HttpResponse, HttpResponseForbidden
+
+from core import metrics
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def metrics_view(request):
+    """Expose the merged request metrics in Prometheus text format."""
+    options = metrics.metrics_settings()
+    if not options['ENABLED']:
+        raise Http404
+    token = options['TOKEN']
+    if token and not hmac.compare_digest(
+        request.headers.get('Authorization', ''), f'Bearer {token}'
+    ):
+        return HttpResponseForbidden()
+    return HttpResponse(
+        metrics.render(metrics.collect()),
+        content_type=PROMETHEUS_CONTENT_TYPE,
+    )
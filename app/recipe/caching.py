@@ -0,0 +1,142 @@
+"""
+In-process cache of rendered tag and ingredient list responses.
+"""
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.http import HttpResponse
+
+from recipe import versions
+
+DEFAULT_RESPONSE_CACHE = {
+    'MAX_ENTRIES': 1000,
+    'MAX_BYTES': 16 * 1024 * 1024,
+}
+
+
+def _cache_settings():
+    """Return RESPONSE_CACHE merged over the defaults."""
+    return {
+        **DEFAULT_RESPONSE_CACHE,
+        **getattr(settings, 'RESPONSE_CACHE', {}),
+    }
+
+
+class ResponseCache:
+    """LRU of rendered payloads bounded by entry count and total bytes.
+
+    Entries are indexed by (user id, collection) so writes can evict
+    exactly the payloads they affect.
+    """
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._owners = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return (content, content_type) or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[1], entry[2]
+
+    def set(self, key, owner, content, content_type):
+        """Store a rendered payload for an owner."""
+        options = _cache_settings()
+        if len(content) > options['MAX_BYTES']:
+            return
+        with self._lock:
+            self._pop(key)
+            self._entries[key] = (owner, content, content_type)
+            self._owners.setdefault(owner, set()).add(key)
+            self._bytes += len(content)
+            while (len(self._entries) > options['MAX_ENTRIES'] or
+                   self._bytes > options['MAX_BYTES']):
+                self._pop(next(iter(self._entries)))
+
+    def invalidate(self, user_id, collection):
+        """Drop every payload of a user's collection."""
+        with self._lock:
+            for key in self._owners.pop((user_id, collection), ()):
+                self._pop(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._owners.clear()
+            self._bytes = 0
+
+    def _pop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        owner, content, _ = entry
+        self._bytes -= len(content)
+        keys = self._owners.get(owner)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._owners[owner]
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def size(self):
+        return self._bytes
+
+
+response_cache = ResponseCache()
+
+
+class CachedListMixin:
+    """Serve list responses from the rendered payload cache.
+
+    Only JSON responses are cached. The key embeds the collection version
+    stamp, so other processes' writes are observed even before the local
+    entries are evicted.
+    """
+    cache_collection = None
+
+    def get_cache_key(self, request):
+        stamp, = versions.get_versions(
+            request.user.pk, [self.cache_collection]
+        )
+        return (
+            self.cache_collection,
+            request.user.pk,
+            type(self).__name__,
+            tuple(
+                (name, tuple(values))
+                for name, values in sorted(request.query_params.lists())
+            ),
+            request.accepted_media_type,
+            stamp,
+        )
+
+    def list(self, request, *args, **kwargs):
+        if request.accepted_renderer.format != 'json':
+            return super().list(request, *args, **kwargs)
+
+        key = self.get_cache_key(request)
+        cached = response_cache.get(key)
+        if cached is not None:
+            content, content_type = cached
+            return HttpResponse(content, content_type=content_type)
+
+        response = super().list(request, *args, **kwargs)
+        if response.status_code == 200:
+            owner = (request.user.pk, self.cache_collection)
+
+            def store(rendered):
+                response_cache.set(
+                    key, owner, rendered.content, rendered['Content-Type']
+                )
+
+            response.add_post_render_callback(store)
+        return response
@@ -0,0 +1,64 @@
+"""
+Conditional GET support for recipe APIs.
+"""
+import hashlib
+
+from django.utils.http import parse_etags
+
+from rest_framework import status
+from rest_framework.response import Response
+
+from recipe import versions
+
+
+class NotModified(Exception):
+    """Raised from initial() when the client copy is still current."""
+
+
+class ConditionalGetMixin:
+    """Answer If-None-Match on read actions from collection versions.
+
+    The ETag is derived from the user's collection stamps, the full path
+    and the negotiated media type, so a matching request is answered with
+    304 before any queryset or serializer runs.
+    """
+    etag_collections = ()
+    conditional_actions = ('list', 'retrieve')
+
+    def get_etag(self, request):
+        stamps = versions.get_versions(
+            request.user.pk, self.etag_collections
+        )
+        raw = '|'.join(
+            [request.get_full_path(), request.accepted_media_type, *stamps]
+        )
+        return '"%s"' % hashlib.sha256(raw.encode()).hexdigest()
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.etag = None
+        if (request.method not in ('GET', 'HEAD') or
+                self.action not in self.conditional_actions):
+            return
+
+        self.etag = self.get_etag(request)
+        if_none_match = parse_etags(request.META.get('HTTP_IF_NONE_MATCH', ''))
+        if self.etag in if_none_match or '*' in if_none_match:
+            raise NotModified()
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            return Response(
+                status=status.HTTP_304_NOT_MODIFIED,
+                headers={'ETag': self.etag},
+            )
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(
+            request, response, *args, **kwargs
+        )
+        etag = getattr(self, 'etag', None)
+        if etag and response.status_code == status.HTTP_200_OK:
+            response['ETag'] = etag
+        return response
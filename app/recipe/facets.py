@@ -0,0 +1,70 @@
+"""
+Per-tag and per-ingredient counts of the recipes matching a filter.
+"""
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+
+from core.models import Recipe
+from recipe import versions
+
+FACET_COLLECTIONS = (versions.RECIPES, versions.TAGS, versions.INGREDIENTS)
+
+
+def _counts(through, column, recipe_ids):
+    """Count matching recipes per attribute in one GROUP BY query."""
+    attr = column[:-len('_id')]
+    rows = through.objects.filter(
+        recipe_id__in=recipe_ids
+    ).values(
+        column, f'{attr}__name'
+    ).annotate(
+        count=Count('recipe_id')
+    ).order_by('-count', f'{attr}__name')
+    return [
+        {'id': row[column], 'name': row[f'{attr}__name'],
+         'count': row['count']}
+        for row in rows
+    ]
+
+
+def compute_facets(queryset):
+    """Return the recipe total and tag/ingredient counts for a queryset.
+
+    The filtered recipes are only ever used as an id subquery, so each
+    facet is a single aggregate over its through table.
+    """
+    recipe_ids = queryset.order_by().values('id')
+    return {
+        'recipes': queryset.order_by().count(),
+        'tags': _counts(Recipe.tags.through, 'tag_id', recipe_ids),
+        'ingredients': _counts(
+            Recipe.ingredients.through, 'ingredient_id', recipe_ids
+        ),
+    }
+
+
+def facets_key(user_id, filters):
+    """Cache key for a user's facets under a normalized filter set.
+
+    The key embeds the version stamps of every collection the facets
+    read, so writes make old entries unreachable instead of deleting them.
+    """
+    stamps = versions.get_versions(user_id, FACET_COLLECTIONS)
+    digest = hashlib.sha256(
+        json.dumps([filters, stamps], sort_keys=True).encode()
+    ).hexdigest()
+    return f'recipe-facets:{user_id}:{digest}'
+
+
+def get_facets(user_id, filters, queryset):
+    """Return cached facets, computing them from the queryset on a miss."""
+    key = facets_key(user_id, filters)
+    facets = cache.get(key)
+    if facets is None:
+        facets = compute_facets(queryset)
+        cache.set(key, facets, timeout=settings.RECIPE_FACETS_TIMEOUT)
+    return facets
@@ -0,0 +1,48 @@
+"""
+Query helpers filtering recipes, tags and ingredients through their M2M
+tables.
+"""
+from django.db.models import Count, Exists, OuterRef
+
+MATCH_ANY = 'any'
+MATCH_ALL = 'all'
+
+
+def filter_by_attrs(queryset, through, column, ids, match=MATCH_ANY):
+    """Filter recipes linked to ids in a through table.
+
+    `any` keeps recipes linked to at least one id with a correlated EXISTS,
+    so no join fan-out has to be undone with DISTINCT. `all` keeps recipes
+    linked to every id, counted per recipe with GROUP BY ... HAVING.
+    """
+    ids = set(ids)
+    links = through.objects.filter(**{f'{column}__in': ids})
+    if match == MATCH_ALL:
+        # (recipe_id, column) is unique in the through table, so a plain
+        # count per recipe equals the number of distinct ids matched.
+        matching = links.values('recipe_id').annotate(
+            matched=Count(column)
+        ).filter(matched=len(ids)).values('recipe_id')
+        return queryset.filter(id__in=matching)
+    return queryset.filter(Exists(links.filter(recipe_id=OuterRef('pk'))))
+
+
+def filter_assigned(queryset, through, column):
+    """Keep tags/ingredients linked to at least one recipe.
+
+    A correlated EXISTS stops at the first link instead of joining every
+    link row and collapsing the duplicates with DISTINCT.
+    """
+    links = through.objects.filter(**{column: OuterRef('pk')})
+    return queryset.filter(Exists(links))
+
+
+def annotate_recipe_counts(queryset):
+    """Annotate each tag/ingredient with the number of recipes using it.
+
+    Counted in one LEFT JOIN ... GROUP BY, so unassigned rows get 0 and
+    the most used come first.
+    """
+    return queryset.annotate(
+        recipe_count=Count('recipe')
+    ).order_by('-recipe_count', '-name')
@@ -0,0 +1,189 @@
+"""
+Derivative images (thumbnails, re-encodes) for recipe uploads.
+
+Pillow work runs in a process pool so request workers only pay for saving
+the original. Each derivative set ends with a manifest.json written last,
+which is what marks the set as ready.
+"""
+import json
+import logging
+import os
+import shutil
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+
+from PIL import Image, ImageOps, features
+
+from core.models import Recipe
+
+DERIVATIVE_SIZES = {
+    'thumb': 160,
+    'small': 320,
+    'medium': 800,
+}
+DERIVATIVE_FORMATS = {
+    'JPEG': 'jpg',
+    'WEBP': 'webp',
+}
+MANIFEST_NAME = 'manifest.json'
+
+DEFAULT_RECIPE_IMAGE_DERIVATIVES = {
+    'ASYNC': True,
+    'WORKERS': 2,
+}
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _derivative_settings():
+    """Return RECIPE_IMAGE_DERIVATIVES merged over the defaults."""
+    return {
+        **DEFAULT_RECIPE_IMAGE_DERIVATIVES,
+        **getattr(settings, 'RECIPE_IMAGE_DERIVATIVES', {}),
+    }
+
+
+def derivative_dir(image_name):
+    """Return the storage directory holding an image's derivatives."""
+    stem = os.path.splitext(os.path.basename(image_name))[0]
+    return os.path.join('uploads', 'recipe', 'derivatives', stem)
+
+
+def generate_derivatives(source_path, target_dir):
+    """Write resized, EXIF-free JPEG/WebP copies of an image.
+
+    Runs in a worker process: takes and returns plain paths only.
+    """
+    os.makedirs(target_dir, exist_ok=True)
+    formats = {
+        fmt: ext for fmt, ext in DERIVATIVE_FORMATS.items()
+        if fmt != 'WEBP' or features.check('webp')
+    }
+    manifest = {}
+    with Image.open(source_path) as original:
+        # Apply the orientation tag before the metadata is dropped.
+        image = ImageOps.exif_transpose(original).convert('RGB')
+
+    for label, size in DERIVATIVE_SIZES.items():
+        resized = image.copy()
+        resized.thumbnail((size, size))
+        manifest[label] = {}
+        for fmt, ext in formats.items():
+            name = f'{label}.{ext}'
+            # No exif= argument, so the re-encode carries no metadata.
+            resized.save(
+                os.path.join(target_dir, name), format=fmt, quality=85
+            )
+            manifest[label][ext] = name
+
+    tmp_path = os.path.join(target_dir, f'.{MANIFEST_NAME}.tmp')
+    with open(tmp_path, 'w') as manifest_file:
+        json.dump(manifest, manifest_file)
+    os.replace(tmp_path, os.path.join(target_dir, MANIFEST_NAME))
+    return manifest
+
+
+def get_executor():
+    """Return the shared process pool, creating it on first use."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=_derivative_settings()['WORKERS']
+            )
+        return _executor
+
+
+def _log_failure(source_path, future):
+    """Log a derivative job that raised; nothing else waits on it."""
+    if future.cancelled():
+        return
+    error = future.exception()
+    if error is not None:
+        logger.error(
+            'Derivative generation failed for %s', source_path,
+            exc_info=(type(error), error, error.__traceback__),
+        )
+
+
+def enqueue_derivatives(recipe):
+    """Schedule derivative generation once the upload is committed."""
+    if not recipe.image:
+        return
+    directory = derivative_dir(recipe.image.name)
+    if recipe.image.storage.exists(os.path.join(directory, MANIFEST_NAME)):
+        # Identical content was uploaded before and is already processed.
+        return
+    source_path = recipe.image.path
+    target_dir = recipe.image.storage.path(directory)
+
+    def submit():
+        if _derivative_settings()['ASYNC']:
+            future = get_executor().submit(
+                generate_derivatives, source_path, target_dir
+            )
+            future.add_done_callback(partial(_log_failure, source_path))
+        else:
+            generate_derivatives(source_path, target_dir)
+
+    transaction.on_commit(submit)
+
+
+def get_derivative_names(image):
+    """Return {label: {ext: storage name}} or None until ready."""
+    if not image:
+        return None
+    directory = derivative_dir(image.name)
+    manifest_name = os.path.join(directory, MANIFEST_NAME)
+    if not image.storage.exists(manifest_name):
+        return None
+    with image.storage.open(manifest_name) as manifest_file:
+        manifest = json.load(manifest_file)
+    return {
+        label: {
+            ext: os.path.join(directory, name) for ext, name in files.items()
+        }
+        for label, files in manifest.items()
+    }
+
+
+def release_image(name, storage):
+    """Delete an image and its derivatives once no recipe references it.
+
+    Files are shared by every recipe uploading the same content, so the
+    reference count is the number of recipes pointing at the name. The
+    check and the delete run under the storage lock for the name; see
+    ensure_image for the upload side.
+    """
+    if not name:
+        return
+    with storage.locked(name):
+        if Recipe.objects.filter(image=name).exists():
+            return
+        storage.delete(name)
+        directory = derivative_dir(name)
+        if storage.exists(directory):
+            shutil.rmtree(storage.path(directory), ignore_errors=True)
+
+
+def ensure_image(recipe, upload):
+    """Put back a deduplicated upload released before it was committed.
+
+    An upload matching an existing file reuses it, and a concurrent
+    release_image may count references before this recipe's row commits
+    and delete the file. Call after the row is committed: under the same
+    lock, either the release already saw the reference, or the file is
+    written again here.
+    """
+    storage = recipe.image.storage
+    name = recipe.image.name
+    with storage.locked(name):
+        if not storage.exists(name):
+            storage.restore(name, upload)
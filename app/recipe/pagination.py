@@ -0,0 +1,73 @@
+"""
+Pagination for recipe APIs.
+"""
+from rest_framework.pagination import CursorPagination, LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+SEARCH_QUERY_PARAM = 'search'
+
+
+class RankedOffsetPagination(LimitOffsetPagination):
+    """Offset pagination keeping the relevance order of search results.
+
+    Rank is not unique, so keyset pagination cannot seek on it. Pages are
+    fetched one row long to tell whether another follows, which skips the
+    COUNT query, and rendered in the shape of cursor pages.
+    """
+    default_limit = 50
+    limit_query_param = 'page_size'
+    max_limit = 500
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.limit = self.get_limit(request)
+        self.offset = self.get_offset(request)
+        rows = list(queryset[self.offset:self.offset + self.limit + 1])
+        self.has_next = len(rows) > self.limit
+        return rows[:self.limit]
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.limit_query_param, self.limit)
+        return replace_query_param(
+            url, self.offset_query_param, self.offset + self.limit
+        )
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+
+class RecipeCursorPagination(CursorPagination):
+    """Opt-in keyset pagination on recipe id.
+
+    Requests without `cursor` or `page_size` keep the unpaginated list.
+    Searches are paged with RankedOffsetPagination instead, since the
+    cursor ordering would replace their relevance order.
+    """
+    ordering = '-id'
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    ranked = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        params = request.query_params
+        if (self.cursor_query_param not in params and
+                self.page_size_query_param not in params):
+            return None
+        if params.get(SEARCH_QUERY_PARAM, '').strip():
+            self.ranked = RankedOffsetPagination()
+            return self.ranked.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.ranked is not None:
+            return self.ranked.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -0,0 +1,29 @@
+"""
+Renderers for recipe APIs.
+"""
+import json
+
+from rest_framework import renderers
+from rest_framework.utils.encoders import JSONEncoder
+
+
+def ndjson_lines(items):
+    """Encode items as newline-delimited JSON."""
+    return ''.join(
+        json.dumps(item, cls=JSONEncoder, ensure_ascii=False) + '\n'
+        for item in items
+    )
+
+
+class NDJSONRenderer(renderers.BaseRenderer):
+    """Render a list (or a single error body) as newline-delimited JSON."""
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if not isinstance(data, list):
+            data = [data]
+        return ndjson_lines(data).encode(self.charset)
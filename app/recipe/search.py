@@ -0,0 +1,222 @@
+"""
+Full-text recipe search with pluggable backends.
+
+PostgreSQL deployments search a weighted tsvector over title and
+description backed by a GIN expression index. Other backends (SQLite,
+tests) use an in-process inverted index kept current by model signals;
+it is meant for single-process deployments.
+"""
+import math
+import re
+import threading
+from collections import Counter, OrderedDict, defaultdict
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Case, IntegerField, When
+from django.utils.module_loading import import_string
+
+from core.models import Recipe
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+SEARCH_CONFIG = 'english'
+TITLE_WEIGHT = 2
+DESCRIPTION_WEIGHT = 1
+
+
+def tokenize(text):
+    """Split text into lowercase word tokens."""
+    return TOKEN_RE.findall((text or '').lower())
+
+
+def search_vector():
+    """Return the weighted tsvector expression indexed by migration 0010."""
+    from django.contrib.postgres.search import SearchVector
+
+    return (
+        SearchVector('title', weight='A', config=SEARCH_CONFIG) +
+        SearchVector('description', weight='B', config=SEARCH_CONFIG)
+    )
+
+
+class SearchBackend:
+    """Interface of recipe search backends."""
+
+    def search(self, queryset, query, user):
+        """Return user's queryset restricted to matches, best first."""
+        raise NotImplementedError
+
+    def update(self, recipe):
+        """Index a saved recipe."""
+
+    def remove(self, recipe):
+        """Drop a deleted recipe from the index."""
+
+    def invalidate(self, user_id):
+        """Forget indexed state of a user after a bulk write."""
+
+
+class PostgresSearchBackend(SearchBackend):
+    """Rank with ts_rank over the GIN indexed tsvector."""
+
+    def search(self, queryset, query, user):
+        from django.contrib.postgres.search import SearchQuery, SearchRank
+
+        vector = search_vector()
+        search_query = SearchQuery(
+            query, config=SEARCH_CONFIG, search_type='websearch'
+        )
+        return queryset.annotate(
+            search=vector,
+            rank=SearchRank(vector, search_query),
+        ).filter(search=search_query).order_by('-rank', '-id')
+
+
+class InMemorySearchBackend(SearchBackend):
+    """Per-user inverted index with TF-IDF ranking.
+
+    A user's postings are built from the database on their first search
+    and then updated incrementally as recipes are saved or deleted. Only
+    the max_users most recently searched users keep an index; the others
+    are rebuilt on their next search.
+    """
+
+    def __init__(self, max_users=256):
+        self.max_users = max_users
+        self._lock = threading.Lock()
+        self._users = OrderedDict()
+
+    def _store(self, user_id, index):
+        """Keep index for user_id unless one exists; evict the oldest.
+
+        Must be called with the lock held.
+        """
+        index = self._users.setdefault(user_id, index)
+        self._users.move_to_end(user_id)
+        while len(self._users) > self.max_users:
+            self._users.popitem(last=False)
+        return index
+
+    def _build(self, user_id):
+        postings = defaultdict(dict)
+        documents = {}
+        rows = Recipe.objects.filter(user_id=user_id).values_list(
+            'id', 'title', 'description'
+        )
+        for recipe_id, title, description in rows.iterator():
+            self._add(postings, documents, recipe_id, title, description)
+        return postings, documents
+
+    @staticmethod
+    def _add(postings, documents, recipe_id, title, description):
+        weights = Counter()
+        for token in tokenize(title):
+            weights[token] += TITLE_WEIGHT
+        for token in tokenize(description):
+            weights[token] += DESCRIPTION_WEIGHT
+        for token, weight in weights.items():
+            postings[token][recipe_id] = weight
+        documents[recipe_id] = tuple(weights)
+
+    @staticmethod
+    def _discard(postings, documents, recipe_id):
+        for token in documents.pop(recipe_id, ()):
+            posting = postings.get(token)
+            if posting is not None:
+                posting.pop(recipe_id, None)
+                if not posting:
+                    del postings[token]
+
+    def _index_for(self, user_id):
+        with self._lock:
+            index = self._users.get(user_id)
+            if index is not None:
+                self._users.move_to_end(user_id)
+        if index is None:
+            index = self._build(user_id)
+            with self._lock:
+                index = self._store(user_id, index)
+        return index
+
+    def add_document(self, user_id, recipe_id, title, description):
+        """Index a document directly (used by loaders and benchmarks)."""
+        with self._lock:
+            postings, documents = self._store(
+                user_id, (defaultdict(dict), {})
+            )
+            self._discard(postings, documents, recipe_id)
+            self._add(postings, documents, recipe_id, title, description)
+
+    def search_ids(self, user_id, query):
+        """Return all recipe ids containing every query token, best first."""
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            return []
+        postings, documents = self._index_for(user_id)
+        with self._lock:
+            lists = [postings.get(token, {}) for token in tokens]
+            if not all(lists):
+                return []
+            lists.sort(key=len)
+            total = len(documents)
+            scores = {}
+            candidates = set(lists[0]).intersection(*lists[1:])
+            for posting in lists:
+                idf = math.log(1 + total / len(posting))
+                for recipe_id in candidates:
+                    scores[recipe_id] = (
+                        scores.get(recipe_id, 0) + posting[recipe_id] * idf
+                    )
+        return sorted(scores, key=lambda rid: (-scores[rid], -rid))
+
+    def search(self, queryset, query, user):
+        ids = self.search_ids(user.pk, query)
+        if not ids:
+            return queryset.none()
+        rank = Case(
+            *[When(id=recipe_id, then=position)
+              for position, recipe_id in enumerate(ids)],
+            output_field=IntegerField(),
+        )
+        return queryset.filter(id__in=ids).order_by(rank)
+
+    def update(self, recipe):
+        with self._lock:
+            index = self._users.get(recipe.user_id)
+            if index is None:
+                return
+            self._discard(*index, recipe.pk)
+            self._add(*index, recipe.pk, recipe.title, recipe.description)
+
+    def remove(self, recipe):
+        with self._lock:
+            index = self._users.get(recipe.user_id)
+            if index is not None:
+                self._discard(*index, recipe.pk)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._users.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._users.clear()
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_search_backend():
+    """Return the configured backend, chosen by database vendor by default."""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            path = getattr(settings, 'RECIPE_SEARCH_BACKEND', None)
+            if path:
+                _backend = import_string(path)()
+            elif connection.vendor == 'postgresql':
+                _backend = PostgresSearchBackend()
+            else:
+                _backend = InMemorySearchBackend()
+        return _backend
@@ -1,6 +1,49 @@
 
+from functools import lru_cache
+
+from django.db import transaction
+from django.db.models import prefetch_related_objects
+from django.utils.translation import gettext as _
 from rest_framework import serializers
+from core.bulk import bulk_insert
 from core.models import Recipe, Tag, Ingredient
+from core.storage import check_image_limits
+from recipe.images import get_derivative_names
+from recipe.signals import recipes_bulk_written
+
+
+@lru_cache(maxsize=None)
+def get_query_plan(serializer_class, prefix=''):
+    """Return (select_related, prefetch_related) lookups for a serializer.
+
+    Nested serializers and related fields are walked recursively so the
+    viewset can load every relation the serializer renders up front.
+    """
+    select_related = []
+    prefetch_related = []
+    for field in serializer_class().fields.values():
+        if field.write_only or field.source == '*':
+            continue
+        lookup = prefix + field.source.replace('.', '__')
+
+        if isinstance(field, serializers.ListSerializer):
+            prefetch_related.append(lookup)
+            if isinstance(field.child, serializers.ModelSerializer):
+                nested = get_query_plan(type(field.child), f'{lookup}__')
+                prefetch_related.extend(nested[0] + nested[1])
+        elif isinstance(field, serializers.ManyRelatedField):
+            prefetch_related.append(lookup)
+        elif isinstance(field, serializers.ModelSerializer):
+            select_related.append(lookup)
+            nested = get_query_plan(type(field), f'{lookup}__')
+            select_related.extend(nested[0])
+            prefetch_related.extend(nested[1])
+        elif (isinstance(field, serializers.RelatedField) and
+              not isinstance(field, serializers.PrimaryKeyRelatedField)):
+            select_related.append(lookup)
+
+    return tuple(select_related), tuple(prefetch_related)
+
 
 class IngredientSerializer(serializers.ModelSerializer):
     """Serializer for ingredient"""
@@ -10,6 +53,14 @@ class IngredientSerializer(serializers.ModelSerializer):
         fields = ['id', 'name']
         read_only_field = ['id']
 
+class IngredientCountSerializer(IngredientSerializer):
+    """Serializer for ingredients annotated with their recipe count"""
+    recipe_count = serializers.IntegerField(read_only=True)
+
+    class Meta(IngredientSerializer.Meta):
+        fields = IngredientSerializer.Meta.fields + ['recipe_count']
+
+
 class TagSerializer(serializers.ModelSerializer):
     """Serializer for tags. """
 
@@ -19,6 +70,14 @@ class TagSerializer(serializers.ModelSerializer):
         read_only_field = ['id']
 
 
+class TagCountSerializer(TagSerializer):
+    """Serializer for tags annotated with their recipe count"""
+    recipe_count = serializers.IntegerField(read_only=True)
+
+    class Meta(TagSerializer.Meta):
+        fields = TagSerializer.Meta.fields + ['recipe_count']
+
+
 
 class RecipeSerializer(serializers.ModelSerializer):
     """Serializer for list recipe. """
@@ -33,25 +92,22 @@ class RecipeSerializer(serializers.ModelSerializer):
            ]
        read_only_field = ['id',]
     
-    def _get_or_created_tags(self, tags, recipe):
+    def _set_attrs(self, manager, items, model):
+        """Attach tags or ingredients by name with bulk queries."""
         auth_user = self.context['request'].user
-        for tag in tags:
-            tag_obj, created = Tag.objects.get_or_create(
-                user = auth_user,
-                **tag
-            )
-            
-            recipe.tags.add(tag_obj)
-    
+        objs = model.objects.get_or_create_many(
+            auth_user,
+            [item['name'] for item in items],
+        )
+        manager.add(*objs.values())
+
+    def _get_or_created_tags(self, tags, recipe):
+        self._set_attrs(recipe.tags, tags, Tag)
+
     def _get_or_create_ingredients(self, ingredients, recipe):
-        auth_user = self.context['request'].user
-        for ingredient in ingredients:
-            ingredient_obj, created = Ingredient.objects.get_or_create(
-                user=auth_user, 
-                **ingredient
-            )
-            recipe.ingredients.add(ingredient_obj)
+        self._set_attrs(recipe.ingredients, ingredients, Ingredient)
 
+    @transaction.atomic
     def create(self, validated_data):
         tags = validated_data.pop('tags', [])
         ingredient = validated_data.pop('ingredients', [])
@@ -60,7 +116,8 @@ class RecipeSerializer(serializers.ModelSerializer):
         self._get_or_create_ingredients(ingredient, recipe)
 
         return recipe
-    
+
+    @transaction.atomic
     def update(self, instance, validated_data):
         """update recipe"""
         tags = validated_data.pop('tags', None)
@@ -82,8 +139,138 @@ class RecipeSerializer(serializers.ModelSerializer):
 
 class RecipeDetailSerializer(RecipeSerializer):
     """Serializer for details recipe. """
+    image_derivatives = serializers.SerializerMethodField()
+
+    class Meta(RecipeSerializer.Meta):
+        fields = RecipeSerializer.Meta.fields + [
+            'description', 'image', 'image_derivatives'
+        ]
+        # Images are only written through upload-image, which enforces the
+        # size limits and keeps shared files' references counted.
+        read_only_fields = ['id', 'image']
+
+    def get_image_derivatives(self, obj):
+        """Return derivative URLs once they have been generated."""
+        names = get_derivative_names(obj.image)
+        if names is None:
+            return None
+        request = self.context.get('request')
+        urls = {}
+        for label, files in names.items():
+            urls[label] = {}
+            for ext, name in files.items():
+                url = obj.image.storage.url(name)
+                if request is not None:
+                    url = request.build_absolute_uri(url)
+                urls[label][ext] = url
+        return urls
+
+class RecipeBulkSerializer(serializers.ListSerializer):
+    """Create and update a batch of recipes with a fixed number of queries.
+
+    Items carrying an `id` update that recipe, the others are created.
+    Tag and ingredient names of the whole batch are resolved together and
+    all rows are written with bulk_create/bulk_update in one transaction.
+    """
+
+    def validate(self, attrs):
+        ids = [item['id'] for item in attrs if 'id' in item]
+        if len(ids) != len(set(ids)):
+            raise serializers.ValidationError(
+                _('Each recipe id may appear only once.')
+            )
+        owned = set(
+            Recipe.objects.filter(
+                user=self.context['request'].user, id__in=ids
+            ).values_list('id', flat=True)
+        )
+        unknown = sorted(set(ids) - owned)
+        if unknown:
+            raise serializers.ValidationError(
+                _('Unknown recipe ids: %(ids)s') % {'ids': unknown}
+            )
+        return attrs
+
+    @transaction.atomic
+    def create(self, validated_data):
+        user = self.context['request'].user
+        tags = Tag.objects.get_or_create_many(user, [
+            tag['name']
+            for item in validated_data for tag in item.get('tags', [])
+        ])
+        ingredients = Ingredient.objects.get_or_create_many(user, [
+            ingredient['name']
+            for item in validated_data
+            for ingredient in item.get('ingredients', [])
+        ])
+
+        fields = [
+            {key: value for key, value in item.items()
+             if key not in ('id', 'tags', 'ingredients')}
+            for item in validated_data
+        ]
+        existing = Recipe.objects.in_bulk(
+            [item['id'] for item in validated_data if 'id' in item]
+        )
+        recipes = []
+        new_recipes = []
+        changed_fields = set()
+        for item, attrs in zip(validated_data, fields):
+            if 'id' in item:
+                recipe = existing[item['id']]
+                changed_fields.update(attrs)
+            else:
+                recipe = Recipe(**attrs)
+                new_recipes.append(recipe)
+            for attr, value in attrs.items():
+                setattr(recipe, attr, value)
+            recipes.append(recipe)
+
+        bulk_insert(Recipe, new_recipes)
+        changed_fields.discard('user')
+        updated = [recipe for recipe in recipes if recipe.pk in existing]
+        if updated and changed_fields:
+            Recipe.objects.bulk_update(updated, sorted(changed_fields))
+
+        self._replace_attrs(
+            Recipe.tags, 'tag_id', tags, 'tags', recipes, validated_data
+        )
+        self._replace_attrs(
+            Recipe.ingredients, 'ingredient_id', ingredients, 'ingredients',
+            recipes, validated_data,
+        )
+        recipes_bulk_written(user.pk)
+
+        prefetch_related_objects(recipes, 'tags', 'ingredients')
+        return recipes
+
+    def _replace_attrs(self, descriptor, column, objs, key, recipes, items):
+        """Rewrite the M2M rows of recipes whose item carries `key`."""
+        through = descriptor.through
+        replaced = []
+        rows = {}
+        for recipe, item in zip(recipes, items):
+            if key not in item:
+                continue
+            replaced.append(recipe.pk)
+            for attr in item[key]:
+                pair = (recipe.pk, objs[attr['name']].pk)
+                rows[pair] = through(
+                    recipe_id=pair[0], **{column: pair[1]}
+                )
+        if replaced:
+            through.objects.filter(recipe_id__in=replaced).delete()
+        through.objects.bulk_create(rows.values())
+
+
+class RecipeBulkItemSerializer(RecipeSerializer):
+    """Serializer for one recipe of a bulk create/update. """
+    id = serializers.IntegerField(required=False)
+
     class Meta(RecipeSerializer.Meta):
-        fields = RecipeSerializer.Meta.fields + ['description', 'image']
+        fields = RecipeSerializer.Meta.fields + ['description']
+        list_serializer_class = RecipeBulkSerializer
+
 
 class RecipeImageSerializer(serializers.ModelSerializer):
     """Serializer for uploading image to recipes"""
@@ -94,6 +281,21 @@ class RecipeImageSerializer(serializers.ModelSerializer):
         read_only_field = ['id']
         extra_kwargs = {'image':{'required':'True'}}
 
-    
+    def validate_image(self, value):
+        """Enforce size and pixel limits before the image is decoded."""
+        check_image_limits(value)
+        return value
+
+
+class FacetCountSerializer(serializers.Serializer):
+    """Number of matching recipes using one tag or ingredient"""
+    id = serializers.IntegerField()
+    name = serializers.CharField()
+    count = serializers.IntegerField()
 
 
+class RecipeFacetsSerializer(serializers.Serializer):
+    """Facet counts of the recipes matching the current filters"""
+    recipes = serializers.IntegerField()
+    tags = FacetCountSerializer(many=True)
+    ingredients = FacetCountSerializer(many=True)
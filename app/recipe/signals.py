@@ -0,0 +1,83 @@
+"""
+Signal handlers reacting to recipe, tag and ingredient writes.
+"""
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from core.models import Recipe, Tag, Ingredient
+from recipe import versions
+from recipe.caching import response_cache
+from recipe.images import release_image
+from recipe.search import get_search_backend
+
+
+def collections_changed(user_id, *collections):
+    """Bump version stamps and evict cached payloads.
+
+    Bulk write paths that bypass model signals call this directly.
+    """
+    versions.bump(user_id, *collections)
+    for collection in collections:
+        response_cache.invalidate(user_id, collection)
+
+
+def recipes_bulk_written(user_id):
+    """Refresh derived state after a bulk write that bypassed signals."""
+    collections_changed(
+        user_id, versions.RECIPES, versions.TAGS, versions.INGREDIENTS
+    )
+    get_search_backend().invalidate(user_id)
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_saved(sender, instance, **kwargs):
+    collections_changed(instance.user_id, versions.RECIPES)
+    get_search_backend().update(instance)
+
+
+@receiver(post_delete, sender=Recipe)
+def release_recipe_image(sender, instance, **kwargs):
+    if instance.image:
+        image = instance.image
+        transaction.on_commit(
+            lambda: release_image(image.name, image.storage)
+        )
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_deleted(sender, instance, **kwargs):
+    # Cascaded through rows do not send m2m_changed.
+    collections_changed(
+        instance.user_id,
+        versions.RECIPES, versions.TAGS, versions.INGREDIENTS,
+    )
+    get_search_backend().remove(instance)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def tag_changed(sender, instance, **kwargs):
+    collections_changed(instance.user_id, versions.TAGS, versions.RECIPES)
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def ingredient_changed(sender, instance, **kwargs):
+    collections_changed(
+        instance.user_id, versions.INGREDIENTS, versions.RECIPES
+    )
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def recipe_tags_changed(sender, instance, action, **kwargs):
+    if action.startswith('post_'):
+        collections_changed(instance.user_id, versions.RECIPES, versions.TAGS)
+
+
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def recipe_ingredients_changed(sender, instance, action, **kwargs):
+    if action.startswith('post_'):
+        collections_changed(
+            instance.user_id, versions.RECIPES, versions.INGREDIENTS
+        )
@@ -0,0 +1,130 @@
+"""
+Tests for conditional GET on recipe APIs.
+"""
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag
+
+RECIPE_URL = reverse('recipe:recipe-list')
+TAGS_URL = reverse('recipe:tag-list')
+
+
+def create_recipe(user, **params):
+    """Create and return a sample recipe."""
+    defaults = {
+        'title': 'Sample recipe',
+        'time_minutes': 10,
+        'price': Decimal('5.00'),
+    }
+    defaults.update(params)
+    return Recipe.objects.create(user=user, **defaults)
+
+
+class ConditionalGetTests(TestCase):
+    """Test ETags and 304 responses."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            'user@example.com', 'testpass123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_list_not_modified(self):
+        """Test a matching If-None-Match is answered without queries."""
+        create_recipe(user=self.user)
+        res = self.client.get(RECIPE_URL)
+        etag = res['ETag']
+
+        with self.assertNumQueries(0):
+            res = self.client.get(RECIPE_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res['ETag'], etag)
+
+    def test_etag_changes_on_recipe_write(self):
+        """Test creating a recipe invalidates the list ETag."""
+        etag = self.client.get(RECIPE_URL)['ETag']
+
+        self.client.post(RECIPE_URL, {
+            'title': 'New', 'time_minutes': 5, 'price': '1.00',
+        })
+        res = self.client.get(RECIPE_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res['ETag'], etag)
+
+    def test_etag_read_before_commit_retired(self):
+        """Test an ETag handed out before a write commits is not reused."""
+        with self.captureOnCommitCallbacks(execute=True):
+            create_recipe(user=self.user)
+            etag = self.client.get(RECIPE_URL)['ETag']
+
+        res = self.client.get(RECIPE_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_etag_varies_by_query(self):
+        """Test filtered lists get their own ETag."""
+        tag = Tag.objects.create(user=self.user, name='vegan')
+
+        plain = self.client.get(RECIPE_URL)['ETag']
+        filtered = self.client.get(RECIPE_URL, {'tags': tag.id})['ETag']
+
+        self.assertNotEqual(plain, filtered)
+
+    def test_tag_rename_invalidates_recipes(self):
+        """Test renaming a tag changes the recipe list ETag."""
+        tag = Tag.objects.create(user=self.user, name='vegan')
+        create_recipe(user=self.user).tags.add(tag)
+        etag = self.client.get(RECIPE_URL)['ETag']
+
+        tag.name = 'vegetarian'
+        tag.save()
+        res = self.client.get(RECIPE_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_assignment_invalidates_tags(self):
+        """Test assigning a tag changes the tag list ETag."""
+        tag = Tag.objects.create(user=self.user, name='vegan')
+        recipe = create_recipe(user=self.user)
+        params = {'assigned_only': 1}
+        etag = self.client.get(TAGS_URL, params)['ETag']
+
+        recipe.tags.add(tag)
+        res = self.client.get(TAGS_URL, params, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data), 1)
+
+    def test_detail_not_modified(self):
+        """Test recipe detail supports conditional GET."""
+        recipe = create_recipe(user=self.user)
+        url = reverse('recipe:recipe-detail', args=[recipe.id])
+        etag = self.client.get(url)['ETag']
+
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_etags_isolated_per_user(self):
+        """Test another user's writes do not change the ETag."""
+        etag = self.client.get(RECIPE_URL)['ETag']
+        other = get_user_model().objects.create_user(
+            'other@example.com', 'testpass123'
+        )
+        create_recipe(user=other)
+
+        res = self.client.get(RECIPE_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
@@ -0,0 +1,123 @@
+"""
+Tests for the recipe facets API.
+"""
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Ingredient, Recipe, Tag
+
+FACETS_URL = reverse('recipe:recipe-facets')
+
+
+def create_recipe(user, **params):
+    """Create and return a sample recipe."""
+    defaults = {
+        'title': 'Sample recipe',
+        'time_minutes': 10,
+        'price': Decimal('5.00'),
+    }
+    defaults.update(params)
+    return Recipe.objects.create(user=user, **defaults)
+
+
+def counts(facets):
+    return {facet['name']: facet['count'] for facet in facets}
+
+
+class RecipeFacetsTests(TestCase):
+    """Test per-tag and per-ingredient counts."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            'user@example.com', 'testpass123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        self.vegan = Tag.objects.create(user=self.user, name='Vegan')
+        self.dinner = Tag.objects.create(user=self.user, name='Dinner')
+        self.rice = Ingredient.objects.create(user=self.user, name='Rice')
+        self.tofu = Ingredient.objects.create(user=self.user, name='Tofu')
+
+        r1 = create_recipe(self.user, title='Tofu rice')
+        r1.tags.add(self.vegan, self.dinner)
+        r1.ingredients.add(self.rice, self.tofu)
+        r2 = create_recipe(self.user, title='Plain rice')
+        r2.tags.add(self.vegan)
+        r2.ingredients.add(self.rice)
+        create_recipe(self.user, title='Untagged')
+
+    def test_facets_unfiltered(self):
+        """Test counts cover all of the user's recipes."""
+        res = self.client.get(FACETS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['recipes'], 3)
+        self.assertEqual(res.data['tags'], [
+            {'id': self.vegan.id, 'name': 'Vegan', 'count': 2},
+            {'id': self.dinner.id, 'name': 'Dinner', 'count': 1},
+        ])
+        self.assertEqual(counts(res.data['ingredients']),
+                         {'Rice': 2, 'Tofu': 1})
+
+    def test_facets_follow_filters(self):
+        """Test counts are restricted to the filtered recipes."""
+        res = self.client.get(FACETS_URL, {'tags': f'{self.dinner.id}'})
+
+        self.assertEqual(res.data['recipes'], 1)
+        self.assertEqual(counts(res.data['tags']),
+                         {'Vegan': 1, 'Dinner': 1})
+        self.assertEqual(counts(res.data['ingredients']),
+                         {'Rice': 1, 'Tofu': 1})
+
+    def test_facets_limited_to_user(self):
+        """Test other users' recipes are not counted."""
+        other = get_user_model().objects.create_user(
+            'other@example.com', 'testpass123'
+        )
+        recipe = create_recipe(other)
+        recipe.tags.add(Tag.objects.create(user=other, name='Vegan'))
+
+        res = self.client.get(FACETS_URL)
+
+        self.assertEqual(res.data['recipes'], 3)
+        self.assertEqual(counts(res.data['tags']),
+                         {'Vegan': 2, 'Dinner': 1})
+
+    def test_facets_cached(self):
+        """Test a repeated request is served from the cache."""
+        self.client.get(FACETS_URL)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(FACETS_URL)
+
+        self.assertEqual(res.data['recipes'], 3)
+
+    def test_facets_invalidated_on_write(self):
+        """Test writes are reflected in the next response."""
+        self.client.get(FACETS_URL)
+        recipe = create_recipe(self.user, title='Tofu bowl')
+        recipe.tags.add(self.dinner)
+        self.tofu.name = 'Silken tofu'
+        self.tofu.save()
+
+        res = self.client.get(FACETS_URL)
+
+        self.assertEqual(res.data['recipes'], 4)
+        self.assertEqual(counts(res.data['tags']),
+                         {'Vegan': 2, 'Dinner': 2})
+        self.assertIn('Silken tofu', counts(res.data['ingredients']))
+
+    def test_facets_invalid_match(self):
+        """Test an unknown match mode is rejected."""
+        res = self.client.get(FACETS_URL, {'match': 'some'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -141,5 +141,25 @@ class PrivateIngredientApiTest(TestCase):
 
         self.assertEqual(len(res.data), 1)
 
+    def test_list_ingredients_with_counts(self):
+        """Test with_counts annotates recipe counts, most used first"""
+        salt = Ingredient.objects.create(user=self.user, name='salt')
+        Ingredient.objects.create(user=self.user, name='saffron')
+        for title in ('Rice', 'Soup'):
+            recipe = Recipe.objects.create(
+                user=self.user,
+                title=title,
+                price=Decimal('5.00'),
+                time_minutes=20,
+            )
+            recipe.ingredients.add(salt)
+
+        res = self.client.get(INGREDIENT_URL, {'with_counts': 1})
 
-      
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(i['name'], i['recipe_count']) for i in res.data],
+            [('salt', 2), ('saffron', 0)],
+        )
+        res = self.client.get(INGREDIENT_URL)
+        self.assertNotIn('recipe_count', res.data[0])
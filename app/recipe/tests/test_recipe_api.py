@@ -1,16 +1,22 @@
 """
 Tests for recipe APIs.
 """
+import json
+from concurrent.futures import Future
 from decimal import Decimal
+from unittest.mock import patch
 
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.db import DatabaseError, connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from rest_framework import status
 from rest_framework.test import APIClient
 
 import os
+import shutil
 import tempfile
 
 from PIL import Image
@@ -21,12 +27,18 @@ from core.models import (
     Ingredient,
 )
 
+from core.tests.utils import QueryBudgetMixin
+
+from recipe.images import _log_failure, derivative_dir
 from recipe.serializers import (
     RecipeSerializer,
     RecipeDetailSerializer,
+    get_query_plan,
 )
 
 RECIPE_URL = reverse('recipe:recipe-list')
+BULK_URL = reverse('recipe:recipe-bulk')
+EXPORT_URL = reverse('recipe:recipe-export')
 
 def create_recipe(user, **params):
     """Create and return a sample recipe. """
@@ -68,7 +80,7 @@ class PublicRecipeAPITests(TestCase):
         
 
 
-class PrivateRecipeAPITests(TestCase):
+class PrivateRecipeAPITests(QueryBudgetMixin, TestCase):
     """Test authenticated API requests. """
     
     def setUp(self):
@@ -392,6 +404,59 @@ class PrivateRecipeAPITests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(recipe.ingredients.count(), 0)
 
+    def test_create_recipe_queries_independent_of_tag_count(self):
+        """Test tags and ingredients are resolved in bulk. """
+        def create_with(count):
+            payload = {
+                'title': f'recipe {count}',
+                'time_minutes': 10,
+                'price': Decimal('2.50'),
+                'tags': [{'name': f'tag {i}'} for i in range(count)],
+                'ingredients': [
+                    {'name': f'ing {i}'} for i in range(count)
+                ],
+            }
+            with CaptureQueriesContext(connection) as context:
+                res = self.client.post(RECIPE_URL, payload, format='json')
+            self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+            return len(context)
+
+        self.assertEqual(create_with(1), create_with(20))
+
+    def test_create_recipe_reuses_existing_and_duplicate_names(self):
+        """Test repeated names resolve to a single tag. """
+        Tag.objects.create(user=self.user, name='Dinner')
+        payload = {
+            'title': 'Kabab',
+            'time_minutes': 40,
+            'price': Decimal('7.00'),
+            'tags': [{'name': 'Dinner'}, {'name': 'Grill'}, {'name': 'Grill'}],
+        }
+        res = self.client.post(RECIPE_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 2)
+        recipe = Recipe.objects.get(id=res.data['id'])
+        self.assertEqual(recipe.tags.count(), 2)
+
+    @patch('recipe.serializers.RecipeSerializer._get_or_create_ingredients')
+    def test_create_recipe_is_atomic(self, patched_ingredients):
+        """Test a failure while adding ingredients rolls back the recipe. """
+        patched_ingredients.side_effect = DatabaseError
+        payload = {
+            'title': 'Half written',
+            'time_minutes': 5,
+            'price': Decimal('1.00'),
+            'tags': [{'name': 'Lunch'}],
+            'ingredients': [{'name': 'salt'}],
+        }
+
+        with self.assertRaises(DatabaseError):
+            self.client.post(RECIPE_URL, payload, format='json')
+
+        self.assertFalse(Recipe.objects.filter(user=self.user).exists())
+        self.assertFalse(Tag.objects.filter(user=self.user).exists())
+
     def test_filter_by_tags(self):
         """Test filtering recipes by tags. """
         r1 = create_recipe(user=self.user, title='thai')
@@ -432,6 +497,312 @@ class PrivateRecipeAPITests(TestCase):
         self.assertIn(s2.data, res.data)
         self.assertNotIn(s3.data, res.data)
 
+    def test_filter_by_tags_no_duplicates(self):
+        """Test a recipe matching several tags is listed once. """
+        recipe = create_recipe(user=self.user)
+        tag1 = Tag.objects.create(user=self.user, name='vegan')
+        tag2 = Tag.objects.create(user=self.user, name='quick')
+        recipe.tags.add(tag1, tag2)
+
+        res = self.client.get(RECIPE_URL, {'tags': f'{tag1.id},{tag2.id}'})
+
+        self.assertEqual([r['id'] for r in res.data], [recipe.id])
+
+    def test_filter_by_all_tags(self):
+        """Test match=all keeps recipes having every tag. """
+        tag1 = Tag.objects.create(user=self.user, name='vegan')
+        tag2 = Tag.objects.create(user=self.user, name='quick')
+        both = create_recipe(user=self.user, title='both')
+        both.tags.add(tag1, tag2)
+        one = create_recipe(user=self.user, title='one')
+        one.tags.add(tag1)
+        params = {'tags': f'{tag1.id},{tag2.id}'}
+
+        res_all = self.client.get(RECIPE_URL, {**params, 'match': 'all'})
+        res_any = self.client.get(RECIPE_URL, params)
+
+        self.assertEqual([r['id'] for r in res_all.data], [both.id])
+        self.assertEqual(
+            [r['id'] for r in res_any.data], [one.id, both.id]
+        )
+
+    def test_filter_by_all_ingredients_and_tags(self):
+        """Test match=all applies to tags and ingredients together. """
+        tag = Tag.objects.create(user=self.user, name='vegan')
+        ing1 = Ingredient.objects.create(user=self.user, name='rice')
+        ing2 = Ingredient.objects.create(user=self.user, name='beans')
+        match = create_recipe(user=self.user)
+        match.tags.add(tag)
+        match.ingredients.add(ing1, ing2)
+        partial = create_recipe(user=self.user)
+        partial.tags.add(tag)
+        partial.ingredients.add(ing1)
+
+        res = self.client.get(RECIPE_URL, {
+            'tags': tag.id,
+            'ingredients': f'{ing1.id},{ing2.id}',
+            'match': 'all',
+        })
+
+        self.assertEqual([r['id'] for r in res.data], [match.id])
+
+    def test_filter_invalid_match(self):
+        """Test an unknown match mode is rejected. """
+        res = self.client.get(RECIPE_URL, {'tags': '1', 'match': 'some'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_filter_invalid_ids(self):
+        """Test non-integer tag and ingredient ids are rejected. """
+        for params in ({'tags': 'abc'}, {'ingredients': '1,x'}):
+            res = self.client.get(RECIPE_URL, params)
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn(next(iter(params)), res.data)
+
+    def test_query_plan_from_serializer(self):
+        """Test nested serializers are planned as prefetches. """
+        self.assertEqual(
+            get_query_plan(RecipeSerializer),
+            ((), ('tags', 'ingredients')),
+        )
+        self.assertEqual(
+            get_query_plan(RecipeDetailSerializer),
+            ((), ('tags', 'ingredients')),
+        )
+
+    def test_list_recipes_query_budget(self):
+        """Test listing recipes runs a constant number of queries. """
+        for i in range(5):
+            recipe = create_recipe(user=self.user, title=f'recipe {i}')
+            recipe.tags.add(
+                Tag.objects.create(user=self.user, name=f'tag {i}')
+            )
+            recipe.ingredients.add(
+                Ingredient.objects.create(user=self.user, name=f'ing {i}')
+            )
+
+        with self.assertMaxQueries(3):
+            res = self.client.get(RECIPE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data), 5)
+        self.assertEqual(len(res.data[0]['tags']), 1)
+
+    def test_retrieve_recipe_query_budget(self):
+        """Test retrieving a recipe prefetches tags and ingredients. """
+        recipe = create_recipe(user=self.user)
+        recipe.tags.add(Tag.objects.create(user=self.user, name='vegan'))
+        recipe.ingredients.add(
+            Ingredient.objects.create(user=self.user, name='salt')
+        )
+
+        with self.assertMaxQueries(3):
+            res = self.client.get(detail_url(recipe.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['tags'][0]['name'], 'vegan')
+
+    def test_list_unpaginated_by_default(self):
+        """Test the recipe list stays a plain list without opting in. """
+        create_recipe(user=self.user)
+
+        res = self.client.get(RECIPE_URL)
+
+        self.assertIsInstance(res.data, list)
+
+    def test_cursor_pagination(self):
+        """Test walking recipes with opaque cursors. """
+        recipes = [
+            create_recipe(user=self.user, title=f'recipe {i}')
+            for i in range(5)
+        ]
+        expected = [recipe.id for recipe in reversed(recipes)]
+
+        res = self.client.get(RECIPE_URL, {'page_size': 2})
+        ids = [item['id'] for item in res.data['results']]
+        self.assertIsNone(res.data['previous'])
+        while res.data['next']:
+            res = self.client.get(res.data['next'])
+            ids.extend(item['id'] for item in res.data['results'])
+
+        self.assertEqual(ids, expected)
+        self.assertIsNotNone(res.data['previous'])
+
+    def test_cursor_pagination_with_filters(self):
+        """Test cursor pagination applies on top of tag filters. """
+        tag = Tag.objects.create(user=self.user, name='vegan')
+        tagged = []
+        for i in range(4):
+            recipe = create_recipe(user=self.user, title=f'recipe {i}')
+            if i % 2:
+                recipe.tags.add(tag)
+                tagged.append(recipe.id)
+
+        res = self.client.get(RECIPE_URL, {'page_size': 1, 'tags': tag.id})
+        ids = [item['id'] for item in res.data['results']]
+        res = self.client.get(res.data['next'])
+        ids.extend(item['id'] for item in res.data['results'])
+
+        self.assertEqual(ids, sorted(tagged, reverse=True))
+        self.assertIsNone(res.data['next'])
+
+    def test_cursor_page_query_budget(self):
+        """Test a page costs the same queries at any depth. """
+        for i in range(6):
+            create_recipe(user=self.user, title=f'recipe {i}')
+
+        res = self.client.get(RECIPE_URL, {'page_size': 2})
+        res = self.client.get(res.data['next'])
+        with self.assertMaxQueries(3):
+            res = self.client.get(res.data['next'])
+
+        self.assertEqual(len(res.data['results']), 2)
+
+    def test_bulk_create_recipes(self):
+        """Test creating recipes in bulk with shared tag names. """
+        Tag.objects.create(user=self.user, name='Dinner')
+        payload = [
+            {
+                'title': 'Ghormeh sabzi',
+                'time_minutes': 120,
+                'price': '9.50',
+                'tags': [{'name': 'Dinner'}, {'name': 'Persian'}],
+                'ingredients': [{'name': 'herbs'}],
+            },
+            {
+                'title': 'Kashk bademjan',
+                'time_minutes': 60,
+                'price': '6.00',
+                'tags': [{'name': 'Persian'}],
+            },
+        ]
+
+        res = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([r['status'] for r in res.data], ['created'] * 2)
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 2)
+        recipe = Recipe.objects.get(id=res.data[0]['recipe']['id'])
+        self.assertEqual(recipe.user, self.user)
+        self.assertEqual(
+            sorted(tag.name for tag in recipe.tags.all()),
+            ['Dinner', 'Persian'],
+        )
+        self.assertEqual(recipe.ingredients.get().name, 'herbs')
+
+    def test_bulk_update_recipes(self):
+        """Test items with an id update the existing recipe. """
+        recipe = create_recipe(user=self.user, title='Old')
+        recipe.tags.add(Tag.objects.create(user=self.user, name='Lunch'))
+        payload = [
+            {'id': recipe.id, 'title': 'New', 'time_minutes': 5,
+             'price': '1.00', 'tags': [{'name': 'Dinner'}]},
+            {'title': 'Another', 'time_minutes': 5, 'price': '2.00'},
+        ]
+
+        res = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data[0]['status'], 'updated')
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.title, 'New')
+        self.assertEqual([t.name for t in recipe.tags.all()], ['Dinner'])
+        self.assertEqual(Recipe.objects.filter(user=self.user).count(), 2)
+
+    def test_bulk_invalid_item_writes_nothing(self):
+        """Test one invalid item rejects the whole batch. """
+        payload = [
+            {'title': 'Valid', 'time_minutes': 5, 'price': '1.00'},
+            {'title': 'Missing price', 'time_minutes': 5},
+        ]
+
+        res = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data[0], {})
+        self.assertIn('price', res.data[1])
+        self.assertFalse(Recipe.objects.filter(user=self.user).exists())
+
+    def test_bulk_update_other_users_recipe_error(self):
+        """Test bulk updates cannot touch another user's recipe. """
+        other = create_user(email='other2@example.com', password='pass123')
+        recipe = create_recipe(user=other, title='Theirs')
+        payload = [{'id': recipe.id, 'title': 'Mine', 'time_minutes': 1,
+                    'price': '1.00'}]
+
+        res = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.title, 'Theirs')
+
+    def test_bulk_queries_independent_of_batch_size(self):
+        """Test the batch is written with a fixed number of queries. """
+        def bulk_with(count):
+            payload = [
+                {
+                    'title': f'recipe {i}',
+                    'time_minutes': 5,
+                    'price': '1.00',
+                    'tags': [{'name': f'tag {i}'}, {'name': 'shared'}],
+                    'ingredients': [{'name': f'ing {i}'}],
+                }
+                for i in range(count)
+            ]
+            with CaptureQueriesContext(connection) as context:
+                res = self.client.post(BULK_URL, payload, format='json')
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            return len(context)
+
+        if not connection.features.can_return_rows_from_bulk_insert:
+            self.skipTest('Backend cannot return bulk inserted ids.')
+        self.assertEqual(bulk_with(2), bulk_with(25))
+
+    def _export(self, **params):
+        res = self.client.get(EXPORT_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], 'application/x-ndjson')
+        content = b''.join(res.streaming_content).decode()
+        return [json.loads(line) for line in content.splitlines()]
+
+    def test_export_ndjson(self):
+        """Test exporting recipes as newline-delimited JSON. """
+        r1 = create_recipe(user=self.user, title='first')
+        r2 = create_recipe(user=self.user, title='second')
+        r2.tags.add(Tag.objects.create(user=self.user, name='vegan'))
+        other = create_user(email='other3@example.com', password='pass123')
+        create_recipe(user=other)
+
+        lines = self._export()
+
+        self.assertEqual([line['id'] for line in lines], [r2.id, r1.id])
+        self.assertEqual(lines[0]['tags'][0]['name'], 'vegan')
+        self.assertEqual(lines[1]['description'], r1.description)
+
+    def test_export_applies_filters(self):
+        """Test the export honours the tag filter. """
+        tag = Tag.objects.create(user=self.user, name='vegan')
+        tagged = create_recipe(user=self.user)
+        tagged.tags.add(tag)
+        create_recipe(user=self.user)
+
+        lines = self._export(tags=tag.id)
+
+        self.assertEqual([line['id'] for line in lines], [tagged.id])
+
+    @override_settings(RECIPE_EXPORT_CHUNK_SIZE=2)
+    def test_export_prefetches_per_chunk(self):
+        """Test relations are loaded once per chunk, not per recipe. """
+        for i in range(4):
+            recipe = create_recipe(user=self.user, title=f'recipe {i}')
+            recipe.tags.add(Tag.objects.create(user=self.user, name=f't{i}'))
+
+        with self.assertMaxQueries(1 + 2 * 2):
+            lines = self._export()
+
+        self.assertEqual(len(lines), 4)
+
 
 class ImageUploadTest(TestCase):
     """Tests for the image upload API."""
@@ -460,6 +831,118 @@ class ImageUploadTest(TestCase):
         self.assertIn('image' , res.data)
         self.assertTrue(os.path.exists(self.recipe.image.path))
     
+    def test_image_not_writable_through_detail(self):
+        """Test PATCH on the recipe cannot bypass upload-image."""
+        with tempfile.NamedTemporaryFile(suffix='.jpg') as image_file:
+            Image.new('RGB', (10, 10)).save(image_file, format='JPEG')
+            image_file.seek(0)
+            res = self.client.patch(
+                detail_url(self.recipe.id), {'image': image_file},
+                format='multipart',
+            )
+
+        self.recipe.refresh_from_db()
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertFalse(self.recipe.image)
+
+    @override_settings(RECIPE_IMAGE_DERIVATIVES={'ASYNC': False})
+    def test_upload_image_generates_derivatives(self):
+        """Test derivatives are built and exposed on the detail view."""
+        url = image_uploads_url(self.recipe.id)
+        with tempfile.NamedTemporaryFile(suffix='.jpg') as image_file:
+            img = Image.new('RGB', (1000, 500))
+            exif = Image.Exif()
+            exif[0x010F] = 'Camera maker'
+            img.save(image_file, format='JPEG', exif=exif.tobytes())
+            image_file.seek(0)
+            with self.captureOnCommitCallbacks(execute=True):
+                res = self.client.post(
+                    url, {'image': image_file}, format='multipart'
+                )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.recipe.refresh_from_db()
+        directory = self.recipe.image.storage.path(
+            derivative_dir(self.recipe.image.name)
+        )
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+
+        res = self.client.get(detail_url(self.recipe.id))
+
+        thumb_url = res.data['image_derivatives']['thumb']['jpg']
+        self.assertTrue(thumb_url.endswith('thumb.jpg'))
+        with Image.open(os.path.join(directory, 'thumb.jpg')) as thumb:
+            self.assertEqual(thumb.size, (160, 80))
+            self.assertEqual(len(thumb.getexif()), 0)
+
+    def test_failed_derivatives_logged(self):
+        """Test errors raised in the process pool are logged."""
+        future = Future()
+        future.set_exception(OSError('cannot identify image file'))
+
+        with self.assertLogs('recipe.images', 'ERROR') as logs:
+            _log_failure('/media/source.jpg', future)
+
+        self.assertIn('failed for /media/source.jpg', logs.output[0])
+        self.assertIn('cannot identify image file', logs.output[0])
+
+    def test_derivatives_pending(self):
+        """Test derivatives are null until generated."""
+        res = self.client.get(detail_url(self.recipe.id))
+
+        self.assertIsNone(res.data['image_derivatives'])
+
+    def _upload(self, recipe, color):
+        url = image_uploads_url(recipe.id)
+        with tempfile.NamedTemporaryFile(suffix='.jpg') as image_file:
+            Image.new('RGB', (10, 10), color).save(image_file, format='JPEG')
+            image_file.seek(0)
+            return self.client.post(
+                url, {'image': image_file}, format='multipart'
+            )
+
+    def test_identical_uploads_share_file(self):
+        """Test the same content uploaded twice is stored once."""
+        other = create_recipe(user=self.user)
+
+        self._upload(self.recipe, 'red')
+        self._upload(other, 'red')
+
+        self.recipe.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual(self.recipe.image.name, other.image.name)
+
+    def test_replaced_image_released(self):
+        """Test an unreferenced image is deleted when replaced."""
+        self._upload(self.recipe, 'red')
+        self.recipe.refresh_from_db()
+        old_path = self.recipe.image.path
+
+        self._upload(self.recipe, 'blue')
+
+        self.recipe.refresh_from_db()
+        self.assertFalse(os.path.exists(old_path))
+        self.assertTrue(os.path.exists(self.recipe.image.path))
+
+    def test_shared_image_kept_while_referenced(self):
+        """Test a replaced image survives while another recipe uses it."""
+        other = create_recipe(user=self.user)
+        self._upload(self.recipe, 'red')
+        self._upload(other, 'red')
+        self.recipe.refresh_from_db()
+        shared_path = self.recipe.image.path
+
+        self._upload(self.recipe, 'blue')
+
+        self.assertTrue(os.path.exists(shared_path))
+        other.image.delete()
+
+    @override_settings(RECIPE_IMAGE_MAX_PIXELS=50)
+    def test_upload_image_too_many_pixels(self):
+        """Test images over the pixel limit are rejected."""
+        res = self._upload(self.recipe, 'red')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_upload_image_bad_request(self):
         """Test uploading invalid image"""
         url = image_uploads_url(self.recipe.id)
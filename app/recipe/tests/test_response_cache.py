@@ -0,0 +1,108 @@
+"""
+Tests for the tag and ingredient response cache.
+"""
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag, Ingredient
+
+from recipe.caching import ResponseCache, response_cache
+
+TAGS_URL = reverse('recipe:tag-list')
+INGREDIENTS_URL = reverse('recipe:ingredient-list')
+
+
+class ResponseCacheTests(SimpleTestCase):
+    """Test the LRU payload store."""
+
+    @override_settings(RESPONSE_CACHE={'MAX_ENTRIES': 10, 'MAX_BYTES': 10})
+    def test_evicts_by_size(self):
+        """Test the least recently used payload is evicted first."""
+        store = ResponseCache()
+        store.set('a', (1, 'tags'), b'1234', 'application/json')
+        store.set('b', (1, 'tags'), b'1234', 'application/json')
+        store.get('a')
+        store.set('c', (2, 'tags'), b'1234', 'application/json')
+
+        self.assertIsNotNone(store.get('a'))
+        self.assertIsNone(store.get('b'))
+        self.assertEqual(store.size, 8)
+
+    def test_invalidate_owner(self):
+        """Test invalidation drops only the owner's payloads."""
+        store = ResponseCache()
+        store.set('a', (1, 'tags'), b'x', 'application/json')
+        store.set('b', (1, 'ingredients'), b'x', 'application/json')
+        store.set('c', (2, 'tags'), b'x', 'application/json')
+
+        store.invalidate(1, 'tags')
+
+        self.assertIsNone(store.get('a'))
+        self.assertIsNotNone(store.get('b'))
+        self.assertIsNotNone(store.get('c'))
+
+
+class CachedListTests(TestCase):
+    """Test list endpoints are served from the cache."""
+
+    def setUp(self):
+        cache.clear()
+        response_cache.clear()
+        self.user = get_user_model().objects.create_user(
+            'user@example.com', 'testpass123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_second_list_served_from_cache(self):
+        """Test a repeated list does not query the database."""
+        Tag.objects.create(user=self.user, name='vegan')
+        first = self.client.get(TAGS_URL)
+
+        with self.assertNumQueries(0):
+            second = self.client.get(TAGS_URL)
+
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.content, first.content)
+
+    def test_query_params_cached_separately(self):
+        """Test assigned_only results are cached under their own key."""
+        Tag.objects.create(user=self.user, name='vegan')
+        self.client.get(TAGS_URL)
+
+        res = self.client.get(TAGS_URL, {'assigned_only': 1})
+
+        self.assertEqual(res.json(), [])
+
+    def test_write_invalidates(self):
+        """Test creating an ingredient evicts the cached list."""
+        self.client.get(INGREDIENTS_URL)
+
+        Ingredient.objects.create(user=self.user, name='salt')
+        res = self.client.get(INGREDIENTS_URL)
+
+        self.assertEqual(len(res.json()), 1)
+
+    def test_recipe_assignment_invalidates(self):
+        """Test changing the recipe M2M evicts assigned_only payloads."""
+        tag = Tag.objects.create(user=self.user, name='vegan')
+        recipe = Recipe.objects.create(
+            user=self.user,
+            title='Salad',
+            time_minutes=5,
+            price=Decimal('2.00'),
+        )
+        params = {'assigned_only': 1}
+        self.client.get(TAGS_URL, params)
+
+        recipe.tags.add(tag)
+        res = self.client.get(TAGS_URL, params)
+
+        self.assertEqual(len(res.json()), 1)
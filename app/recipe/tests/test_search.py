@@ -0,0 +1,152 @@
+"""
+Tests for recipe search.
+"""
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe
+
+from recipe.search import InMemorySearchBackend, get_search_backend, tokenize
+
+RECIPE_URL = reverse('recipe:recipe-list')
+
+
+def create_recipe(user, title, description=''):
+    """Create and return a recipe."""
+    return Recipe.objects.create(
+        user=user,
+        title=title,
+        description=description,
+        time_minutes=10,
+        price=Decimal('1.00'),
+    )
+
+
+class InMemorySearchBackendTests(TestCase):
+    """Test the in-process inverted index."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'search@example.com', 'testpass123'
+        )
+        self.backend = InMemorySearchBackend()
+
+    def test_tokenize(self):
+        """Test text is split into lowercase words."""
+        self.assertEqual(tokenize('Chicken, Rice & BEANS'),
+                         ['chicken', 'rice', 'beans'])
+
+    def test_title_matches_rank_first(self):
+        """Test title matches outrank description matches."""
+        in_description = create_recipe(
+            self.user, 'Stew', 'slow cooked with lemon'
+        )
+        in_title = create_recipe(self.user, 'Lemon tart')
+
+        ids = self.backend.search_ids(self.user.pk, 'lemon')
+
+        self.assertEqual(ids, [in_title.id, in_description.id])
+
+    def test_all_terms_required(self):
+        """Test every query word must appear."""
+        both = create_recipe(self.user, 'Chicken rice')
+        create_recipe(self.user, 'Chicken soup')
+
+        self.assertEqual(
+            self.backend.search_ids(self.user.pk, 'rice chicken'), [both.id]
+        )
+
+    def test_incremental_updates(self):
+        """Test saved and deleted recipes update a built index."""
+        recipe = create_recipe(self.user, 'Pasta')
+        self.assertEqual(self.backend.search_ids(self.user.pk, 'pasta'),
+                         [recipe.id])
+
+        recipe.title = 'Noodles'
+        self.backend.update(recipe)
+        self.assertEqual(self.backend.search_ids(self.user.pk, 'pasta'), [])
+        self.assertEqual(self.backend.search_ids(self.user.pk, 'noodles'),
+                         [recipe.id])
+
+        self.backend.remove(recipe)
+        self.assertEqual(self.backend.search_ids(self.user.pk, 'noodles'),
+                         [])
+
+    def test_least_recent_index_evicted(self):
+        """Test only max_users indexes are kept."""
+        backend = InMemorySearchBackend(max_users=2)
+        backend.add_document(1, 1, 'Pasta', '')
+        backend.add_document(2, 2, 'Pasta', '')
+        backend.search_ids(1, 'pasta')
+        backend.add_document(3, 3, 'Pasta', '')
+
+        self.assertEqual(list(backend._users), [1, 3])
+
+
+class SearchAPITests(TestCase):
+    """Test the search query parameter."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'user@example.com', 'testpass123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        backend = get_search_backend()
+        if hasattr(backend, 'clear'):
+            backend.clear()
+
+    def test_search_recipes(self):
+        """Test searching filters and ranks recipes."""
+        soup = create_recipe(self.user, 'Tomato soup', 'warm tomato soup')
+        salad = create_recipe(self.user, 'Salad', 'with tomato')
+        create_recipe(self.user, 'Pancakes')
+
+        res = self.client.get(RECIPE_URL, {'search': 'tomato'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([r['id'] for r in res.data], [soup.id, salad.id])
+
+    def test_search_paginated_by_rank(self):
+        """Test pages of search results keep the relevance order."""
+        soup = create_recipe(self.user, 'Tomato soup', 'warm tomato soup')
+        salad = create_recipe(self.user, 'Salad', 'with tomato')
+        stew = create_recipe(self.user, 'Stew', 'a tomato')
+
+        res = self.client.get(RECIPE_URL, {'search': 'tomato', 'page_size': 2})
+        ids = [r['id'] for r in res.data['results']]
+        self.assertIsNone(res.data['previous'])
+        res = self.client.get(res.data['next'])
+        ids.extend(r['id'] for r in res.data['results'])
+
+        self.assertEqual(ids, [soup.id, stew.id, salad.id])
+        self.assertIsNone(res.data['next'])
+        self.assertIsNotNone(res.data['previous'])
+
+    def test_search_limited_to_user(self):
+        """Test other users' recipes are never returned."""
+        other = get_user_model().objects.create_user(
+            'other@example.com', 'testpass123'
+        )
+        create_recipe(other, 'Tomato soup')
+
+        res = self.client.get(RECIPE_URL, {'search': 'tomato'})
+
+        self.assertEqual(res.data, [])
+
+    def test_search_sees_new_recipes(self):
+        """Test recipes created after a search are found."""
+        self.client.get(RECIPE_URL, {'search': 'curry'})
+        self.client.post(RECIPE_URL, {
+            'title': 'Green curry', 'time_minutes': 30, 'price': '8.00',
+        })
+
+        res = self.client.get(RECIPE_URL, {'search': 'curry'})
+
+        self.assertEqual(len(res.data), 1)
@@ -135,4 +135,46 @@ class PrivateTagsAPITest(TestCase):
          res = self.client.get(TAGS_URL, {'assigned_only':1})
          
          self.assertEqual(len(res.data), 1)
-         
+
+     def test_list_tags_with_counts(self):
+          """Test with_counts annotates recipe counts, most used first"""
+          popular = Tag.objects.create(user=self.user, name='Dinner')
+          rare = Tag.objects.create(user=self.user, name='Brunch')
+          Tag.objects.create(user=self.user, name='Unused')
+          for title in ('Pasta', 'Stew'):
+               recipe = Recipe.objects.create(
+                    user=self.user,
+                    title=title,
+                    price=Decimal('5.00'),
+                    time_minutes=20,
+               )
+               recipe.tags.add(popular)
+          recipe.tags.add(rare)
+
+          res = self.client.get(TAGS_URL, {'with_counts': 1})
+
+          self.assertEqual(res.status_code, status.HTTP_200_OK)
+          self.assertEqual(
+               [(t['name'], t['recipe_count']) for t in res.data],
+               [('Dinner', 2), ('Brunch', 1), ('Unused', 0)],
+          )
+
+     def test_list_tags_with_counts_assigned_only(self):
+          """Test with_counts combines with assigned_only"""
+          tag = Tag.objects.create(user=self.user, name='Dinner')
+          Tag.objects.create(user=self.user, name='Unused')
+          recipe = Recipe.objects.create(
+               user=self.user,
+               title='Pasta',
+               price=Decimal('5.00'),
+               time_minutes=20,
+          )
+          recipe.tags.add(tag)
+
+          res = self.client.get(
+               TAGS_URL, {'with_counts': 1, 'assigned_only': 1}
+          )
+
+          self.assertEqual(
+               res.data, [{'id': tag.id, 'name': 'Dinner', 'recipe_count': 1}]
+          )
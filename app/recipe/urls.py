@@ -2,6 +2,7 @@
 Url mapping for recipe app.
 """
 
+from django.conf import settings
 from django.urls import(
     path,
     include,
@@ -9,8 +10,11 @@ from django.urls import(
 
 from rest_framework.routers import DefaultRouter
 
+from core.async_views import async_read_urls
 from recipe.views import RecipeViewSet, TagViewSet, IngredientViewSet
 
+ASYNC_READ_VIEWS = (RecipeViewSet, TagViewSet, IngredientViewSet)
+
 router = DefaultRouter()
 router.register('recipes', RecipeViewSet)
 router.register('tags', TagViewSet)
@@ -18,6 +22,10 @@ router.register('ingredients', IngredientViewSet)
 
 app_name = 'recipe'
 
+router_urls = router.urls
+if settings.ASYNC_READ_ENDPOINTS['ENABLED']:
+    router_urls = async_read_urls(router_urls, ASYNC_READ_VIEWS)
+
 urlpatterns = [
-    path('', include(router.urls)),
+    path('', include(router_urls)),
 ]
\ No newline at end of file
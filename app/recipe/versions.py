@@ -0,0 +1,56 @@
+"""
+Per-user version stamps for the recipe collections.
+
+Every write touching a user's recipes, tags or ingredients replaces the
+stamp of the affected collections. Stamps are random tokens rather than
+counters so an evicted stamp can never come back with an old value.
+
+Stamps live in the default cache. With several worker processes that
+cache must be shared (memcached, redis); with the per-process
+LocMemCache each worker keeps its own stamps and hands out ETags the
+others do not recognise, and misses writes made through other workers.
+"""
+import uuid
+
+from django.core.cache import cache
+from django.db import transaction
+
+RECIPES = 'recipes'
+TAGS = 'tags'
+INGREDIENTS = 'ingredients'
+
+
+def _key(collection, user_id):
+    return f'collection-version:{collection}:{user_id}'
+
+
+def get_versions(user_id, collections):
+    """Return the current stamps of the collections, creating missing ones."""
+    keys = [_key(collection, user_id) for collection in collections]
+    found = cache.get_many(keys)
+    missing = {key: uuid.uuid4().hex for key in keys if key not in found}
+    if missing:
+        cache.set_many(missing, timeout=None)
+        found.update(missing)
+    return [found[key] for key in keys]
+
+
+def _replace(user_id, collections):
+    cache.set_many(
+        {_key(collection, user_id): uuid.uuid4().hex
+         for collection in collections},
+        timeout=None,
+    )
+
+
+def bump(user_id, *collections):
+    """Invalidate the stamps of the collections for a user.
+
+    Inside a transaction the stamps are replaced again once it commits.
+    A concurrent read before the commit still sees the old rows and may
+    cache or ETag them, but only under the intermediate stamp, which the
+    second replacement retires.
+    """
+    _replace(user_id, collections)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: _replace(user_id, collections))
@@ -1,3 +1,5 @@
+from django.conf import settings
+
 
 from drf_spectacular.utils import (
      extend_schema_view, 
@@ -12,57 +14,158 @@ from rest_framework import (
     status,
 )
 
+from django.db.models import prefetch_related_objects
+from django.http import StreamingHttpResponse
+
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from rest_framework.decorators import action
-from rest_framework.authentication import TokenAuthentication
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
 
+from core.async_views import sync_streaming_content
 from core.models import Recipe,Tag, Ingredient
-from recipe import serializers
+from recipe import serializers, versions
+from recipe.caching import CachedListMixin
+from recipe.filters import (
+    MATCH_ALL,
+    MATCH_ANY,
+    annotate_recipe_counts,
+    filter_assigned,
+    filter_by_attrs,
+)
+from recipe.conditional import ConditionalGetMixin
+from recipe.facets import get_facets
+from recipe.images import enqueue_derivatives, ensure_image, release_image
+from recipe.pagination import RecipeCursorPagination
+from recipe.renderers import NDJSONRenderer, ndjson_lines
+from recipe.search import get_search_backend
+from user.authentication import CachedTokenAuthentication
+
+RECIPE_FILTER_PARAMETERS = [
+    OpenApiParameter(
+        'tags',
+        OpenApiTypes.STR,
+        description='Comma sperated list of tag IDs to filter'
+    ),
+    OpenApiParameter(
+        'ingredients',
+        OpenApiTypes.STR,
+        description='Comma sperated list of ingredient IDs to filter'
+    ),
+    OpenApiParameter(
+        'match',
+        OpenApiTypes.STR, enum=['any', 'all'],
+        description='Match recipes having any (default) or all of '
+                    'the given tags/ingredients'
+    ),
+    OpenApiParameter(
+        'search',
+        OpenApiTypes.STR,
+        description='Words to find in title and description, '
+                    'results ranked by relevance'
+    ),
+]
+
 
 @extend_schema_view(
     list = extend_schema(
-        parameters=[
+        parameters=RECIPE_FILTER_PARAMETERS + [
             OpenApiParameter(
-                'tags',
-                OpenApiTypes.STR,
-                description='Comma sperated list of tag IDs to filter'
+                'page_size',
+                OpenApiTypes.INT,
+                description='Enable cursor pagination with this page size'
             ),
             OpenApiParameter(
-                'ingredients',
+                'cursor',
                 OpenApiTypes.STR,
-                description='Comma sperated list of ingredient IDs to filter'
-            )
+                description='Opaque cursor from a previous next/previous link'
+            ),
+            OpenApiParameter(
+                'offset',
+                OpenApiTypes.INT,
+                description='Position in paginated search results'
+            ),
         ]
        
     )
 )
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     serializer_class = serializers.RecipeDetailSerializer
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
+    pagination_class = RecipeCursorPagination
     queryset = Recipe.objects.all()
+    etag_collections = (versions.RECIPES,)
 
     def _params_to_ints(self, qs):
         """convert a list of strings to integers"""
         return [int(str_id) for str_id in qs.split(',')]
     
+    def _id_filter(self, name):
+        """Sorted unique ids of a comma separated query parameter"""
+        value = self.request.query_params.get(name)
+        if not value:
+            return []
+        try:
+            return sorted(set(self._params_to_ints(value)))
+        except ValueError:
+            raise ValidationError(
+                {name: 'Expected comma separated integer ids.'}
+            )
+
+    def _filter_state(self):
+        """Normalized tags/ingredients/match/search filters of the request"""
+        params = self.request.query_params
+        match = params.get('match', MATCH_ANY)
+        if match not in (MATCH_ANY, MATCH_ALL):
+            raise ValidationError(
+                {'match': f'Expected {MATCH_ANY} or {MATCH_ALL}.'}
+            )
+        return {
+            'tags': self._id_filter('tags'),
+            'ingredients': self._id_filter('ingredients'),
+            'match': match,
+            'search': params.get('search', '').strip(),
+        }
+
     def get_queryset(self):
         """Retrive recipe for authenticated user"""
-        tags = self.request.query_params.get('tags')
-        ingredients = self.request.query_params.get('ingredients')
+        filters = self._filter_state()
         queryset = self.queryset
 
-        if tags:
-            tag_ids = self._params_to_ints(tags)
-            queryset = queryset.filter(tags__id__in = tag_ids)
-        if ingredients:
-            ingredient_ids = self._params_to_ints(ingredients)
-            queryset = queryset.filter(ingredients__id__in = ingredient_ids)
-        return queryset.filter(
+        if filters['tags']:
+            queryset = filter_by_attrs(
+                queryset, Recipe.tags.through, 'tag_id',
+                filters['tags'], filters['match'],
+            )
+        if filters['ingredients']:
+            queryset = filter_by_attrs(
+                queryset, Recipe.ingredients.through, 'ingredient_id',
+                filters['ingredients'], filters['match'],
+            )
+        queryset = queryset.filter(
             user = self.request.user
-        ).order_by('-id').distinct()
+        ).order_by('-id')
+
+        search = filters['search']
+        if search:
+            queryset = get_search_backend().search(
+                queryset, search, self.request.user
+            )
+        return self._apply_query_plan(queryset)
+
+    def _apply_query_plan(self, queryset):
+        """Load the relations rendered by the active serializer."""
+        select_related, prefetch_related = serializers.get_query_plan(
+            self.get_serializer_class()
+        )
+        if select_related:
+            queryset = queryset.select_related(*select_related)
+        if prefetch_related:
+            queryset = queryset.prefetch_related(*prefetch_related)
+        return queryset
 
 
     def get_serializer_class(self):
@@ -71,6 +174,9 @@ class RecipeViewSet(viewsets.ModelViewSet):
         
         elif self.action == 'upload_image':
             return serializers.RecipeImageSerializer
+
+        elif self.action == 'bulk':
+            return serializers.RecipeBulkItemSerializer
         
         return self.serializer_class
     
@@ -78,14 +184,114 @@ class RecipeViewSet(viewsets.ModelViewSet):
         """Create a new recipe"""
         serializer.save(user=self.request.user)
     
+    @extend_schema(
+        request=serializers.RecipeBulkItemSerializer(many=True),
+        responses=serializers.RecipeBulkItemSerializer(many=True),
+    )
+    @action(methods=['POST'], detail=False, url_path='bulk')
+    def bulk(self, request):
+        """Create or update a list of recipes in one transaction."""
+        if not isinstance(request.data, list):
+            return Response(
+                {'detail': 'Expected a list of recipes.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        max_items = settings.RECIPE_BULK_MAX_ITEMS
+        if len(request.data) > max_items:
+            return Response(
+                {'detail': f'At most {max_items} recipes per request.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        serializer = self.get_serializer(data=request.data, many=True)
+        if not serializer.is_valid():
+            return Response(
+                serializer.errors, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        serializer.save(user=request.user)
+        results = [
+            {
+                'status': 'updated' if 'id' in item else 'created',
+                'recipe': data,
+            }
+            for item, data in zip(request.data, serializer.data)
+        ]
+        return Response(results, status=status.HTTP_200_OK)
+
+    @extend_schema(
+        parameters=RECIPE_FILTER_PARAMETERS,
+        responses=serializers.RecipeFacetsSerializer,
+    )
+    @action(methods=['GET'], detail=False)
+    def facets(self, request):
+        """Count the recipes matching the filters per tag and ingredient."""
+        filters = self._filter_state()
+        queryset = self.get_queryset().prefetch_related(None)
+        return Response(get_facets(request.user.id, filters, queryset))
+
+    @extend_schema(responses={(200, 'application/x-ndjson'): OpenApiTypes.STR})
+    @action(
+        methods=['GET'],
+        detail=False,
+        renderer_classes=[NDJSONRenderer, JSONRenderer],
+    )
+    def export(self, request):
+        """Stream the user's recipes as newline-delimited JSON.
+
+        Meant for WSGI workers: under ASGI the stream works but blocks the
+        event loop per chunk, see sync_streaming_content.
+        """
+        chunk_size = settings.RECIPE_EXPORT_CHUNK_SIZE
+        queryset = self.get_queryset().prefetch_related(None)
+        chunks = self._export_chunks(queryset, chunk_size)
+        response = StreamingHttpResponse(
+            sync_streaming_content(chunks),
+            content_type=NDJSONRenderer.media_type,
+        )
+        response['Content-Disposition'] = (
+            'attachment; filename="recipes.ndjson"'
+        )
+        return response
+
+    def _export_chunks(self, queryset, chunk_size):
+        """Yield rendered chunks, prefetching relations per chunk.
+
+        iterator() streams rows through a server-side cursor where the
+        backend supports it, so memory stays bounded by the chunk size.
+        """
+        serializer_class = self.get_serializer_class()
+        _, prefetch_related = serializers.get_query_plan(serializer_class)
+        context = self.get_serializer_context()
+        chunk = []
+        for recipe in queryset.iterator(chunk_size=chunk_size):
+            chunk.append(recipe)
+            if len(chunk) < chunk_size:
+                continue
+            prefetch_related_objects(chunk, *prefetch_related)
+            yield ndjson_lines(
+                serializer_class(chunk, many=True, context=context).data
+            )
+            chunk = []
+        if chunk:
+            prefetch_related_objects(chunk, *prefetch_related)
+            yield ndjson_lines(
+                serializer_class(chunk, many=True, context=context).data
+            )
+
     @action(methods=['POST'], detail=True, url_path='upload-image')
     def upload_image(self, request, pk=None):
         """uplaod an image to recipe"""
         recipe = self.get_object()
+        old_image = recipe.image.name
         serializer = self.get_serializer(recipe, data=request.data)
 
         if serializer.is_valid():
-            serializer.save()
+            recipe = serializer.save()
+            ensure_image(recipe, serializer.validated_data['image'])
+            enqueue_derivatives(recipe)
+            if old_image and old_image != recipe.image.name:
+                release_image(old_image, recipe.image.storage)
             return Response(serializer.data, status=status.HTTP_200_OK)
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -97,41 +303,66 @@ class RecipeViewSet(viewsets.ModelViewSet):
                 'assigned_only',
                 OpenApiTypes.INT, enum = [0,1],
                 description = 'filter by items assigned to recipe'
-            )
+            ),
+            OpenApiParameter(
+                'with_counts',
+                OpenApiTypes.INT, enum = [0,1],
+                description = 'include recipe_count and order by it'
+            ),
         ]
     )
 )
 
-class BaseRecipeAtrrViewSet(mixins.DestroyModelMixin,
+class BaseRecipeAtrrViewSet(ConditionalGetMixin,
+                            CachedListMixin,
+                            mixins.DestroyModelMixin,
                             mixins.UpdateModelMixin,
                             mixins.ListModelMixin,
                             viewsets.GenericViewSet):
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
 
+    def _flag(self, name):
+        """Read a 0/1 query param"""
+        return bool(int(self.request.query_params.get(name, 0)))
+
     def get_queryset(self):
         """filter queryset to authenticated user"""
-        assigned_only = bool(
-            int(self.request.query_params.get('assigned_only', 0))
-        )
-        queryset = self.queryset
-        if assigned_only:
-            queryset = queryset.filter(recipe__isnull=False)
-        return queryset.filter(
-            user = self.request.user
-            ).order_by('-name').distinct()
+        queryset = self.queryset.filter(user=self.request.user)
+        if self._flag('assigned_only'):
+            queryset = filter_assigned(
+                queryset, self.through, self.through_column
+            )
+        if self.action == 'list' and self._flag('with_counts'):
+            return annotate_recipe_counts(queryset)
+        return queryset.order_by('-name')
+
+    def get_serializer_class(self):
+        if self.action == 'list' and self._flag('with_counts'):
+            return self.count_serializer_class
+        return self.serializer_class
 
 
 class TagViewSet(BaseRecipeAtrrViewSet):
     """Manage tags in the database"""
     queryset = Tag.objects.all()
     serializer_class = serializers.TagSerializer
+    count_serializer_class = serializers.TagCountSerializer
+    through = Recipe.tags.through
+    through_column = 'tag_id'
+    etag_collections = (versions.TAGS,)
+    cache_collection = versions.TAGS
 
    
     
 class IngredientViewSet(BaseRecipeAtrrViewSet):
     serializer_class = serializers.IngredientSerializer
+    count_serializer_class = serializers.IngredientCountSerializer
+    through = Recipe.ingredients.through
+    through_column = 'ingredient_id'
     queryset = Ingredient.objects.all()
+    etag_collections = (versions.INGREDIENTS,)
+    cache_collection = versions.INGREDIENTS
 
     
 
@@ -0,0 +1,155 @@
+"""
+Authentication backends for the API.
+"""
+import copy
+import hashlib
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+from rest_framework.authentication import TokenAuthentication
+
+DEFAULT_TOKEN_AUTH_CACHE = {
+    'MAX_SIZE': 10000,
+    'TTL': 60,
+    'CACHE_ALIAS': None,
+    'REVOCATION_CACHE_ALIAS': 'default',
+}
+
+
+def _cache_settings():
+    """Return TOKEN_AUTH_CACHE merged over the defaults."""
+    return {
+        **DEFAULT_TOKEN_AUTH_CACHE,
+        **getattr(settings, 'TOKEN_AUTH_CACHE', {}),
+    }
+
+
+class TokenCache:
+    """Bounded LRU of token key -> (user, token) with TTL expiry.
+
+    An optional Django cache alias acts as a shared second tier so worker
+    processes can reuse each other's lookups. Deleting a token bumps its
+    revocation stamp in REVOCATION_CACHE_ALIAS, which every local hit
+    checks, so other processes drop it on their next request; that alias
+    must be shared between workers (not LocMemCache) for this to hold.
+
+    Callers get copies of the cached user and token, since views such as
+    ManageUserView modify request.user and other threads share the cache.
+    """
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _digest(key):
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    def _shared_key(self, key):
+        return f'auth-token:{self._digest(key)}'
+
+    def _revoked_key(self, key):
+        return f'auth-token-revoked:{self._digest(key)}'
+
+    def _shared(self):
+        alias = _cache_settings()['CACHE_ALIAS']
+        return caches[alias] if alias else None
+
+    def _revocations(self):
+        return caches[_cache_settings()['REVOCATION_CACHE_ALIAS']]
+
+    def stamp(self, key):
+        """Return the token's revocation stamp, to pass back to set()."""
+        return self._revocations().get(self._revoked_key(key))
+
+    def get(self, key):
+        """Return a copy of the cached (user, token) pair or None."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= now:
+                del self._entries[key]
+                entry = None
+        if entry is not None:
+            _, value, stamp = entry
+            if self.stamp(key) == stamp:
+                with self._lock:
+                    if key in self._entries:
+                        self._entries.move_to_end(key)
+                return copy.deepcopy(value)
+            with self._lock:
+                self._entries.pop(key, None)
+
+        shared = self._shared()
+        if shared is not None:
+            stamp = self.stamp(key)
+            value = shared.get(self._shared_key(key))
+            if value is not None:
+                self._set_local(key, value, stamp)
+                return copy.deepcopy(value)
+        return None
+
+    def set(self, key, value, stamp=None):
+        """Cache a resolved (user, token) pair in every tier.
+
+        stamp is the revocation stamp read before the database lookup, so
+        a revocation racing with the lookup is not cached over.
+        """
+        self._set_local(key, value, stamp)
+        shared = self._shared()
+        if shared is not None:
+            shared.set(
+                self._shared_key(key), value, _cache_settings()['TTL']
+            )
+
+    def _set_local(self, key, value, stamp):
+        options = _cache_settings()
+        entry = (time.monotonic() + options['TTL'], copy.deepcopy(value),
+                 stamp)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > options['MAX_SIZE']:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        """Drop a token from every tier and revoke local copies."""
+        with self._lock:
+            self._entries.pop(key, None)
+        self._revocations().set(
+            self._revoked_key(key), uuid.uuid4().hex,
+            _cache_settings()['TTL'],
+        )
+        shared = self._shared()
+        if shared is not None:
+            shared.delete(self._shared_key(key))
+
+    def clear(self):
+        """Drop every locally cached token."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+token_cache = TokenCache()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication that caches the token -> user lookup."""
+
+    def authenticate_credentials(self, key):
+        cached = token_cache.get(key)
+        if cached is not None:
+            return cached
+
+        stamp = token_cache.stamp(key)
+        user, token = super().authenticate_credentials(key)
+        token_cache.set(key, (user, token), stamp)
+        return user, token
@@ -9,6 +9,8 @@ from django.utils.translation import gettext as _
 
 from rest_framework import serializers
 
+from user.throttling import hashing_slot
+
 class UserSerializer(serializers.ModelSerializer):
       """serializers for the user objects"""
 
@@ -20,7 +22,8 @@ class UserSerializer(serializers.ModelSerializer):
             }
       def create(self,validate_data):
             """Create and return a user with encrypted password"""
-            return get_user_model().objects.create_user(**validate_data)
+            with hashing_slot():
+                  return get_user_model().objects.create_user(**validate_data)
       
       def updated_user(self, instance, validate_data):
             """Update and return user. """
@@ -46,11 +49,12 @@ class AuthTokenSerializer(serializers.Serializer):
           """validate and authenticate the user"""
           email = attrs.get('email')  
           password = attrs.get('password')
-          user = authenticate(
-                request=self.context.get('request'),
-                username= email,
-                password= password,
-          )
+          with hashing_slot():
+                user = authenticate(
+                      request=self.context.get('request'),
+                      username= email,
+                      password= password,
+                )
           if not user:
                 msg = _('Unable to authenticate with provided credentials.')
                 raise serializers.ValidationError(msg, code='authorization ')
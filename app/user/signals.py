@@ -0,0 +1,27 @@
+"""
+Signal handlers keeping the token cache in sync with the database.
+"""
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from rest_framework.authtoken.models import Token
+
+from user.authentication import token_cache
+
+
+@receiver(post_save, sender=Token)
+@receiver(post_delete, sender=Token)
+def invalidate_token(sender, instance, **kwargs):
+    """Drop a token from the cache when it is saved or deleted."""
+    token_cache.delete(instance.key)
+
+
+@receiver(post_save, sender=get_user_model())
+def invalidate_user_tokens(sender, instance, **kwargs):
+    """Drop a user's tokens when the user is updated or deactivated."""
+    keys = Token.objects.filter(user_id=instance.pk).values_list(
+        'key', flat=True
+    )
+    for key in keys:
+        token_cache.delete(key)
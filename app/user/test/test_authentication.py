@@ -0,0 +1,118 @@
+"""
+Tests for the cached token authentication.
+"""
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from user.authentication import token_cache
+
+ME_URL = reverse('user:me')
+
+
+def create_user(email='user@example.com', password='testpass123'):
+    """Create and return a new user."""
+    return get_user_model().objects.create_user(
+        email=email, password=password, name='Test Name'
+    )
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    """Test token lookups are cached and invalidated."""
+
+    def setUp(self):
+        token_cache.clear()
+        self.user = create_user()
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def tearDown(self):
+        token_cache.clear()
+        cache.clear()
+
+    def test_token_lookup_cached(self):
+        """Test a second request resolves the token without queries."""
+        res = self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['email'], self.user.email)
+
+    def test_deleted_token_invalidated(self):
+        """Test deleting a token rejects it immediately."""
+        self.client.get(ME_URL)
+
+        self.token.delete()
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_revocation_by_other_process_honoured(self):
+        """Test a revocation stamp from another worker drops local hits."""
+        self.client.get(ME_URL)
+
+        cache.set(token_cache._revoked_key(self.token.key), 'other')
+        with self.assertNumQueries(1):
+            self.client.get(ME_URL)
+
+    def test_cached_user_not_shared(self):
+        """Test callers cannot modify the cached user."""
+        self.client.get(ME_URL)
+
+        user, _ = token_cache.get(self.token.key)
+        user.name = 'Changed'
+
+        user, _ = token_cache.get(self.token.key)
+        self.assertEqual(user.name, 'Test Name')
+
+    def test_deactivated_user_invalidated(self):
+        """Test deactivating a user rejects their cached token."""
+        self.client.get(ME_URL)
+
+        self.user.is_active = False
+        self.user.save()
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_updated_user_reloaded(self):
+        """Test updating a user refreshes the cached user."""
+        self.client.get(ME_URL)
+
+        self.client.patch(ME_URL, {'name': 'New Name'})
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.data['name'], 'New Name')
+
+    @patch('user.authentication.time.monotonic')
+    def test_token_expires_after_ttl(self, patched_monotonic):
+        """Test cached entries expire after the TTL."""
+        patched_monotonic.return_value = 1000
+        self.client.get(ME_URL)
+
+        patched_monotonic.return_value = 1000 + 3600
+        with self.assertNumQueries(1):
+            self.client.get(ME_URL)
+
+    @override_settings(TOKEN_AUTH_CACHE={'MAX_SIZE': 2})
+    def test_cache_is_bounded(self):
+        """Test the least recently used token is evicted."""
+        for i in range(3):
+            user = create_user(email=f'user{i}@example.com')
+            token = Token.objects.create(user=user)
+            client = APIClient()
+            client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+            client.get(ME_URL)
+
+        self.assertEqual(len(token_cache), 2)
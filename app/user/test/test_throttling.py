@@ -0,0 +1,177 @@
+"""
+Tests for the login and registration throttles.
+"""
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from user.throttling import (
+    LocalSlidingWindow,
+    _hash_slots,
+    parse_rate,
+    reset_throttles,
+)
+
+CREATE_USER_URL = reverse('user:create')
+TOKEN_URL = reverse('user:token')
+
+
+def throttle_settings(**rates):
+    return {'BACKEND': 'local', 'RATES': rates}
+
+
+class SlidingWindowTests(SimpleTestCase):
+    """Test the sliding-window counter."""
+
+    def test_parse_rate(self):
+        self.assertEqual(parse_rate('5/min'), (5, 60))
+        self.assertEqual(parse_rate('20/hour'), (20, 3600))
+
+    def test_limit_within_window(self):
+        """Test requests beyond the limit are rejected with a wait."""
+        window = LocalSlidingWindow()
+        for _ in range(3):
+            self.assertTrue(window.hit('k', 3, 60, now=600)[0])
+
+        allowed, wait = window.hit('k', 3, 60, now=610)
+
+        self.assertFalse(allowed)
+        self.assertEqual(wait, 50)
+
+    def test_previous_window_weighted(self):
+        """Test the previous window counts in proportion to its overlap."""
+        window = LocalSlidingWindow()
+        for _ in range(4):
+            window.hit('k', 4, 60, now=600)
+
+        # 15s into the next window 3/4 of the old count still applies.
+        self.assertTrue(window.hit('k', 4, 60, now=675)[0])
+        self.assertFalse(window.hit('k', 4, 60, now=675)[0])
+        # Halfway through, a second request fits.
+        self.assertTrue(window.hit('k', 4, 60, now=690)[0])
+
+    def test_old_windows_forgotten(self):
+        window = LocalSlidingWindow()
+        for _ in range(2):
+            window.hit('k', 2, 60, now=600)
+
+        self.assertTrue(window.hit('k', 2, 60, now=800)[0])
+
+    @override_settings(LOGIN_THROTTLE={'MAX_KEYS': 2})
+    def test_keys_bounded(self):
+        window = LocalSlidingWindow()
+        for key in ('a', 'b', 'c'):
+            window.hit(key, 1, 60, now=600)
+
+        self.assertTrue(window.hit('a', 1, 60, now=600)[0])
+        self.assertFalse(window.hit('c', 1, 60, now=600)[0])
+
+
+class LoginThrottleTests(TestCase):
+    """Test the token and registration endpoints are throttled."""
+
+    def setUp(self):
+        reset_throttles()
+        self.client = APIClient()
+        get_user_model().objects.create_user(
+            email='test@example.com', password='testpass123'
+        )
+
+    def tearDown(self):
+        reset_throttles()
+
+    @override_settings(LOGIN_THROTTLE=throttle_settings(login_email='2/min'))
+    def test_token_throttled_by_email_before_hashing(self):
+        """Test attempts over the email limit never reach authenticate."""
+        payload = {'email': 'Test@example.com', 'password': 'wrong'}
+        for _ in range(2):
+            res = self.client.post(TOKEN_URL, payload)
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        with patch('user.serializers.authenticate') as authenticate:
+            res = self.client.post(
+                TOKEN_URL, {**payload, 'email': 'test@example.com'},
+                REMOTE_ADDR='10.0.0.2',
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn('Retry-After', res)
+        authenticate.assert_not_called()
+
+    @override_settings(LOGIN_THROTTLE=throttle_settings(login_ip='2/min'))
+    def test_token_throttled_by_ip(self):
+        """Test attempts over the IP limit are rejected for any email."""
+        for n in range(2):
+            self.client.post(
+                TOKEN_URL, {'email': f'u{n}@example.com', 'password': 'x'}
+            )
+
+        res = self.client.post(
+            TOKEN_URL, {'email': 'test@example.com', 'password': 'testpass123'}
+        )
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+        res = self.client.post(
+            TOKEN_URL,
+            {'email': 'test@example.com', 'password': 'testpass123'},
+            REMOTE_ADDR='10.0.0.2',
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    @override_settings(LOGIN_THROTTLE=throttle_settings(login_ip='2/min'))
+    def test_forwarded_for_not_trusted(self):
+        """Test rotating X-Forwarded-For does not reset the IP limit."""
+        for n in range(3):
+            res = self.client.post(
+                TOKEN_URL, {'email': f'u{n}@example.com', 'password': 'x'},
+                HTTP_X_FORWARDED_FOR=f'192.0.2.{n}',
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    @override_settings(LOGIN_THROTTLE=throttle_settings(login_email='2/min'))
+    def test_non_object_body_rejected(self):
+        """Test a JSON list body is a validation error, not a crash."""
+        res = self.client.post(TOKEN_URL, [], format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(LOGIN_THROTTLE=throttle_settings(register_ip='1/hour'))
+    def test_registration_throttled_by_ip(self):
+        res = self.client.post(CREATE_USER_URL, {
+            'email': 'new@example.com', 'password': 'testpass123',
+            'name': 'New',
+        })
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        res = self.client.post(CREATE_USER_URL, {
+            'email': 'other@example.com', 'password': 'testpass123',
+            'name': 'Other',
+        })
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertFalse(
+            get_user_model().objects.filter(email='other@example.com').exists()
+        )
+
+    @override_settings(LOGIN_THROTTLE={
+        'RATES': {}, 'MAX_CONCURRENT_HASHES': 1, 'HASH_WAIT': 0.01,
+    })
+    def test_concurrent_hashes_bounded(self):
+        """Test a request finding no free hashing slot gets a 429."""
+        slots = _hash_slots()
+        slots.acquire()
+        try:
+            res = self.client.post(
+                TOKEN_URL,
+                {'email': 'test@example.com', 'password': 'testpass123'},
+            )
+        finally:
+            slots.release()
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
@@ -0,0 +1,254 @@
+"""
+Throttles protecting the password hashing endpoints.
+
+Every token or registration request runs a full PBKDF2 hash, so the
+throttles below are checked in APIView.initial(), before the serializer
+ever calls authenticate() or set_password(). Limits are counted with a
+sliding window: the count of the current fixed window plus the previous
+window's count weighted by how much of it still overlaps, which smooths
+the burst a fixed window allows at its boundary in O(1) memory per key.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import caches
+
+from rest_framework.exceptions import Throttled
+from rest_framework.throttling import BaseThrottle
+
+DEFAULT_LOGIN_THROTTLE = {
+    'BACKEND': 'cache',
+    'CACHE_ALIAS': 'default',
+    'MAX_KEYS': 100000,
+    'RATES': {
+        'login_email': '5/min',
+        'login_ip': '30/min',
+        'register_ip': '20/hour',
+    },
+    'MAX_CONCURRENT_HASHES': None,
+    'HASH_WAIT': 1.0,
+}
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def _throttle_settings():
+    """Return LOGIN_THROTTLE merged over the defaults."""
+    return {
+        **DEFAULT_LOGIN_THROTTLE,
+        **getattr(settings, 'LOGIN_THROTTLE', {}),
+    }
+
+
+def parse_rate(rate):
+    """Parse '5/min' style rates into (limit, window seconds)."""
+    limit, period = rate.split('/')
+    return int(limit), PERIODS[period[0]]
+
+
+def _retry_after(previous, current, limit, window, offset):
+    """Seconds until the weighted count lets one more request through."""
+    if current < limit and previous:
+        needed = 1 - (limit - current - 1) / previous
+        return max(needed * window - offset, 0)
+    return window - offset
+
+
+class LocalSlidingWindow:
+    """Per-process counters, bounded to MAX_KEYS keys in LRU order."""
+
+    def __init__(self):
+        self._windows = OrderedDict()
+        self._lock = threading.Lock()
+
+    def hit(self, key, limit, window, now=None):
+        """Count a request; return (allowed, seconds to wait)."""
+        now = time.time() if now is None else now
+        bucket, offset = divmod(now, window)
+        with self._lock:
+            start, previous, current = self._windows.get(key, (bucket, 0, 0))
+            if start == bucket - 1:
+                previous, current = current, 0
+            elif start != bucket:
+                previous, current = 0, 0
+
+            weight = 1 - offset / window
+            if previous * weight + current + 1 > limit:
+                allowed = False
+            else:
+                current += 1
+                allowed = True
+
+            self._windows[key] = (bucket, previous, current)
+            self._windows.move_to_end(key)
+            max_keys = _throttle_settings()['MAX_KEYS']
+            while len(self._windows) > max_keys:
+                self._windows.popitem(last=False)
+
+        if allowed:
+            return True, None
+        return False, _retry_after(previous, current, limit, window, offset)
+
+    def clear(self):
+        """Forget every counter."""
+        with self._lock:
+            self._windows.clear()
+
+
+class CacheSlidingWindow:
+    """Counters in a Django cache, shared by every worker process.
+
+    The check and the increment are separate cache calls, so concurrent
+    requests may overshoot a limit by the number of workers at most.
+    """
+
+    def _cache(self):
+        return caches[_throttle_settings()['CACHE_ALIAS']]
+
+    @staticmethod
+    def _key(key, bucket):
+        digest = hashlib.sha256(key.encode()).hexdigest()
+        return f'throttle:{digest}:{bucket}'
+
+    def hit(self, key, limit, window, now=None):
+        """Count a request; return (allowed, seconds to wait)."""
+        now = time.time() if now is None else now
+        bucket, offset = divmod(now, window)
+        bucket = int(bucket)
+        cache = self._cache()
+        current_key = self._key(key, bucket)
+        previous_key = self._key(key, bucket - 1)
+        counts = cache.get_many([current_key, previous_key])
+        previous = counts.get(previous_key, 0)
+        current = counts.get(current_key, 0)
+
+        if previous * (1 - offset / window) + current + 1 > limit:
+            return False, _retry_after(
+                previous, current, limit, window, offset
+            )
+
+        # Two windows must stay readable: the current and the previous one.
+        if not cache.add(current_key, 1, timeout=2 * window):
+            try:
+                cache.incr(current_key)
+            except ValueError:
+                cache.set(current_key, 1, timeout=2 * window)
+        return True, None
+
+    def clear(self):
+        """Counters expire on their own in the shared cache."""
+
+
+_local_window = LocalSlidingWindow()
+_cache_window = CacheSlidingWindow()
+
+
+def get_window():
+    """Return the counter store selected by LOGIN_THROTTLE['BACKEND']."""
+    if _throttle_settings()['BACKEND'] == 'cache':
+        return _cache_window
+    return _local_window
+
+
+def reset_throttles():
+    """Forget the in-process counters, e.g. between tests."""
+    _local_window.clear()
+
+
+class SlidingWindowThrottle(BaseThrottle):
+    """Limit requests per identity under LOGIN_THROTTLE['RATES'][scope]."""
+    scope = None
+
+    def __init__(self):
+        self.wait_seconds = None
+
+    def get_ident_key(self, request):
+        """Return the identity to count, or None to skip counting."""
+        raise NotImplementedError
+
+    def allow_request(self, request, view):
+        rate = _throttle_settings()['RATES'].get(self.scope)
+        if not rate:
+            return True
+        ident = self.get_ident_key(request)
+        if ident is None:
+            return True
+
+        limit, window = parse_rate(rate)
+        allowed, self.wait_seconds = get_window().hit(
+            f'{self.scope}:{ident}', limit, window
+        )
+        return allowed
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class LoginIPThrottle(SlidingWindowThrottle):
+    """Token requests per client IP."""
+    scope = 'login_ip'
+
+    def get_ident_key(self, request):
+        return self.get_ident(request)
+
+
+class LoginEmailThrottle(SlidingWindowThrottle):
+    """Token requests per submitted email, whichever IP they come from."""
+    scope = 'login_email'
+
+    def get_ident_key(self, request):
+        if not isinstance(request.data, dict):
+            return None
+        email = request.data.get('email')
+        if not isinstance(email, str) or not email.strip():
+            return None
+        return email.strip().lower()
+
+
+class RegisterIPThrottle(SlidingWindowThrottle):
+    """Registrations per client IP."""
+    scope = 'register_ip'
+
+    def get_ident_key(self, request):
+        return self.get_ident(request)
+
+
+_slots_lock = threading.Lock()
+_slots = (None, None)
+
+
+def _hash_slots():
+    """Return the semaphore for the configured concurrency, or None."""
+    global _slots
+    size = _throttle_settings()['MAX_CONCURRENT_HASHES']
+    if not size:
+        return None
+    with _slots_lock:
+        if _slots[0] != size:
+            _slots = (size, threading.BoundedSemaphore(size))
+        return _slots[1]
+
+
+@contextmanager
+def hashing_slot():
+    """Bound how many threads of this process hash passwords at once.
+
+    Requests that passed the throttles still cost a hash each; capping
+    the concurrent ones leaves CPU for the rest of the API. A request
+    that waits longer than HASH_WAIT seconds is answered with 429.
+    """
+    slots = _hash_slots()
+    if slots is None:
+        yield
+        return
+    options = _throttle_settings()
+    if not slots.acquire(timeout=options['HASH_WAIT']):
+        raise Throttled(wait=options['HASH_WAIT'])
+    try:
+        yield
+    finally:
+        slots.release()
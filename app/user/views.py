@@ -1,10 +1,16 @@
 """
 Views for the user API.
 """
-from rest_framework import generics, permissions, authentication
+from rest_framework import generics, permissions
 from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.settings import api_settings
 
+from user.authentication import CachedTokenAuthentication
+from user.throttling import (
+    LoginEmailThrottle,
+    LoginIPThrottle,
+    RegisterIPThrottle,
+)
 from user.serializers import (
     UserSerializer,
     AuthTokenSerializer,
@@ -13,16 +19,18 @@ from user.serializers import (
 class CreateUserView(generics.CreateAPIView):
     """Create a new user in the system."""
     serializer_class = UserSerializer
+    throttle_classes = [RegisterIPThrottle]
 
 class CreateTokenView(ObtainAuthToken):
     """Create a new auth token for user."""
     serializer_class = AuthTokenSerializer
     renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES
+    throttle_classes = [LoginIPThrottle, LoginEmailThrottle]
 
 class ManageUserView(generics.RetrieveUpdateAPIView):
     """Manage the authenticated user"""
     serializer_class = UserSerializer
-    authentication_classes = [authentication.TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
     def get_object(self):